@@ -1,105 +1,37 @@
 # -*- coding: utf-8 -*-
 
 from flask import current_app as app, request, jsonify
-from recommendation_engine import RecommendationEngine
-
-recommendation_engine = RecommendationEngine()
-
-# @app.route('/search', methods=['GET'])
-# def search():
-#     query = request.args.get('q')
-#     response = app.elasticsearch.search(
-#         index="destinations",
-#         body={
-#             "query": {
-#                 "multi_match": {
-#                     "query": query,
-#                     "fields": ["destination", "activities"]
-#                 }
-#             }
-#         }
-#     )
-#     return jsonify(response['hits']['hits'])
-
+from recommendation_engine import get_recommendation_engine
+from utils.recommendations import parse_recommendations_request, recommendation_results
+from utils.responses import build_json_response
+from utils.search_request import parse_search_request, complete_search
 
 
 @app.route('/search', methods=['GET'])
 def search():
-    # Extract query and filters from the request
-    query = request.args.get('q', '').strip()
-    filters = {
-        'type': request.args.get('type', None),
-        'season': request.args.get('season', None),
-        'maxPrice': request.args.get('maxPrice', None),
-        'activities': request.args.get('activities', None),
-    }
-    sort = request.args.get('sort', 'price')
-
-    if not query:
-        return jsonify([])  # Return an empty list if query is missing
-
-    # Build Elasticsearch filters dynamically
-    must_filters = []
-
-    if filters['type']:
-        must_filters.append({"match": {"type": filters['type']}})
-    if filters['season']:
-        must_filters.append({"match": {"season": filters['season']}})
-    if filters['maxPrice']:
-        must_filters.append({"range": {"price": {"lte": int(filters['maxPrice'])}}})
-    if filters['activities']:
-        must_filters.append({"match": {"activities": filters['activities']}})
-
-    # Elasticsearch query
-    response = app.elasticsearch.search(
-        index="destinations",
-        body={
-            "query": {
-                "bool": {
-                    "must": must_filters,
-                    "should": [
-                        {
-                            "multi_match": {
-                                "query": query,
-                                "fields": [
-                                    "destination^3",
-                                    "type^2",
-                                    "activities",
-                                    "season"
-                                ],
-                                "fuzziness": "AUTO",
-                                "operator": "or"
-                            }
-                        }
-                    ],
-                    "minimum_should_match": 1
-                }
-            },
-            "sort": [
-                {sort: {"order": "asc"}},  # Sort dynamically based on user input
-                "_score"
-            ]
-        }
-    )
-
-    # Format the response
-    results = [
-        {
-            'score': hit['_score'],
-            **hit['_source']
-        }
-        for hit in response['hits']['hits']
-    ]
-
-    return jsonify(results)
+    # Same parameters and response as run.py's /search
+    try:
+        params = parse_search_request(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if params is None:
+        return jsonify([])  # Return an empty list if there is neither a query nor a location
+
+    if params.searches:
+        result = app.elasticsearch.msearch(searches=params.searches)
+    else:
+        result = app.elasticsearch.search(index="destinations", body=params.body)
+    payload, cursor = complete_search(params, result)
+    return build_json_response(app.response_class, payload, request.headers.get('Accept-Encoding'),
+                               headers={'X-Next-Cursor': cursor} if cursor else None)
 
 
 @app.route('/recommendations', methods=['GET'])
 def recommendations():
-    user_id = request.args.get('user_id')
-    if not user_id:
-        return jsonify({"error": "User ID is required"}), 400
+    try:
+        user_id, fields = parse_recommendations_request(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    response = recommendation_engine.get_personalized_recommendations(user_id)
-    results = [hit['_source'] for hit in response['hits']['hits']]
-    return jsonify(results)
\ No newline at end of file
+    response = get_recommendation_engine().get_personalized_recommendations(user_id, fields)
+    return jsonify(recommendation_results(response))
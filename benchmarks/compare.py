@@ -0,0 +1,46 @@
+"""
+Compare two benchmark result files case by case.
+
+    python -m benchmarks.compare benchmarks/results/load-abc123-....json benchmarks/results/load-def456-....json
+"""
+import argparse
+import json
+
+# Metrics where a lower value is better; everything else (throughput) is higher-is-better
+LOWER_IS_BETTER = ("_ms", "_us")
+
+
+def compare(baseline, candidate):
+    rows = []
+    for case, metrics in candidate["results"].items():
+        before = baseline["results"].get(case)
+        if before is None:
+            continue
+        for metric, value in metrics.items():
+            if not isinstance(value, (int, float)) or metric not in before or metric in ("requests", "calls_per_run"):
+                continue
+            change = (value - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            better = change < 0 if metric.endswith(LOWER_IS_BETTER) else change > 0
+            rows.append((case, metric, before[metric], value, change, better))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.candidate) as file:
+        candidate = json.load(file)
+
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+    for case, metric, before, after, change, better in compare(baseline, candidate):
+        marker = "" if abs(change) < 5 else (" better" if better else " WORSE")
+        print(f"{case:36} {metric:12} {before:12.2f} -> {after:12.2f}  {change:+7.1f}%{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,533 @@
+"""
+In-memory stand-in for the subset of the Elasticsearch client the app uses, so
+benchmarks run without a cluster.
+
+Queries are evaluated by scanning every document, with simplified relevance
+(token overlap times boost, no fuzziness). Absolute latencies therefore
+reflect the app plus this scan, not a real cluster. Compare runs of the same
+harness across commits, not against production numbers.
+"""
+import contextlib
+import copy
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig, ObjectApiResponse, SerializerCollection
+from elasticsearch import NotFoundError
+from config import Config
+from utils.geo import haversine_km
+from utils.reviews import split_reviews, summary_delta
+
+_TOKEN = re.compile(r"\w+")
+# Multi-fields are evaluated against their parent field
+_SUBFIELDS = (".keyword", ".suggest")
+
+SEASONS = ["spring", "summer", "autumn", "winter"]
+BUDGETS = ["low", "medium", "high"]
+
+
+def _tokens(value):
+    if isinstance(value, list):
+        return set(itertools.chain.from_iterable(_tokens(item) for item in value))
+    return set(_TOKEN.findall(str(value).lower()))
+
+
+def _field(source, path):
+    for suffix in _SUBFIELDS:
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+    value = source
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _values(value):
+    return value if isinstance(value, list) else [value]
+
+
+def _normalize(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+def _unpack(spec, key):
+    # {"field": value} or {"field": {"<key>": value, "boost": b}}
+    (field, params), = spec.items()
+    if isinstance(params, dict):
+        return field, params.get(key), params.get("boost", 1.0)
+    return field, params, 1.0
+
+
+class _Indices:
+    def __init__(self, store):
+        self._store = store
+
+    def exists(self, index, **kwargs):
+        return all(name in self._store.indices_store for name in index.split(","))
+
+    def get_alias(self, index, **kwargs):
+        return {f"{name}_v1": {"aliases": {name: {}}} for name in index.split(",") if name in self._store.indices_store}
+
+    def stats(self, index, metric=None, **kwargs):
+        documents = self._store.indices_store.get(index, {})
+        return {
+            "_all": {"primaries": {
+                "docs": {"count": len(documents)},
+                "indexing": {"index_total": self._store.writes.get(index, 0), "delete_total": 0}
+            }},
+            "indices": {f"{index}_v1": {}} if index in self._store.indices_store else {}
+        }
+
+    def refresh(self, index=None, **kwargs):
+        return {}
+
+
+class _Transport:
+    serializers = SerializerCollection()
+
+
+class _Otel:
+    # Tracing hooks elasticsearch.helpers calls around bulk requests; nothing is traced
+    def helpers_span(self, span_name):
+        return contextlib.nullcontext()
+
+    def use_span(self, span):
+        return contextlib.nullcontext()
+
+
+class FakeElasticsearch:
+    """
+    :param latency: Seconds added to every call to imitate a network round-trip.
+    """
+
+    def __init__(self, latency=0.0):
+        self.indices_store = {}  # {index: {_id: source}}
+        self.writes = {}
+        self.latency = latency
+        self.indices = _Indices(self)
+        # Enough of the client internals for elasticsearch.helpers.bulk, e.g. event buffer flushes
+        self.transport = _Transport()
+        self._otel = _Otel()
+        self._client_meta = ()
+        self._lock = threading.Lock()
+        self._pits = {}  # {pit id: index}; reads see live data rather than a frozen snapshot
+
+    def add(self, index, doc_id, source):
+        with self._lock:
+            self.indices_store.setdefault(index, {})[doc_id] = source
+            self.writes[index] = self.writes.get(index, 0) + 1
+
+    # -- client API -------------------------------------------------------
+
+    def options(self, **kwargs):
+        return self
+
+    def ping(self, **kwargs):
+        return True
+
+    def info(self, **kwargs):
+        return {"version": {"number": "8.0.0-fake"}}
+
+    def close(self):
+        pass
+
+    def get(self, index, id, source_includes=None, **kwargs):
+        self._sleep()
+        source = self.indices_store.get(index, {}).get(id)
+        if source is None:
+            raise NotFoundError("Not found", _meta(404), {"found": False})
+        return {"_index": index, "_id": id, "found": True, "_source": _project(source, source_includes)}
+
+    def mget(self, index=None, ids=None, docs=None, source_includes=None, **kwargs):
+        self._sleep()
+        requests = docs or [{"_index": index, "_id": doc_id} for doc_id in ids]
+        results = []
+        for request in requests:
+            name = request.get("_index", index)
+            source = self.indices_store.get(name, {}).get(request["_id"])
+            if source is None:
+                results.append({"_index": name, "_id": request["_id"], "found": False})
+            else:
+                includes = request.get("_source", source_includes)
+                results.append({"_index": name, "_id": request["_id"], "found": True,
+                                "_source": _project(source, includes)})
+        return {"docs": results}
+
+    def index(self, index, body=None, document=None, id=None, **kwargs):
+        self._sleep()
+        doc_id = id or f"{index}_{self.writes.get(index, 0) + 1}"
+        self.add(index, doc_id, copy.deepcopy(body if body is not None else document))
+        return {"_index": index, "_id": doc_id, "result": "created"}
+
+    def bulk(self, operations=None, index=None, **kwargs):
+        """
+        Apply index, create, delete and partial-document update actions from a _bulk payload.
+        """
+        self._sleep()
+        lines = iter([json.loads(line) for line in operations])
+        items = []
+        for header in lines:
+            (action, meta), = header.items()
+            name, doc_id = meta.get("_index", index), meta.get("_id")
+            body = next(lines) if action != "delete" else None
+            documents = self.indices_store.setdefault(name, {})
+            status, error = 200, None
+            if action == "index":
+                doc_id = doc_id or f"{name}_{self.writes.get(name, 0) + 1}"
+                status = 200 if doc_id in documents else 201
+                self.add(name, doc_id, body)
+            elif action == "create":
+                doc_id = doc_id or f"{name}_{self.writes.get(name, 0) + 1}"
+                if doc_id in documents:
+                    status, error = 409, "version_conflict_engine_exception"
+                else:
+                    status = 201
+                    self.add(name, doc_id, body)
+            elif action == "delete":
+                status = 200 if documents.pop(doc_id, None) is not None else 404
+            elif action == "update" and "doc" in body:
+                if doc_id in documents:
+                    self.add(name, doc_id, {**documents[doc_id], **body["doc"]})
+                elif "upsert" in body or body.get("doc_as_upsert"):
+                    status = 201
+                    self.add(name, doc_id, body.get("upsert", body["doc"]))
+                else:
+                    status, error = 404, "document_missing_exception"
+            else:
+                status, error = 400, "Scripted updates are not supported by the fake"
+            item = {"_index": name, "_id": doc_id, "status": status}
+            if error:
+                item["error"] = {"type": error, "reason": error}
+            items.append({action: item})
+        return ObjectApiResponse(body={"took": 0, "errors": any("error" in next(iter(item.values())) for item in items),
+                                       "items": items}, meta=_meta(200))
+
+    def search(self, index=None, body=None, scroll=None, size=None, **kwargs):
+        self._sleep()
+        body = dict(body or {})
+        if size is not None:
+            body["size"] = size
+        response = self._search(index, body)
+        if scroll:
+            # Everything comes back in the first page; the follow-up scroll is empty
+            response["hits"]["hits"] = self._search(index, {**body, "size": 10 ** 9})["hits"]["hits"]
+            response["_scroll_id"] = "fake-scroll"
+        return response
+
+    def open_point_in_time(self, index, keep_alive=None, **kwargs):
+        pit_id = f"fake-pit-{len(self._pits) + 1}"
+        self._pits[pit_id] = index
+        return {"id": pit_id}
+
+    def close_point_in_time(self, id=None, body=None, **kwargs):
+        return {"succeeded": self._pits.pop(id or body["id"], None) is not None, "num_freed": 1}
+
+    def scroll(self, scroll_id=None, **kwargs):
+        return {"_scroll_id": scroll_id, "_shards": _SHARDS, "hits": {"hits": []}}
+
+    def clear_scroll(self, **kwargs):
+        return {}
+
+    def msearch(self, searches=None, body=None, **kwargs):
+        self._sleep()
+        lines = searches or body
+        responses = []
+        for header, request in zip(lines[::2], lines[1::2]):
+            try:
+                responses.append(self._search(header.get("index"), dict(request)))
+            except Exception as e:
+                responses.append({"error": {"type": type(e).__name__, "reason": str(e)}})
+        return {"responses": responses}
+
+    # -- query evaluation -------------------------------------------------
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _search(self, index, body):
+        started = time.perf_counter()
+        sort = body.get("sort") or ["_score"]
+        if body.get("pit"):
+            index = self._pits[body["pit"]["id"]]
+            # Point in time searches get an implicit _shard_doc tiebreaker, so search_after never skips ties
+            sort = list(sort) + [{"_shard_doc": "asc"}]
+        documents = self.indices_store.get(index, {})
+        query = body.get("query", {"match_all": {}})
+
+        matched = []
+        for position, (doc_id, source) in enumerate(documents.items()):
+            score = _score(query, source)
+            if score is not None:
+                matched.append((doc_id, source, score, position))
+
+        keyed = [(doc_id, source, score, _sort_values(sort, source, score, position))
+                 for doc_id, source, score, position in matched]
+        keyed.sort(key=lambda item: _sort_key(sort, item[3]))
+        if body.get("search_after"):
+            after = _sort_key(sort, body["search_after"])
+            keyed = [item for item in keyed if _sort_key(sort, item[3]) > after]
+
+        size = body.get("size", 10)
+        includes = body.get("_source")
+        hits = [
+            {"_index": index, "_id": doc_id, "_score": score, "_source": _project(source, includes), "sort": values}
+            for doc_id, source, score, values in keyed[:size]
+        ]
+        response = {
+            "took": int((time.perf_counter() - started) * 1000),
+            "timed_out": False,
+            "_shards": _SHARDS,
+            "hits": {"total": {"value": len(matched), "relation": "eq"}, "hits": hits}
+        }
+        if body.get("pit"):
+            response["pit_id"] = body["pit"]["id"]
+        if body.get("aggs"):
+            response["aggregations"] = {
+                name: _aggregate(spec, [source for _, source, _, _ in matched]) for name, spec in body["aggs"].items()
+            }
+        if body.get("suggest"):
+            response["suggest"] = {
+                name: _suggest(spec, documents) for name, spec in body["suggest"].items()
+            }
+        return response
+
+
+_SHARDS = {"total": 1, "successful": 1, "skipped": 0, "failed": 0}
+
+
+def _meta(status):
+    return ApiResponseMeta(status=status, http_version="1.1", headers=HttpHeaders(), duration=0.0,
+                           node=NodeConfig("http", "localhost", 9200))
+
+
+def _project(source, includes):
+    if includes is None or includes is True:
+        return source
+    if includes is False:
+        return {}
+    if isinstance(includes, dict):
+        excludes = set(includes.get("excludes", ()))
+        source = {field: value for field, value in source.items() if field not in excludes}
+        includes = includes.get("includes")
+        if not includes:
+            return source
+    return {field: source[field] for field in includes if field in source}
+
+
+def _score(query, source):
+    """
+    :return: Relevance score if `source` matches `query`, otherwise None.
+    """
+    (kind, spec), = query.items()
+    if kind == "match_all":
+        return 1.0
+    if kind == "bool":
+        return _score_bool(spec, source)
+    if kind == "term":
+        field, value, boost = _unpack(spec, "value")
+        stored = [_normalize(v) for v in _values(_field(source, field))]
+        return boost if _normalize(value) in stored else None
+    if kind == "terms":
+        (field, values), = spec.items()
+        stored = {_normalize(v) for v in _values(_field(source, field))}
+        return 1.0 if stored & {_normalize(v) for v in values} else None
+    if kind == "range":
+        (field, bounds), = spec.items()
+        value = _field(source, field)
+        if value is None:
+            return None
+        checks = {"gte": value >= bounds.get("gte", value), "lte": value <= bounds.get("lte", value),
+                  "gt": "gt" not in bounds or value > bounds["gt"], "lt": "lt" not in bounds or value < bounds["lt"]}
+        return 1.0 if all(checks.values()) else None
+    if kind == "match":
+        field, text, boost = _unpack(spec, "query")
+        overlap = len(_tokens(text) & _tokens(_field(source, field)))
+        return boost * overlap if overlap else None
+    if kind == "multi_match":
+        total = 0.0
+        for field in spec["fields"]:
+            name, _, boost = field.partition("^")
+            total += float(boost or 1) * len(_tokens(spec["query"]) & _tokens(_field(source, name)))
+        return total or None
+    if kind == "prefix":
+        field, value, boost = _unpack(spec, "value")
+        return boost if any(str(v).startswith(value) for v in _values(_field(source, field)) if v is not None) else None
+    if kind == "geo_distance":
+        field, origin = next((name, value) for name, value in spec.items() if name != "distance")
+        distance = _distance_km(source, field, origin)
+        return 1.0 if distance is not None and distance <= _to_km(spec["distance"]) else None
+    raise NotImplementedError(f"Query type '{kind}' is not supported by the fake")
+
+
+def _to_km(distance):
+    value, unit = re.match(r"([\d.]+)(km|mi|m)", distance).groups()
+    return float(value) * {"km": 1.0, "mi": 1.609344, "m": 0.001}[unit]
+
+
+def _distance_km(source, field, origin):
+    location = _field(source, field)
+    if not location:
+        return None
+    return haversine_km(origin["lat"], origin["lon"], location["lat"], location["lon"])
+
+
+def _score_bool(spec, source):
+    score = 0.0
+    for clause in spec.get("must", []):
+        clause_score = _score(clause, source)
+        if clause_score is None:
+            return None
+        score += clause_score
+    for clause in spec.get("filter", []):
+        if _score(clause, source) is None:
+            return None
+    for clause in spec.get("must_not", []):
+        if _score(clause, source) is not None:
+            return None
+    matched_should = 0
+    for clause in spec.get("should", []):
+        clause_score = _score(clause, source)
+        if clause_score is not None:
+            matched_should += 1
+            score += clause_score
+    default_minimum = 0 if spec.get("must") or spec.get("filter") else 1 if spec.get("should") else 0
+    if matched_should < spec.get("minimum_should_match", default_minimum):
+        return None
+    return score or 1.0
+
+
+def _sort_values(sort, source, score, position):
+    values = []
+    for entry in sort:
+        field = entry if isinstance(entry, str) else next(iter(entry))
+        if field == "_shard_doc":
+            values.append(position)
+        elif field == "_geo_distance":
+            (location_field, origin), = ((name, value) for name, value in entry[field].items()
+                                         if name not in ("order", "unit"))
+            values.append(_distance_km(source, location_field, origin))
+        else:
+            values.append(score if field == "_score" else _field(source, field))
+    return values
+
+
+def _sort_key(sort, values):
+    key = []
+    for entry, value in zip(sort, values):
+        field = entry if isinstance(entry, str) else next(iter(entry))
+        order = "desc" if field == "_score" else "asc"
+        if isinstance(entry, dict):
+            order = entry[field].get("order", order) if isinstance(entry[field], dict) else entry[field]
+        missing = value is None
+        if isinstance(value, (int, float)):
+            value = -value if order == "desc" else value
+            key.append((missing, 0, value, ""))
+        else:
+            text = str(value or "")
+            # Strings sort descending by inverting the code points
+            key.append((missing, 1, 0, "".join(chr(0x10FFFF - ord(c)) for c in text) if order == "desc" else text))
+    return key
+
+
+def _aggregate(spec, sources):
+    if "filter" in spec:
+        filtered = [source for source in sources if _score(spec["filter"], source) is not None]
+        result = {"doc_count": len(filtered)}
+        for name, child in spec.get("aggs", {}).items():
+            result[name] = _aggregate(child, filtered)
+        return result
+    if "terms" in spec:
+        counts = {}
+        for source in sources:
+            for value in _values(_field(source, spec["terms"]["field"])):
+                if value is not None:
+                    counts[_normalize(value)] = counts.get(_normalize(value), 0) + 1
+        buckets = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))[:spec["terms"].get("size", 10)]
+        return {"buckets": [{"key": key, "doc_count": count} for key, count in buckets]}
+    if "range" in spec:
+        field = spec["range"]["field"]
+        buckets = []
+        for bucket in spec["range"]["ranges"]:
+            low, high = bucket.get("from", float("-inf")), bucket.get("to", float("inf"))
+            count = sum(1 for source in sources if (_field(source, field) is not None
+                                                    and low <= _field(source, field) < high))
+            buckets.append({**bucket, "doc_count": count})
+        return {"buckets": buckets}
+    raise NotImplementedError(f"Aggregation {list(spec)} is not supported by the fake")
+
+
+def _suggest(spec, documents):
+    field = spec["completion"]["field"]
+    prefix = " ".join(spec["prefix"].lower().split())
+    options, seen = [], set()
+    for doc_id, source in documents.items():
+        text = str(_field(source, field) or "")
+        if text.lower().startswith(prefix) and text not in seen:
+            seen.add(text)
+            options.append({"text": text, "_id": doc_id, "_score": 1.0, "_source": source})
+    return [{"text": spec["prefix"], "options": options[:spec["completion"].get("size", 5)]}]
+
+
+def seed(es, destinations_path="dataset_with_ids.json", reviews_path="review_dataset.json",
+         multiplier=1, users=1000, random_seed=42):
+    """
+    Load the sample datasets into `es`, `multiplier` times over, plus synthetic users and trends.
+
+    Copies beyond the first get new ids (destination_101, ...) and slightly jittered
+    prices and ratings, so the index grows without every copy tying on sort order.
+    :return: Dict with the seeded destination ids and user ids.
+    """
+    rng = random.Random(random_seed)
+    with open(destinations_path) as file:
+        destinations = json.load(file)
+    with open(reviews_path) as file:
+        reviews = {}
+        for review in split_reviews(json.load(file)):
+            reviews.setdefault(review["destination_id"], []).append(review)
+
+    destination_ids = []
+    for copy_number in range(multiplier):
+        for offset, destination in enumerate(destinations):
+            destination_id = destination["id"] if copy_number == 0 \
+                else f"destination_{copy_number * len(destinations) + offset + 1}"
+            document = {**destination, "id": destination_id}
+            if copy_number:
+                document["price"] = max(0, destination["price"] + rng.randint(-250, 250))
+                document["rating"] = min(5, max(1, destination["rating"] + rng.choice((-1, 0, 0, 1))))
+            es.add("destinations", destination_id, document)
+            destination_ids.append(destination_id)
+
+            destination_reviews = [{**review, "id": f"{destination_id}_{review['id']}", "destination_id": destination_id}
+                                   for review in reviews.get(destination["id"], [])]
+            for review in destination_reviews:
+                es.add("destination_reviews", review["id"], review)
+            if destination_reviews:
+                es.add(Config.REVIEW_SUMMARIES_INDEX, destination_id, summary_delta(destination_id, destination_reviews))
+
+    activities = sorted({a.strip().lower() for d in destinations for a in str(d.get("activities", "")).split(",")})
+    user_ids = []
+    for number in range(1, users + 1):
+        user_id = f"user_{number}"
+        es.add("user_profiles", user_id, {
+            "user_id": user_id,
+            "preferences": {
+                "activities": rng.sample(activities, min(3, len(activities))),
+                "budget_range": rng.choice(BUDGETS),
+                "preferred_seasons": rng.sample(SEASONS, 2)
+            }
+        })
+        user_ids.append(user_id)
+
+    for number, activity in enumerate(activities):
+        es.add("travel_trends", f"trend_{number}", {
+            "trend": activity, "season": rng.choice(SEASONS), "popularity": rng.randint(1, 100)
+        })
+    for name in ("user_interactions", "precomputed_recommendations", "destination_similarities"):
+        es.indices_store.setdefault(name, {})
+    return {"destination_ids": destination_ids, "user_ids": user_ids}
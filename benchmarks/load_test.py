@@ -0,0 +1,127 @@
+"""
+Drive the Flask app (run.py) against the in-memory Elasticsearch stand-in and
+report throughput and latency percentiles per endpoint.
+
+    python -m benchmarks.load_test --multiplier 10 --concurrency 8 --duration 20
+
+Results are written as JSON (see benchmarks/compare.py to diff two runs).
+"""
+import argparse
+import random
+import threading
+import time
+from config import Config
+from benchmarks.fake_elasticsearch import FakeElasticsearch, seed
+from benchmarks.report import summarize, write_report
+from utils.es_utils import set_elasticsearch
+
+QUERIES = ["beach", "paris", "museums", "hiking", "city", "dining", "tokyo", "adventure", "spring", "culture"]
+TYPES = ["beach", "city", "adventure", "cultural", "nature"]
+SEASONS = ["spring", "summer", "autumn", "winter"]
+
+
+def search_path(rng, dataset):
+    path = f"/search?q={rng.choice(QUERIES)}&size=20"
+    if rng.random() < 0.5:
+        path += f"&type={rng.choice(TYPES)}"
+    if rng.random() < 0.3:
+        path += f"&season={rng.choice(SEASONS)}&maxPrice={rng.choice((2000, 5000, 8000))}"
+    return path
+
+
+ENDPOINTS = {
+    "search": search_path,
+    "recommendations": lambda rng, dataset: f"/recommendations?user_id={rng.choice(dataset['user_ids'])}",
+    "destination": lambda rng, dataset: f"/destination/{rng.choice(dataset['destination_ids'])}",
+}
+
+
+def load_app(fake):
+    """
+    Import run.py with the stand-in installed as the process-wide client.
+    """
+    set_elasticsearch(fake)
+    import run
+    return run.app
+
+
+def _worker(app, endpoint, dataset, deadline, max_requests, counter, samples, errors, worker_seed):
+    rng = random.Random(worker_seed)
+    client = app.test_client()
+    make_path = ENDPOINTS[endpoint]
+    while time.perf_counter() < deadline:
+        with counter["lock"]:
+            if max_requests and counter["sent"] >= max_requests:
+                return
+            counter["sent"] += 1
+        path = make_path(rng, dataset)
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append(time.perf_counter() - started)
+        if response.status_code >= 500:
+            errors.append(response.status_code)
+
+
+def run_endpoint(app, endpoint, dataset, concurrency, duration, max_requests=None, warmup=20):
+    """
+    Hammer one endpoint from `concurrency` threads for `duration` seconds (or `max_requests`).
+    :return: Summary dict with throughput and latency percentiles.
+    """
+    client = app.test_client()
+    rng = random.Random(0)
+    for _ in range(warmup):
+        client.get(ENDPOINTS[endpoint](rng, dataset))
+
+    samples, errors = [], []
+    counter = {"sent": 0, "lock": threading.Lock()}
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [
+        threading.Thread(target=_worker, args=(app, endpoint, dataset, deadline, max_requests, counter,
+                                               samples, errors, number))
+        for number in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(samples, errors, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API against an in-memory Elasticsearch stand-in.")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma separated subset of endpoints")
+    parser.add_argument("--multiplier", type=int, default=1, help="Copies of the sample datasets to load")
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic user profiles to create")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per endpoint")
+    parser.add_argument("--requests", type=int, help="Stop each endpoint after this many requests")
+    parser.add_argument("--es-latency-ms", type=float, default=0.0, help="Simulated round-trip per ES call")
+    parser.add_argument("--no-search-cache", action="store_true", help="Measure every /search against ES")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/load-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    if args.no_search_cache:
+        Config.SEARCH_CACHE_ENABLED = False
+    fake = FakeElasticsearch(latency=args.es_latency_ms / 1000.0)
+    dataset = seed(fake, multiplier=args.multiplier, users=args.users)
+    app = load_app(fake)
+
+    results = {}
+    for endpoint in args.endpoints.split(","):
+        results[endpoint] = run_endpoint(app, endpoint, dataset, args.concurrency, args.duration, args.requests)
+        summary = results[endpoint]
+        print(f"{endpoint:16} {summary['requests']:7d} req  {summary['throughput']:9.1f} req/s  "
+              f"p50 {summary['p50_ms']:7.2f} ms  p95 {summary['p95_ms']:7.2f} ms  p99 {summary['p99_ms']:7.2f} ms  "
+              f"errors {summary['errors']}")
+
+    settings = {
+        "multiplier": args.multiplier, "destinations": len(dataset["destination_ids"]), "users": args.users,
+        "concurrency": args.concurrency, "duration": args.duration, "requests": args.requests,
+        "es_latency_ms": args.es_latency_ms, "search_cache": Config.SEARCH_CACHE_ENABLED
+    }
+    print(f"Results written to {write_report('load', settings, results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Micro-benchmarks for query construction on the request path.
+
+    python -m benchmarks.query_construction --trends 500
+
+Each case reports the best and median time per call over several timeit repeats.
+"""
+import argparse
+import random
+import statistics
+import timeit
+from benchmarks.fake_elasticsearch import FakeElasticsearch, seed
+from benchmarks.report import write_report
+from utils.es_utils import set_elasticsearch
+from utils.facets import FACET_AGGREGATIONS, build_facets_body
+from utils.query_builder import build_filter_clauses, build_search_body, build_trend_clauses, trend_weights
+
+FILTERS = {'type': 'beach', 'season': 'summer', 'maxPrice': '5000', 'rating': '4', 'timezone': 'ist'}
+
+
+def synthetic_trends(count, rng):
+    seasons = ["spring", "summer", "autumn", "winter"]
+    return [{"trend": f"activity {number}", "season": rng.choice(seasons), "popularity": rng.randint(1, 1000)}
+            for number in range(count)]
+
+
+def time_call(function, repeat=5):
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    runs = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {"calls_per_run": number, "best_us": min(runs) * 1e6, "median_us": statistics.median(runs) * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time query construction in RecommendationEngine and /search.")
+    parser.add_argument("--trends", type=int, default=200, help="Travel trend documents fed to the builders")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/queries-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    fake = FakeElasticsearch()
+    seed(fake, users=10)
+    set_elasticsearch(fake)
+    # Imported after the stand-in is installed so the engine binds to it
+    from recommendation_engine import RecommendationEngine
+
+    engine = RecommendationEngine()
+    trends = synthetic_trends(args.trends, rng)
+    fake.indices_store["travel_trends"] = {f"trend_{n}": trend for n, trend in enumerate(trends)}
+    engine.trends_cache.refresh(force=True)
+    preferences = {"activities": ["hiking", "museums", "dining"], "budget_range": "medium",
+                   "preferred_seasons": ["summer", "winter"]}
+    engine.build_recommendation_body(preferences)  # Compile the trend clauses once, as serving would
+
+    cases = {
+        "recommendation_body_cached_trends": lambda: engine.build_recommendation_body(preferences),
+        "trend_weights": lambda: trend_weights(trends),
+        "build_trend_clauses": lambda: build_trend_clauses(trends),
+        "search_body": lambda: build_search_body("beach holiday", FILTERS),
+        "filter_clauses": lambda: build_filter_clauses(FILTERS),
+        "facets_body": lambda: build_facets_body("beach holiday", build_filter_clauses(FILTERS),
+                                                 list(FACET_AGGREGATIONS)),
+    }
+    results = {}
+    for name, function in cases.items():
+        results[name] = time_call(function, args.repeat)
+        print(f"{name:36} best {results[name]['best_us']:9.2f} us   median {results[name]['median_us']:9.2f} us")
+
+    engine.trends_cache.stop()
+    print(f"Results written to {write_report('queries', {'trends': args.trends, 'repeat': args.repeat}, results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
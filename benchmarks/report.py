@@ -0,0 +1,68 @@
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(sorted_samples, fraction):
+    # Nearest-rank percentile over pre-sorted samples
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, math.ceil(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[rank]
+
+
+def summarize(samples, errors, elapsed):
+    """
+    :param samples: Request latencies in seconds.
+    :param errors: Status codes of failed requests.
+    :param elapsed: Wall-clock seconds the samples were collected over.
+    """
+    ordered = sorted(samples)
+    return {
+        "requests": len(ordered),
+        "errors": len(errors),
+        "throughput": len(ordered) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(ordered) / len(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_report(kind, settings, results, output=None):
+    """
+    Save a benchmark run with enough context (commit, host, settings) to compare it later.
+    :return: Path of the written file.
+    """
+    commit = git_commit()
+    now = datetime.now(timezone.utc)
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{kind}-{commit}-{now.strftime('%Y%m%dT%H%M%S')}.json")
+    report = {
+        "kind": kind,
+        "commit": commit,
+        "timestamp": now.isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "settings": settings,
+        "results": results
+    }
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    return output
@@ -12,6 +12,127 @@ class Config:
     ELASTICSEARCH_SCHEME = 'https'
     ELASTICSEARCH_VERIFY_CERTS = False
 
+    # Elasticsearch connection pool settings, shared by every component in a process
+    ELASTICSEARCH_POOL_SIZE = 10  # Connections kept per node
+    ELASTICSEARCH_HTTP_KEEP_ALIVE = True
+    ELASTICSEARCH_REQUEST_TIMEOUT = 10
+    ELASTICSEARCH_RETRY_ON_TIMEOUT = True
+    ELASTICSEARCH_MAX_RETRIES = 3
+    ELASTICSEARCH_HTTP_COMPRESS = False
+    ELASTICSEARCH_SNIFF_ON_START = False  # Leave off when the cluster sits behind a proxy or load balancer
+    ELASTICSEARCH_SNIFF_ON_NODE_FAILURE = False
+    ELASTICSEARCH_SNIFF_TIMEOUT = 1
+    ELASTICSEARCH_MIN_DELAY_BETWEEN_SNIFFING = 60
+
+    # Startup and readiness settings; workers serve immediately and report readiness on /readyz
+    REQUIRED_INDICES = ['user_profiles', 'travel_trends', 'destinations']
+    STARTUP_RETRY_BASE_DELAY = 0.5  # Seconds before the first reconnect; doubles per attempt, with full jitter
+    STARTUP_RETRY_MAX_DELAY = 30
+    STARTUP_MAX_RETRIES = 8  # Attempts made by wait_for_elasticsearch() in scripts
+    READINESS_CHECK_INTERVAL = 15  # Seconds between background re-checks once ready
+
+    # Travel trends cache settings
+    TRENDS_INDEX = 'travel_trends'
+    TRENDS_CACHE_TTL = 300  # Seconds before a snapshot is reloaded even if unchanged
+    TRENDS_REFRESH_INTERVAL = 30  # Seconds between background version checks
+    TRENDS_FETCH_SIZE = 10000
+    TRENDS_MAX_CLAUSES = 512  # Keeps recommendation queries well under indices.query.bool.max_clause_count
+
+    # Recommendation settings
+    RECOMMENDATION_BACKEND = 'elasticsearch'  # 'numpy' scores an in-memory copy of the catalog instead
+    RECOMMENDATION_CATALOG_PATH = 'dataset_with_ids.json'
+    RECOMMENDATION_SIZE = 10
+    RECOMMENDATIONS_BATCH_LIMIT = 100  # Maximum users per batch request
+    PRECOMPUTED_RECOMMENDATIONS_INDEX = 'precomputed_recommendations'
+    SERVE_PRECOMPUTED_RECOMMENDATIONS = False  # Serve /recommendations from the precompute job's output when present
+
+    # Similar destinations (similar_destinations.py)
+    SIMILAR_DESTINATIONS_INDEX = 'destination_similarities'
+    SIMILAR_DESTINATIONS_SIZE = 10  # Neighbours stored per destination
+    SIMILARITY_PRICE_BANDS = 5  # Quantile bands prices are bucketed into
+    SIMILARITY_INTERACTION_WEIGHT = 0.3  # Share of the score taken by co-interactions vs. content
+
+    # Per-user profile cache settings
+    PROFILE_CACHE_MAX_ENTRIES = 10000
+    PROFILE_CACHE_TTL = 300  # Bounds staleness for profiles changed by other processes
+    PROFILE_MISSING_CACHE_TTL = 30  # Users without a profile are remembered this long before asking again
+
+    # Buffered event writes (user interactions, saved recommendations)
+    EVENT_BUFFER_BATCH_SIZE = 500  # Events per _bulk request
+    EVENT_BUFFER_FLUSH_INTERVAL = 1.0  # Seconds before a partial batch is flushed
+    EVENT_BUFFER_MAX_PENDING = 10000  # Events held in memory before writers are pushed back
+    EVENT_BUFFER_PUT_TIMEOUT = 0.05  # Seconds a writer waits for room before the event is rejected
+
+    # Streaming trend aggregation (trend_aggregator.py)
+    TREND_HALF_LIFE = 6 * 3600  # Seconds for an interaction's weight to halve
+    TREND_TOP_K = 50  # Activity/season trends published to the travel trends index
+    TREND_SKETCH_WIDTH = 2048
+    TREND_SKETCH_DEPTH = 4
+    TREND_POLL_INTERVAL = 10  # Seconds between reads of new interactions
+    TREND_PUBLISH_INTERVAL = 60  # Seconds between trend publications
+    TREND_REPLAY_WINDOW = 24 * 3600  # Interactions replayed on start to rebuild the counters
+    TREND_LATENESS_WINDOW = 60  # Seconds re-read per poll for late flushes; keep well above EVENT_BUFFER_FLUSH_INTERVAL
+    TREND_INTERACTION_WEIGHTS = {'view': 1, 'click': 2, 'save': 5, 'book': 10}
+
+    # Pagination settings
+    SEARCH_DEFAULT_SIZE = 20
+    SEARCH_MAX_SIZE = 100  # Server-side cap on the `size` parameter
+    # Fields returned by list views; detail pages still fetch the full document
+    DESTINATION_LIST_FIELDS = ['id', 'destination', 'type', 'activities', 'season', 'price',
+                               'rating', 'reviews_count', 'timezone']
+
+    # Geo search (?lat=..&lon=..&radius=..&sort=distance, ?region=<geohash>)
+    GEOHASH_PRECISION = 4  # Characters in the stored geohash bucket, roughly 39 x 20 km cells
+    GEO_DEFAULT_RADIUS = '50km'  # Applied when lat/lon are given without a radius
+
+    # /search facet counts (?facets=true or ?facets=type,season)
+    FACET_TERMS_SIZE = 20  # Buckets returned per terms facet
+    FACET_PRICE_BOUNDS = [1000, 2500, 5000, 7500]  # Edges of the price facet bands
+
+    # /search response cache settings
+    SEARCH_CACHE_ENABLED = True
+    SEARCH_CACHE_BACKEND = 'memory'  # 'memory' for a per-process LRU, 'redis' to share entries between workers
+    SEARCH_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    SEARCH_CACHE_TTL = 300
+    SEARCH_CACHE_REDIS_URL = 'redis://localhost:6379/0'
+    SEARCH_CACHE_GENERATION_CHECK_INTERVAL = 10  # Seconds between destinations index generation checks
+
+    # Typeahead (/suggest)
+    SUGGEST_SIZE = 5
+    SUGGEST_MAX_SIZE = 10
+    SUGGEST_TRIE_MAX_PREFIX = 3  # Prefixes up to this many characters are answered in-process
+    SUGGEST_TRIE_REFRESH_INTERVAL = 60  # Seconds between destinations index generation checks
+
+    # Destination pages
+    DESTINATIONS_BATCH_LIMIT = 50  # Maximum ids accepted by /destinations?ids=...
+    REVIEWS_PAGE_SIZE = 10  # Reviews returned with a destination page, most helpful and most recent first
+    REVIEWS_PAGE_MAX_SIZE = 50  # Server-side cap on `reviews_size`
+    REVIEW_SUMMARIES_INDEX = 'review_summaries'  # Per-destination counts, rating histogram and latest date
+
+    # Bulk ingestion settings
+    BULK_CHUNK_SIZE = 1000  # Documents per _bulk request
+    BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024  # Byte cap per _bulk request
+    BULK_THREAD_COUNT = 4  # _bulk requests in flight at once
+    BULK_REQUEST_TIMEOUT = 120
+
+    # Versioned index settings
+    INDEX_GENERATIONS_TO_KEEP = 3  # Generations kept behind each alias for rollback, including the live one
+    INDEX_WARMUP_TIMEOUT = '60s'
+
+    # JSON responses (utils/responses.py)
+    RESPONSE_COMPRESSION_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+    RESPONSE_GZIP_LEVEL = 6
+    RESPONSE_BROTLI_QUALITY = 5  # Brotli is used when the client accepts it and the brotli package is installed
+    RESPONSE_STREAM_MIN_ITEMS = 50  # Lists and dicts at least this long (e.g. batch results) are streamed in chunks
+    RESPONSE_STREAM_CHUNK_ITEMS = 25  # Entries encoded per streamed chunk
+    FIELDS_MAX = 20  # Maximum fields accepted by `fields=` projections
+
+    # Observability
+    LOG_LEVEL = 'INFO'
+    LOG_FORMAT = 'json'  # 'json' for one object per line, 'text' for reading in a terminal
+    ES_PROFILE_ENABLED = False  # Attach Elasticsearch `profile: true` to sampled searches and log the breakdown
+    ES_PROFILE_SAMPLE_RATE = 0.01  # Share of searches profiled while enabled
+
     @staticmethod
     def get_elasticsearch_url():
         return f"{Config.ELASTICSEARCH_SCHEME}://{Config.ELASTICSEARCH_HOST}:{Config.ELASTICSEARCH_PORT}"
@@ -0,0 +1,167 @@
+import json
+import numpy as np
+from config import Config
+from recommendation_engine import RecommendationEngine, create_profile_cache
+from utils.trends_cache import TrendsCache
+from utils.query_builder import trend_weights
+from utils.destinations import split_activities
+from utils.responses import project
+from utils.log import get_logger
+
+logger = get_logger("in_memory_recommendation_engine")
+
+
+def load_catalog(file_path=Config.RECOMMENDATION_CATALOG_PATH):
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+
+class DestinationMatrix:
+    """
+    Column-oriented view of the destination catalog.
+
+    Each attribute is one array indexed by destination row: `price` and `rating`
+    as floats, `type` and `season` one-hot encoded, and activities as a boolean
+    incidence matrix (one bitset of activities per destination).
+    """
+
+    def __init__(self, destinations):
+        self.destinations = list(destinations)
+        self.price = np.array([d.get('price', 0) for d in self.destinations], dtype=np.float32)
+        self.rating = np.array([d.get('rating', 0) for d in self.destinations], dtype=np.float32)
+
+        self.types, self.type_onehot = self._one_hot([str(d.get('type', '')).lower() for d in self.destinations])
+        self.seasons, self.season_onehot = self._one_hot([str(d.get('season', '')).lower() for d in self.destinations])
+
+        activity_lists = [split_activities(d.get('activities')) for d in self.destinations]
+        self.activities = {a: i for i, a in enumerate(sorted({a for acts in activity_lists for a in acts}))}
+        self.activity_bits = np.zeros((len(self.destinations), len(self.activities)), dtype=bool)
+        for row, acts in enumerate(activity_lists):
+            self.activity_bits[row, [self.activities[a] for a in acts]] = True
+
+    def __len__(self):
+        return len(self.destinations)
+
+    def season_vector(self, weights):
+        return self._vector(self.seasons, weights)
+
+    def activity_vector(self, weights):
+        return self._vector(self.activities, weights)
+
+    @staticmethod
+    def _one_hot(values):
+        vocabulary = {v: i for i, v in enumerate(sorted(set(values)))}
+        matrix = np.zeros((len(values), len(vocabulary)), dtype=bool)
+        matrix[np.arange(len(values)), [vocabulary[v] for v in values]] = True
+        return vocabulary, matrix
+
+    @staticmethod
+    def _vector(vocabulary, weights):
+        vector = np.zeros(len(vocabulary), dtype=np.float32)
+        for value, weight in weights.items():
+            index = vocabulary.get(str(value).lower())
+            if index is not None:
+                vector[index] += weight
+        return vector
+
+
+class InMemoryRecommendationEngine(RecommendationEngine):
+    """
+    Recommendation backend that scores the whole catalog with NumPy instead of Elasticsearch.
+
+    It mirrors the Elasticsearch query: a destination qualifies when at least one
+    preferred or trending activity/season matches or its price fits the budget,
+    and results are ordered by rating with the match score breaking ties.
+    Activities are compared as whole phrases rather than analyzed tokens.
+
+    Without an Elasticsearch client it runs fully offline from `profiles` and `trends`.
+    """
+
+    def __init__(self, destinations=None, es=None, trends=None, profiles=None):
+        self.es = es
+        self.matrix = DestinationMatrix(destinations if destinations is not None else load_catalog())
+        self.trends_cache = TrendsCache(es) if es is not None and trends is None else None
+        self._static_trends = trends or []
+        self.profiles = profiles
+        self.profile_cache = create_profile_cache()
+        self._trend_vectors = (None, None)
+
+    def get_personalized_recommendations(self, user_id, fields=None):
+        preferences = self._get_preferences(user_id)
+        if preferences is None:
+            return {"hits": {"hits": []}}
+        return self._as_hits([project(d, fields) for d in self.recommend_batch([preferences])[0]])
+
+    def get_batch_recommendations(self, user_ids, size=Config.RECOMMENDATION_SIZE):
+        if self.profiles is not None:
+            preferences = {user_id: self.profiles[user_id] for user_id in user_ids if user_id in self.profiles}
+        else:
+            preferences = self._get_preferences_batch(user_ids)
+        return dict(zip(preferences, self.recommend_batch(list(preferences.values()), size)))
+
+    def update_user_profile(self, user_id, profile):
+        if self.profiles is None:
+            return super().update_user_profile(user_id, profile)
+        self.profiles[user_id] = profile['preferences']
+
+    def recommend(self, preferences, size=Config.RECOMMENDATION_SIZE):
+        return self.recommend_batch([preferences], size)[0]
+
+    def recommend_batch(self, preferences_list, size=Config.RECOMMENDATION_SIZE):
+        """
+        Score many users against the catalog in one set of matrix operations.
+        :param preferences_list: List of profile `preferences` dicts.
+        :param size: Number of destinations to return per user.
+        :return: One list of destination dicts per user, best first.
+        """
+        if not preferences_list or not len(self.matrix):
+            return [[] for _ in preferences_list]
+        matrix = self.matrix
+        season_trends, activity_trends = self._get_trend_vectors()
+
+        user_activities = np.stack([
+            matrix.activity_vector({a.lower(): 1 for a in p.get('activities', [])}) for p in preferences_list
+        ]) + activity_trends
+        user_seasons = np.stack([
+            matrix.season_vector({s.lower(): 1 for s in p.get('preferred_seasons', [])}) for p in preferences_list
+        ]) + season_trends
+        budgets = np.array([self._get_budget_range(p.get('budget_range')) for p in preferences_list], dtype=np.float32)
+
+        # (users, destinations) score matrix, one term per `should` clause family
+        scores = user_activities @ matrix.activity_bits.T.astype(np.float32)
+        scores += user_seasons @ matrix.season_onehot.T.astype(np.float32)
+        scores += (matrix.price[None, :] <= budgets[:, None]) & (matrix.price[None, :] >= 0)
+
+        # Rating dominates and score only breaks ties, like the Elasticsearch sort
+        ranking = matrix.rating[None, :] * (scores.max() + 1) + scores
+        ranking[scores <= 0] = -np.inf
+
+        k = min(size, len(matrix))
+        top = np.argpartition(-ranking, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-ranking[row, candidates], kind='stable')]
+            results.append([matrix.destinations[i] for i in ordered if np.isfinite(ranking[row, i])])
+        return results
+
+    def _get_preferences(self, user_id):
+        if self.profiles is not None:
+            return self.profiles.get(user_id)
+        try:
+            return self.get_preferences(user_id)
+        except Exception as e:
+            logger.error("Error fetching user profile", extra={"user_id": user_id, "error": str(e)})
+            return None
+
+    def _get_trend_vectors(self):
+        snapshot = self.trends_cache.get() if self.trends_cache else None
+        compiled_for, vectors = self._trend_vectors
+        if vectors is None or compiled_for is not snapshot:
+            season_boosts, activity_boosts = trend_weights(snapshot.trends if snapshot else self._static_trends)
+            vectors = (self.matrix.season_vector(season_boosts), self.matrix.activity_vector(activity_boosts))
+            self._trend_vectors = (snapshot, vectors)
+        return vectors
+
+    def _as_hits(self, destinations):
+        # Same shape as an Elasticsearch response so callers don't care which backend ran
+        return {"hits": {"hits": [{"_id": d.get('id'), "_source": d} for d in destinations]}}
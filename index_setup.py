@@ -1,58 +1,196 @@
-from elasticsearch import Elasticsearch
 from elastic_transport import ConnectionError
-from config import Config
+from utils.es_utils import get_elasticsearch
+from utils.log import get_logger
 
-es = Elasticsearch(
-    Config.get_elasticsearch_url(),
-    basic_auth=(Config.ELASTICSEARCH_USER, Config.ELASTICSEARCH_PASSWORD),
-    verify_certs=Config.ELASTICSEARCH_VERIFY_CERTS
-)
+logger = get_logger("index_setup")
 
-def create_indices():
-    # Destination index mapping
-    destination_mapping = {
-        "mappings": {
-            "properties": {
-                "destination": {"type": "text"},
-                "price": {"type": "float"},
-                "type": {"type": "keyword"},
-                "activities": {"type": "text"},
-                "season": {"type": "keyword"}
+es = get_elasticsearch()
+
+# Keyword fields the frontend filters on are lowercased so "Beach" and "beach" match
+LOWERCASE_NORMALIZER = {
+    "analysis": {
+        "normalizer": {
+            "lowercase": {
+                "type": "custom",
+                "filter": ["lowercase"]
             }
         }
     }
+}
 
-    # User profile index mapping
-    user_profile_mapping = {
-        "mappings": {
-            "properties": {
-                "user_id": {"type": "keyword"},
-                "preferences": {"type": "nested"},
-                "past_searches": {"type": "text"}
-            }
+# Destination index mapping
+DESTINATION_MAPPING = {
+    "settings": {
+        **LOWERCASE_NORMALIZER,
+        # Segments are stored in the default /recommendations order so that sort can terminate early
+        "index.sort.field": ["rating"],
+        "index.sort.order": ["desc"]
+    },
+    "mappings": {
+        "dynamic": False,
+        "properties": {
+            "id": {"type": "keyword"},
+            "destination": {
+                "type": "text",
+                "fields": {
+                    "keyword": {"type": "keyword", "ignore_above": 256},
+                    # Prefix FST for /suggest, so typeahead never runs a scored fuzzy query
+                    "suggest": {"type": "completion", "analyzer": "simple"}
+                }
+            },
+            "price": {"type": "scaled_float", "scaling_factor": 100},
+            "type": {"type": "keyword", "normalizer": "lowercase"},
+            "activities": {
+                "type": "text",
+                "fields": {
+                    "keyword": {"type": "keyword", "normalizer": "lowercase", "ignore_above": 256}
+                }
+            },
+            "season": {"type": "keyword", "normalizer": "lowercase"},
+            "rating": {"type": "half_float"},
+            "reviews_count": {"type": "integer"},
+            "timezone": {"type": "keyword", "normalizer": "lowercase"},
+            "location": {"type": "geo_point"},
+            # Precomputed geohash cell (Config.GEOHASH_PRECISION); prefix queries select larger regions
+            "geohash": {"type": "keyword"},
+            "amenities": {"type": "keyword"},
+            "language": {"type": "keyword"},
+            "currency": {"type": "keyword"}
         }
     }
+}
 
-    # Travel trends index mapping
-    travel_trends_mapping = {
-        "mappings": {
-            "properties": {
-                "trend": {"type": "text"},
-                "popularity": {"type": "integer"},
-                "season": {"type": "keyword"}
-            }
+# Destination review index mapping, one document per review so pages can be sorted and capped
+DESTINATION_REVIEW_MAPPING = {
+    "mappings": {
+        "dynamic": False,
+        "properties": {
+            "id": {"type": "keyword"},
+            "destination_id": {"type": "keyword"},
+            "reviewer_name": {"type": "keyword"},
+            "review_statement": {"type": "text"},
+            "rating": {"type": "float"},
+            "helpful_votes": {"type": "integer"},
+            "date": {"type": "date", "format": "yyyy-MM-dd"}
+        }
+    }
+}
+
+# Per-destination review summaries kept up to date at ingest time, keyed by destination_id
+REVIEW_SUMMARIES_MAPPING = {
+    "mappings": {
+        "properties": {
+            "destination_id": {"type": "keyword"},
+            "count": {"type": "integer"},
+            "rated_count": {"type": "integer"},
+            "rating_sum": {"type": "float"},
+            "rating_histogram": {"type": "object", "enabled": False},
+            "latest_date": {"type": "date", "format": "yyyy-MM-dd"}
         }
     }
+}
 
+# User profile index mapping
+USER_PROFILE_MAPPING = {
+    "mappings": {
+        "properties": {
+            "user_id": {"type": "keyword"},
+            "preferences": {
+                "type": "nested",
+                "properties": {
+                    "activities": {"type": "keyword"},
+                    "budget_range": {"type": "keyword"},
+                    "preferred_seasons": {"type": "keyword"}
+                }
+            },
+            "past_searches": {"type": "text"}
+        }
+    }
+}
+
+# Travel trends index mapping
+TRAVEL_TRENDS_MAPPING = {
+    "mappings": {
+        "properties": {
+            "trend": {
+                "type": "text",
+                "fields": {
+                    "keyword": {"type": "keyword", "ignore_above": 256}
+                }
+            },
+            "popularity": {"type": "integer"},
+            "season": {"type": "keyword"},
+            "source": {"type": "keyword"},
+            "updated_at": {"type": "date"}
+        }
+    }
+}
+
+# Decayed destination popularity published by trend_aggregator.py, keyed by destination id
+TRENDING_DESTINATIONS_MAPPING = {
+    "mappings": {
+        "properties": {
+            "destination_id": {"type": "keyword"},
+            "popularity": {"type": "float"},
+            "updated_at": {"type": "date"}
+        }
+    }
+}
+
+# Raw interaction events written through the event buffer
+USER_INTERACTION_MAPPING = {
+    "mappings": {
+        "properties": {
+            "user_id": {"type": "keyword"},
+            "destination": {"type": "keyword"},
+            "interaction_type": {"type": "keyword"},
+            "timestamp": {"type": "date"}
+        }
+    }
+}
+
+# Output of precompute_recommendations.py, one document per user keyed by user_id
+PRECOMPUTED_RECOMMENDATIONS_MAPPING = {
+    "mappings": {
+        "properties": {
+            "user_id": {"type": "keyword"},
+            "recommendations": {"type": "object", "enabled": False},
+            "generated_at": {"type": "date"}
+        }
+    }
+}
+
+# Output of similar_destinations.py, one document per destination keyed by destination_id
+DESTINATION_SIMILARITIES_MAPPING = {
+    "mappings": {
+        "properties": {
+            "destination_id": {"type": "keyword"},
+            "similar": {"type": "object", "enabled": False},
+            "generated_at": {"type": "date"}
+        }
+    }
+}
+
+INDEX_MAPPINGS = {
+    "destinations": DESTINATION_MAPPING,
+    "destination_reviews": DESTINATION_REVIEW_MAPPING,
+    "review_summaries": REVIEW_SUMMARIES_MAPPING,
+    "user_profiles": USER_PROFILE_MAPPING,
+    "travel_trends": TRAVEL_TRENDS_MAPPING,
+    "user_interactions": USER_INTERACTION_MAPPING,
+    "trending_destinations": TRENDING_DESTINATIONS_MAPPING,
+    "precomputed_recommendations": PRECOMPUTED_RECOMMENDATIONS_MAPPING,
+    "destination_similarities": DESTINATION_SIMILARITIES_MAPPING
+}
+
+def create_indices():
     try:
-        if not es.indices.exists(index="destinations"):
-            es.indices.create(index="destinations", body=destination_mapping)
-        if not es.indices.exists(index="user_profiles"):
-            es.indices.create(index="user_profiles", body=user_profile_mapping)
-        if not es.indices.exists(index="travel_trends"):
-            es.indices.create(index="travel_trends", body=travel_trends_mapping)
+        for alias, mapping in INDEX_MAPPINGS.items():
+            # Clients always go through the alias so reindex.py can swap generations underneath them
+            if not es.indices.exists(index=alias):
+                es.indices.create(index=f"{alias}_v1", body={**mapping, "aliases": {alias: {}}})
     except ConnectionError as e:
-        print(f"Connection error: {e}")
+        logger.error("Connection error", extra={"error": str(e)})
 
 if __name__ == "__main__":
     create_indices()
@@ -1,14 +1,22 @@
+import argparse
 import pgeocode
 import json
-from elasticsearch import Elasticsearch
+from elasticsearch.helpers import parallel_bulk
 from config import Config
+from utils.es_utils import get_elasticsearch
+from index_setup import INDEX_MAPPINGS
+from utils.geo import add_location
+from utils.log import get_logger
+
+logger = get_logger("populate_data")
 
 def fetch_popular_destinations(country_codes, num_cities_per_country=20):
     """
     Fetch popular travel destinations using `pgeocode` filtered by known cities.
     :param country_codes: List of ISO country codes (e.g., ['US', 'CA', 'IN']).
     :param num_cities_per_country: Number of cities to fetch per country.
-    :return: List of unique popular city names across all countries.
+    :return: Dict of unique popular city names across all countries to (latitude, longitude);
+             coordinates are None when pgeocode does not know the city.
     """
     # Extended predefined list of popular cities per country
     popular_cities = {
@@ -24,32 +32,39 @@ def fetch_popular_destinations(country_codes, num_cities_per_country=20):
                "Gold Coast", "Cairns", "Hobart", "Canberra", "Darwin"]
     }
 
-    all_destinations = set()
+    all_destinations = {}
     for country_code in country_codes:
+        # Predefined cities are kept, without coordinates, even when pgeocode data cannot be fetched
+        predefined_cities = popular_cities.get(country_code, [])
+        for city in predefined_cities:
+            all_destinations.setdefault(city, (None, None))
+
         try:
-            # Predefined cities
-            predefined_cities = popular_cities.get(country_code, [])
-            all_destinations.update(predefined_cities)
+            nomi = pgeocode.Nominatim(country_code)
+            postal_data = nomi._data[['place_name', 'latitude', 'longitude']].dropna()
+            # One coordinate per place: the centroid of its postal codes
+            coordinates = postal_data.groupby('place_name')[['latitude', 'longitude']].mean()
+            for city in predefined_cities:
+                if city in coordinates.index:
+                    all_destinations[city] = tuple(coordinates.loc[city])
 
             # Fallback: Use pgeocode for additional cities
             if len(predefined_cities) < num_cities_per_country:
-                nomi = pgeocode.Nominatim(country_code)
-                postal_data = nomi._data[['place_name', 'latitude', 'longitude']].drop_duplicates()
-                additional_cities = postal_data['place_name'].dropna().unique()[:num_cities_per_country]
-                all_destinations.update(additional_cities)
+                for city in coordinates.index[:num_cities_per_country]:
+                    all_destinations.setdefault(city, tuple(coordinates.loc[city]))
         except Exception as e:
-            print(f"Failed to fetch cities for {country_code}: {e}")
+            logger.warning("Failed to fetch cities", extra={"country_code": country_code, "error": str(e)})
 
-    return list(all_destinations)
+    return all_destinations
 
 def generate_destination_data(cities):
     """
     Generate synthetic destination data for a list of cities.
-    :param cities: List of city names.
+    :param cities: Dict of city name to (latitude, longitude), as returned by `fetch_popular_destinations`.
     :return: List of destination dictionaries.
     """
     destinations = []
-    for city in cities:
+    for city, (latitude, longitude) in cities.items():
         destination = {
             "destination": city,
             "price": 1000 + (len(city) * 50),  # Example price logic
@@ -61,10 +76,13 @@ def generate_destination_data(cities):
             "amenities": ["wifi", "restaurants", "shopping"],
             "language": "English",
             "currency": "USD",
-            "timezone": "UTC-5"  # Simplified example
+            "timezone": "UTC-5",  # Simplified example
+            "latitude": latitude,
+            "longitude": longitude
         }
         destinations.append(destination)
-    return destinations
+    # Adds the `location` geo_point and `geohash` bucket for cities with coordinates
+    return list(add_location(destinations))
 
 # def upload_to_elasticsearch(destinations, index_name="travel_destinations"):
 #     """
@@ -91,41 +109,154 @@ def generate_destination_data(cities):
 #         except Exception as e:
 #             print(f"Failed to upload {destination['destination']}: {e}")
 
-def upload_to_elasticsearch(file_path, index_name="destination_reviews"):
+def write_destination_dataset(destinations, file_path):
     """
-    Upload destination data from a JSON file to Elasticsearch.
-    :param file_path: Path to the JSON file containing destination data.
-    :param index_name: Elasticsearch index name.
+    Write generated destinations as a JSON array that `reindex.py destinations --source` can load,
+    numbering them `destination_<n>` like dataset_with_ids.json.
+    :return: `file_path`.
+    """
+    with open(file_path, 'w') as file:
+        json.dump([{"id": f"destination_{number}", **destination}
+                   for number, destination in enumerate(destinations, start=1)], file)
+    return file_path
+
+def iter_json_array(file_path, read_size=64 * 1024):
+    """
+    Stream the items of a top-level JSON array without loading the whole file.
+    :param file_path: Path to a JSON file whose root is an array.
+    :param read_size: Number of characters read from disk at a time.
+    :return: Generator of decoded array items.
     """
-    # Load the dataset from the JSON file
+    decoder = json.JSONDecoder()
     with open(file_path, 'r') as file:
-        destinations = json.load(file)
+        buffer = file.read(read_size).lstrip()
+        while not buffer:
+            chunk = file.read(read_size)
+            if not chunk:
+                break
+            buffer = chunk.lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{file_path} does not contain a JSON array")
+        buffer = buffer[1:]
+        eof = False
+
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+                # A value ending exactly at the buffer edge may be truncated (e.g. a number)
+                if end == len(buffer) and not eof:
+                    raise ValueError("incomplete value")
+            except ValueError:
+                if eof:
+                    raise ValueError(f"Truncated JSON array in {file_path}")
+                chunk = file.read(read_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+def _generate_actions(documents, index_name, id_field):
+    for i, document in enumerate(documents):
+        yield {
+            "_index": index_name,
+            "_id": document.get(id_field, i),
+            "_source": document
+        }
+
+def _prepare_for_bulk_load(es, index_name):
+    """
+    Disable refresh and replicas for the duration of a bulk load.
+    :return: The previous values, to be handed back to `_restore_after_bulk_load`.
+    """
+    settings = es.indices.get_settings(index=index_name, flat_settings=True)
+    current = settings[next(iter(settings))]['settings']
+    previous = {
+        "index.refresh_interval": current.get("index.refresh_interval"),
+        "index.number_of_replicas": current.get("index.number_of_replicas")
+    }
+    es.indices.put_settings(index=index_name, settings={
+        "index.refresh_interval": "-1",
+        "index.number_of_replicas": 0
+    })
+    return previous
+
+def _restore_after_bulk_load(es, index_name, previous):
+    es.indices.put_settings(index=index_name, settings=previous)
+    es.indices.refresh(index=index_name)
 
+def upload_to_elasticsearch(file_path, index_name="destination_reviews", id_field="id",
+                            chunk_size=Config.BULK_CHUNK_SIZE, max_chunk_bytes=Config.BULK_MAX_CHUNK_BYTES,
+                            thread_count=Config.BULK_THREAD_COUNT, transform=None):
+    """
+    Stream documents from a JSON file into Elasticsearch through the _bulk API.
+    :param file_path: Path to the JSON file containing an array of documents.
+    :param index_name: Elasticsearch index name.
+    :param id_field: Document field used as `_id`; the array position is used when it is missing.
+    :param chunk_size: Maximum number of documents per _bulk request.
+    :param max_chunk_bytes: Maximum size in bytes of a _bulk request.
+    :param thread_count: Number of _bulk requests in flight at once.
+    :param transform: Optional generator function applied to the stream of documents, e.g. `split_reviews`.
+    :return: Tuple of (indexed, failed) document counts.
+    """
     # Connect to Elasticsearch
-    es = Elasticsearch(
-        Config.get_elasticsearch_url(),
-        basic_auth=(Config.ELASTICSEARCH_USER, Config.ELASTICSEARCH_PASSWORD),
-        verify_certs=Config.ELASTICSEARCH_VERIFY_CERTS
-    )
+    es = get_elasticsearch().options(request_timeout=Config.BULK_REQUEST_TIMEOUT)
 
-    # Create the index if it doesn't exist
+    # Create the index with its explicit mapping if it doesn't exist
     if not es.indices.exists(index=index_name):
-        es.indices.create(index=index_name)
-        print(f"Index '{index_name}' created.")
+        es.indices.create(index=index_name, body=INDEX_MAPPINGS.get(index_name, {}))
+        logger.info("Index created", extra={"index": index_name})
 
-    # Upload data
-    for i, destination in enumerate(destinations):
-        es.index(index=index_name, id=i, body=destination)
+    documents = iter_json_array(file_path)
+    if transform is not None:
+        documents = transform(documents)
+
+    indexed, failed = 0, 0
+    previous_settings = _prepare_for_bulk_load(es, index_name)
+    try:
+        # queue_size bounds the number of prepared chunks so memory stays flat
+        for ok, item in parallel_bulk(
+            es,
+            _generate_actions(documents, index_name, id_field),
+            thread_count=thread_count,
+            queue_size=thread_count,
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            raise_on_error=False
+        ):
+            if ok:
+                indexed += 1
+            else:
+                failed += 1
+                logger.warning("Failed to upload document", extra={"index": index_name, "item": item})
+    finally:
+        _restore_after_bulk_load(es, index_name, previous_settings)
+
+    logger.info("Upload finished", extra={"index": index_name, "indexed": indexed, "failed": failed})
+    return indexed, failed
 
 
 if __name__ == "__main__":
-    upload_to_elasticsearch('review_dataset.json')
-    # country_codes = ["US", "CA", "IN", "DE", "AU"]  # Add more country codes for additional destinations
-    # cities = fetch_popular_destinations(country_codes)
-    # if cities:
-    #     print(f"Fetched Cities: {len(cities)} cities")
-    #     destinations = generate_destination_data(cities)
-    #     print(f"Generated Destinations: {len(destinations)} destinations")
-    #     upload_to_elasticsearch(destinations)
-    # else:
-    #     print("No cities found. Ensure `pgeocode` data is available.")
+    from reindex import reindex
+
+    parser = argparse.ArgumentParser(description="Load the destinations and reviews datasets behind their aliases.")
+    parser.add_argument("--countries", help="Comma separated ISO country codes (e.g. US,CA,IN); generates "
+                                            "destinations with pgeocode coordinates instead of dataset_with_ids.json")
+    parser.add_argument("--output", default="generated_destinations.json",
+                        help="File the generated destinations are written to before loading")
+    args = parser.parse_args()
+
+    destinations_file = 'dataset_with_ids.json'
+    if args.countries:
+        cities = fetch_popular_destinations([code.strip().upper() for code in args.countries.split(',')])
+        destinations = generate_destination_data(cities)
+        destinations_file = write_destination_dataset(destinations, args.output)
+        logger.info("Generated destinations", extra={"destinations": len(destinations), "file": destinations_file})
+
+    # Each load builds a new generation behind the alias instead of writing into the live index.
+    # Destinations are keyed by their `id` so the API can read them with get/mget.
+    reindex("destinations", destinations_file)
+    reindex("destination_reviews", 'review_dataset.json')
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from elasticsearch.helpers import scan, bulk
+from config import Config
+from recommendation_engine import create_recommendation_engine
+from utils.es_utils import get_elasticsearch
+from utils.log import get_logger
+
+logger = get_logger("precompute_recommendations")
+
+_engine = None
+
+def _init_worker():
+    # Each worker process builds its own engine (and Elasticsearch client) once
+    global _engine
+    _engine = create_recommendation_engine()
+
+def _recommend_chunk(user_ids, size):
+    return _engine.get_batch_recommendations(user_ids, size)
+
+def iter_user_ids(es, batch_size):
+    """
+    Stream every user id from the profiles index in chunks of `batch_size`.
+    """
+    chunk = []
+    for hit in scan(es, index="user_profiles", query={"query": {"match_all": {}}, "_source": ["user_id"]}):
+        chunk.append(hit['_source']['user_id'])
+        if len(chunk) == batch_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _documents(recommendations, generated_at):
+    for user_id, destinations in recommendations.items():
+        yield {
+            "_index": Config.PRECOMPUTED_RECOMMENDATIONS_INDEX,
+            "_id": user_id,
+            "_source": {
+                "user_id": user_id,
+                "recommendations": destinations,
+                "generated_at": generated_at
+            }
+        }
+
+def precompute(workers=os.cpu_count(), batch_size=500, size=Config.RECOMMENDATION_SIZE, output=None):
+    """
+    Precompute top-N recommendations for every user across a process pool.
+    :param workers: Number of worker processes.
+    :param batch_size: Users per batch; each batch costs one profile lookup and one msearch.
+    :param size: Number of destinations stored per user.
+    :param output: JSON Lines file to write to instead of the precomputed recommendations index.
+    :return: Number of users written.
+    """
+    es = get_elasticsearch()
+    generated_at = datetime.now(timezone.utc).isoformat()
+    written = 0
+    sink = open(output, 'w') if output else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = set()
+            for user_ids in iter_user_ids(es, batch_size):
+                pending.add(pool.submit(_recommend_chunk, user_ids, size))
+                # Keep a bounded number of batches in flight so memory stays flat
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    written += _write(es, sink, done, generated_at)
+            written += _write(es, sink, wait(pending).done, generated_at)
+    finally:
+        if sink:
+            sink.close()
+
+    logger.info("Precomputed recommendations", extra={"users": written})
+    return written
+
+def _write(es, sink, futures, generated_at):
+    written = 0
+    for future in futures:
+        recommendations = future.result()
+        if sink:
+            for user_id, destinations in recommendations.items():
+                sink.write(json.dumps({"user_id": user_id, "recommendations": destinations,
+                                       "generated_at": generated_at}) + "\n")
+        else:
+            bulk(es, _documents(recommendations, generated_at), chunk_size=Config.BULK_CHUNK_SIZE,
+                 max_chunk_bytes=Config.BULK_MAX_CHUNK_BYTES)
+        written += len(recommendations)
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute recommendations for every user.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--size", type=int, default=Config.RECOMMENDATION_SIZE)
+    parser.add_argument("--output", help="Write JSON Lines to this file instead of Elasticsearch")
+    args = parser.parse_args()
+
+    precompute(args.workers, args.batch_size, args.size, args.output)
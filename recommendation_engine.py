@@ -1,88 +1,223 @@
-from elasticsearch import Elasticsearch
-from utils.es_utils import wait_for_elasticsearch, index_exists
+from elasticsearch import NotFoundError
+from config import Config
+from utils.es_utils import get_elasticsearch, missing_indices, unresolved_names
+from utils.trends_cache import TrendsCache
+from utils.cache import LRUCache
+from utils.event_buffer import get_event_buffer
+from utils.query_builder import build_trend_clauses, build_recommendation_query
+from utils.metrics import es_timer, record_hits, attach_profile, log_profile
+from utils.log import get_logger
+import os
+import threading
 import urllib3
 
 # Suppress InsecureRequestWarning
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+logger = get_logger("recommendation_engine")
+
+# Cached in place of preferences for users without a profile
+_NO_PROFILE = object()
+
+_engine = None
+_engine_pid = None
+_engine_lock = threading.Lock()
+
+def create_recommendation_engine():
+    """
+    Build the recommendation backend selected by `Config.RECOMMENDATION_BACKEND`.
+    """
+    if Config.RECOMMENDATION_BACKEND == 'numpy':
+        from in_memory_recommendation_engine import InMemoryRecommendationEngine
+        return InMemoryRecommendationEngine(es=get_elasticsearch())
+    return RecommendationEngine()
+
+def get_recommendation_engine():
+    """
+    Return the process-wide recommendation engine, building it on first use (and again after
+    a fork) so importing an app module never touches Elasticsearch or loads the catalog.
+    """
+    global _engine, _engine_pid
+    if _engine is None or _engine_pid != os.getpid():
+        with _engine_lock:
+            if _engine is None or _engine_pid != os.getpid():
+                _engine = create_recommendation_engine()
+                _engine_pid = os.getpid()
+    return _engine
+
+def _no_recommendations():
+    # Same shape as a search response with no hits
+    return {"hits": {"hits": []}}
+
+def create_profile_cache():
+    return LRUCache(ttl=Config.PROFILE_CACHE_TTL, max_entries=Config.PROFILE_CACHE_MAX_ENTRIES)
+
 class RecommendationEngine:
+    required_indices = Config.REQUIRED_INDICES
+
     def __init__(self):
-        self.es = wait_for_elasticsearch()
-        self.required_indices = ["user_profiles", "travel_trends", "destinations"]
-        self.check_indices()
+        self.es = get_elasticsearch()
+        self.trends_cache = TrendsCache(self.es)
+        self._trend_clauses = (None, [])
+        self.profile_cache = create_profile_cache()
 
     def check_indices(self):
-        for index in self.required_indices:
-            if not index_exists(self.es, index):
-                raise Exception(f"Required index '{index}' does not exist in Elasticsearch.")
+        missing = missing_indices(self.es, self.required_indices)
+        if missing:
+            raise Exception(f"Required indices {missing} do not exist in Elasticsearch.")
 
-    def get_personalized_recommendations(self, user_id):
+    def get_personalized_recommendations(self, user_id, fields=None):
+        """
+        :param fields: Optional `_source` includes, e.g. from a `fields=` projection.
+        """
         try:
-            # Fetch user profile by querying `user_id` field
-            user_response = self.es.search(index="user_profiles", body={
-                "query": {
-                    "term": {
-                        "user_id": user_id  # Ensure `.keyword` is used for exact match
-                    }
-                }
-            })
-            
-            #Check if any documents were found
-            if user_response['hits']['total']['value'] == 0:
-                print(f"User profile not found for user {user_id}")
-                return {"hits": {"hits": []}}
-            
-            user = user_response['hits']['hits'][0]
-            print(f"User profile found: {user}")
-            preferences = user['_source']['preferences']
+            preferences = self.get_preferences(user_id)
         except Exception as e:
-            print(f"Error fetching user profile for user {user_id}: {e}")
-            return {"hits": {"hits": []}}
-
-        # Get travel trends
-        trends_response = self.es.search(index="travel_trends", body={
-            "query": {
-                "match_all": {}
-            },
-            "size": 10000  # Fetch all trends
-        })
-        trends = trends_response['hits']['hits']
-
-        # Build recommendation query based on user preferences and trends
-        should_conditions = []
-        
-        for activity in preferences['activities']:
-            should_conditions.append({"match": {"activities": activity}})
-        
-        should_conditions.append({
-            "range": {
-                "price": {
-                    "gte": 0,
-                    "lte": self._get_budget_range(preferences['budget_range'])
-                }
-            }
-        })
-
-        for season in preferences['preferred_seasons']:
-            should_conditions.append({"match": {"season": season}})
-
-        for trend in trends:
-            should_conditions.append({"match": {"activities": trend['_source']['trend']}})
-            should_conditions.append({"match": {"season": trend['_source']['season']}})
-
-        body = {
-            "query": {
-                "bool": {
-                    "should": should_conditions,
-                    "minimum_should_match": 1
-                }
-            },
-            "sort": [
-                {"rating": {"order": "desc"}}
-            ]
-        }
+            logger.error("Error fetching user profile", extra={"user_id": user_id, "error": str(e)})
+            return _no_recommendations()
+
+        if preferences is None:
+            return _no_recommendations()
+
+        body, profiled = self._personalized_search(preferences, fields)
+        with es_timer("recommendations_search"):
+            response = self.es.search(index="destinations", body=body)
+        return self._read_personalized(response, profiled)
+
+    def get_preferences(self, user_id):
+        """
+        Return a user's profile preferences, or None when the user has no profile.
+        Returning users are served from the profile cache; profiles are stored with
+        `_id = user_id`, so a cache miss is a single realtime get.
+        """
+        preferences, missing = self._cached_preferences([user_id])
+        if not missing:
+            return preferences.get(user_id)
+        try:
+            with es_timer("profile_fetch"):
+                document = self.es.get(index="user_profiles", id=user_id, source_includes=["preferences"])
+        except NotFoundError:
+            document = {"found": False}
+        return self._cache_preferences(user_id, document)
+
+    def update_user_profile(self, user_id, profile):
+        """
+        Store a profile under `_id = user_id` and write its preferences through to the cache.
+        Other processes pick the change up once their cached copy expires.
+        """
+        document = {**profile, "user_id": user_id}
+        self.es.index(index="user_profiles", id=user_id, body=document)
+        self._cache_preferences(user_id, {"found": True, "_source": document})
+
+    def get_batch_recommendations(self, user_ids, size=Config.RECOMMENDATION_SIZE):
+        """
+        Compute recommendations for many users with one profile lookup and one destinations msearch.
+        :param user_ids: List of user ids.
+        :param size: Number of destinations per user.
+        :return: Dict of user id to a list of destination dicts; users without a profile are omitted.
+        """
+        preferences = self._get_preferences_batch(user_ids)
+        if not preferences:
+            return {}
+
+        with es_timer("recommendations_batch_search"):
+            responses = self.es.msearch(searches=self._batch_searches(preferences, size))['responses']
+        return self._read_batch(preferences, responses)
+
+    def get_precomputed_recommendations(self, user_id):
+        """
+        :return: The destinations stored for `user_id` by precompute_recommendations.py, or None.
+        """
+        try:
+            with es_timer("precomputed_fetch"):
+                document = self.es.get(index=Config.PRECOMPUTED_RECOMMENDATIONS_INDEX, id=user_id)
+        except NotFoundError:
+            return None
+        return document['_source']['recommendations']
+
+    def build_recommendation_body(self, preferences, size=Config.RECOMMENDATION_SIZE):
+        # Trend clauses are compiled once per trends snapshot and shared between requests
+        return build_recommendation_query(
+            preferences,
+            self._get_budget_range(preferences['budget_range']),
+            self._get_trend_clauses(),
+            size
+        )
+
+    def _personalized_search(self, preferences, fields=None):
+        """
+        :return: Tuple of (destinations search body, whether it was sampled for profiling).
+        """
+        body = self.build_recommendation_body(preferences)
+        if fields:
+            body["_source"] = fields
+        return body, attach_profile(body)
+
+    def _read_personalized(self, response, profiled):
+        if profiled:
+            log_profile("recommendations_search", response)
+        return record_hits("recommendations_search", response)
+
+    def _batch_searches(self, preferences, size):
+        searches = []
+        for user_preferences in preferences.values():
+            searches.append({"index": "destinations"})
+            searches.append(self.build_recommendation_body(user_preferences, size))
+        return searches
+
+    def _read_batch(self, preferences, responses):
+        results = {}
+        for user_id, response in zip(preferences, responses):
+            if 'error' in response:
+                logger.error("Error fetching recommendations", extra={"user_id": user_id, "error": response['error']})
+                continue
+            record_hits("recommendations_batch_search", response)
+            results[user_id] = [hit['_source'] for hit in response['hits']['hits']]
+        return results
+
+    def _get_preferences_batch(self, user_ids):
+        preferences, missing = self._cached_preferences(user_ids)
+        if missing:
+            with es_timer("profile_fetch"):
+                docs = self.es.mget(index="user_profiles", ids=missing, source_includes=["preferences"])['docs']
+            self._add_fetched_preferences(preferences, docs)
+        return {user_id: preferences[user_id] for user_id in user_ids if user_id in preferences}
 
-        return self.es.search(index="destinations", body=body)
+    def _cached_preferences(self, user_ids):
+        """
+        :return: Tuple of ({user_id: preferences} served from the cache, user ids to fetch).
+        """
+        preferences, missing = {}, []
+        for user_id in user_ids:
+            cached = self.profile_cache.get(user_id)
+            if cached is None:
+                missing.append(user_id)
+            elif cached is not _NO_PROFILE:
+                preferences[user_id] = cached
+        return preferences, missing
+
+    def _add_fetched_preferences(self, preferences, docs):
+        for document in docs:
+            user_preferences = self._cache_preferences(document['_id'], document)
+            if user_preferences is not None:
+                preferences[document['_id']] = user_preferences
+
+    def _cache_preferences(self, user_id, document):
+        preferences = document['_source'].get('preferences') if document.get('found') else None
+        if preferences is None:
+            # Remembered briefly, so unknown users do not reach Elasticsearch on every request
+            self.profile_cache.set(user_id, _NO_PROFILE, ttl=Config.PROFILE_MISSING_CACHE_TTL)
+        else:
+            self.profile_cache.set(user_id, preferences)
+        return preferences
+
+    def _get_trend_clauses(self):
+        snapshot = self.trends_cache.get()
+        compiled_for, clauses = self._trend_clauses
+        if compiled_for is not snapshot:
+            clauses = build_trend_clauses(snapshot.trends)
+            self._trend_clauses = (snapshot, clauses)
+        return clauses
 
     def _get_budget_range(self, budget_range):
         ranges = {
@@ -93,11 +228,106 @@ class RecommendationEngine:
         return ranges.get(budget_range, 5000)
 
     def track_user_interaction(self, user_id, destination, interaction_type):
-        interaction = {
+        """
+        Record an interaction through the shared event buffer; indexing happens off the request path.
+        The cached profile is left alone: interactions are indexed only when the buffer flushes and
+        nothing here derives profiles from them, so profiles changed elsewhere age out after
+        `PROFILE_CACHE_TTL`.
+        :return: False when the buffer is full and the event was rejected.
+        """
+        return get_event_buffer().add("user_interactions", self._interaction(user_id, destination, interaction_type))
+
+    def _interaction(self, user_id, destination, interaction_type):
+        # The event buffer stamps the timestamp when the event is accepted
+        return {
             "user_id": user_id,
             "destination": destination,
-            "interaction_type": interaction_type,
-            "timestamp": "now"
+            "interaction_type": interaction_type
         }
-        
-        return self.es.index(index="user_interactions", body=interaction)
\ No newline at end of file
+
+
+class AsyncRecommendationEngine(RecommendationEngine):
+    """
+    RecommendationEngine for the ASGI app, backed by AsyncElasticsearch.
+    Query building and the trends snapshot are shared with the sync engine; the
+    snapshot is first loaded on a worker thread and keeps refreshing on its own
+    thread with the sync client, so the event loop never waits on it.
+    """
+
+    def __init__(self, es, trends_cache=None):
+        self.es = es
+        self.trends_cache = trends_cache or TrendsCache(get_elasticsearch())
+        self._trend_clauses = (None, [])
+        self.profile_cache = create_profile_cache()
+
+    async def check_indices(self):
+        try:
+            found = await self.es.indices.get_alias(index=",".join(self.required_indices), ignore_unavailable=True)
+        except NotFoundError:
+            found = {}
+        missing = unresolved_names(found, self.required_indices)
+        if missing:
+            raise Exception(f"Required indices {missing} do not exist in Elasticsearch.")
+
+    async def get_personalized_recommendations(self, user_id, fields=None):
+        try:
+            preferences = await self.get_preferences(user_id)
+        except Exception as e:
+            logger.error("Error fetching user profile", extra={"user_id": user_id, "error": str(e)})
+            return _no_recommendations()
+
+        if preferences is None:
+            return _no_recommendations()
+
+        await self.trends_cache.get_async()
+        body, profiled = self._personalized_search(preferences, fields)
+        with es_timer("recommendations_search"):
+            response = await self.es.search(index="destinations", body=body)
+        return self._read_personalized(response, profiled)
+
+    async def get_preferences(self, user_id):
+        preferences, missing = self._cached_preferences([user_id])
+        if not missing:
+            return preferences.get(user_id)
+        try:
+            with es_timer("profile_fetch"):
+                document = await self.es.get(index="user_profiles", id=user_id, source_includes=["preferences"])
+        except NotFoundError:
+            document = {"found": False}
+        return self._cache_preferences(user_id, document)
+
+    async def update_user_profile(self, user_id, profile):
+        document = {**profile, "user_id": user_id}
+        await self.es.index(index="user_profiles", id=user_id, body=document)
+        self._cache_preferences(user_id, {"found": True, "_source": document})
+
+    async def get_batch_recommendations(self, user_ids, size=Config.RECOMMENDATION_SIZE):
+        preferences = await self._get_preferences_batch(user_ids)
+        if not preferences:
+            return {}
+
+        await self.trends_cache.get_async()
+        with es_timer("recommendations_batch_search"):
+            responses = (await self.es.msearch(searches=self._batch_searches(preferences, size)))['responses']
+        return self._read_batch(preferences, responses)
+
+    async def get_precomputed_recommendations(self, user_id):
+        try:
+            with es_timer("precomputed_fetch"):
+                document = await self.es.get(index=Config.PRECOMPUTED_RECOMMENDATIONS_INDEX, id=user_id)
+        except NotFoundError:
+            return None
+        return document['_source']['recommendations']
+
+    async def _get_preferences_batch(self, user_ids):
+        preferences, missing = self._cached_preferences(user_ids)
+        if missing:
+            with es_timer("profile_fetch"):
+                docs = (await self.es.mget(index="user_profiles", ids=missing, source_includes=["preferences"]))['docs']
+            self._add_fetched_preferences(preferences, docs)
+        return {user_id: preferences[user_id] for user_id in user_ids if user_id in preferences}
+
+    async def track_user_interaction(self, user_id, destination, interaction_type):
+        # Never block the event loop waiting for buffer room
+        return get_event_buffer().add("user_interactions", self._interaction(user_id, destination, interaction_type),
+                                      block=False)
\ No newline at end of file
@@ -0,0 +1,248 @@
+import argparse
+import re
+from elasticsearch.helpers import scan
+from config import Config
+from index_setup import INDEX_MAPPINGS
+from populate_data import upload_to_elasticsearch
+from review_ingest import compute_summaries, write_summaries
+from utils.es_utils import get_elasticsearch
+from utils.log import get_logger
+from utils.geo import add_location
+from utils.reviews import split_reviews
+
+logger = get_logger("reindex")
+
+# Files each alias is rebuilt from when no source is given
+DEFAULT_SOURCES = {
+    "destinations": "dataset_with_ids.json",
+    "destination_reviews": "review_dataset.json"
+}
+
+# Source field each alias uses as its document `_id`, so lookups can be key gets
+DOCUMENT_ID_FIELDS = {
+    "destinations": "id",
+    "destination_reviews": "id",
+    "user_profiles": "user_id",
+    "precomputed_recommendations": "user_id",
+    "destination_similarities": "destination_id",
+    "review_summaries": "destination_id"
+}
+
+# Generator functions applied to a source file's documents before they are indexed
+DOCUMENT_TRANSFORMS = {
+    "destinations": add_location,
+    "destination_reviews": split_reviews
+}
+
+def generation_name(alias, version):
+    return f"{alias}_v{version}"
+
+def list_generations(es, alias):
+    """
+    List the versioned indices behind an alias.
+    :return: List of (version, index name) tuples, oldest first.
+    """
+    pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+    generations = []
+    for index_name in es.indices.get(index=f"{alias}_v*", expand_wildcards="open,closed"):
+        match = pattern.match(index_name)
+        if match:
+            generations.append((int(match.group(1)), index_name))
+    return sorted(generations)
+
+def current_generation(es, alias):
+    """
+    :return: Name of the index the alias points to, or None if the alias does not exist.
+    """
+    if not es.indices.exists_alias(name=alias):
+        return None
+    return next(iter(es.indices.get_alias(name=alias)))
+
+def create_generation(es, alias):
+    generations = list_generations(es, alias)
+    version = generations[-1][0] + 1 if generations else 1
+    index_name = generation_name(alias, version)
+    es.indices.create(index=index_name, body=INDEX_MAPPINGS[alias])
+    logger.info("Created index", extra={"index": index_name})
+    return index_name
+
+def load_generation(es, alias, index_name, source=None):
+    """
+    Fill a new generation from a JSON file, or copy the live generation when no file is given.
+    """
+    if source:
+        indexed, failed = upload_to_elasticsearch(source, index_name=index_name,
+                                                  id_field=DOCUMENT_ID_FIELDS.get(alias, "id"),
+                                                  transform=DOCUMENT_TRANSFORMS.get(alias))
+        if failed:
+            raise RuntimeError(f"{failed} documents failed to load into '{index_name}'")
+        return indexed
+
+    live = current_generation(es, alias) or (alias if es.indices.exists(index=alias) else None)
+    if live is None:
+        raise RuntimeError(f"No source file given and nothing to copy for '{alias}'")
+    id_field = DOCUMENT_ID_FIELDS.get(alias)
+    # Re-key copied documents by their id field, which also migrates documents indexed with generated ids
+    script = {
+        "source": "if (ctx._source[params.field] != null) { ctx._id = ctx._source[params.field].toString() }",
+        "params": {"field": id_field}
+    } if id_field else None
+    result = es.options(request_timeout=None).reindex(
+        source={"index": live},
+        dest={"index": index_name},
+        script=script,
+        wait_for_completion=True,
+        refresh=True
+    )
+    if result.get('failures'):
+        raise RuntimeError(f"Reindex into '{index_name}' failed: {result['failures'][:5]}")
+    return result['created']
+
+def warm_generation(es, alias, index_name):
+    """
+    Get a freshly loaded generation ready for traffic before it goes live.
+    """
+    es.indices.refresh(index=index_name)
+    es.options(request_timeout=None).indices.forcemerge(index=index_name, max_num_segments=1)
+    es.cluster.health(index=index_name, wait_for_status="yellow", timeout=Config.INDEX_WARMUP_TIMEOUT)
+
+    # Touch the fields the API filters, sorts and aggregates on so their caches and global ordinals are loaded
+    properties = INDEX_MAPPINGS[alias]["mappings"]["properties"]
+    es.search(index=index_name, body={"query": {"match_all": {}}, "size": 10})
+    if "rating" in properties:
+        es.search(index=index_name, body={"query": {"match_all": {}}, "sort": [{"rating": {"order": "desc"}}], "size": 10})
+    # Ids are unique per document, so aggregating on them would only waste heap
+    keyword_fields = [
+        field for field, mapping in properties.items()
+        if mapping.get("type") == "keyword" and field != "id" and not field.endswith("_id")
+    ]
+    if keyword_fields:
+        es.search(index=index_name, body={
+            "size": 0,
+            "aggs": {field: {"terms": {"field": field, "size": 10}} for field in keyword_fields}
+        })
+
+def build_review_summaries(es, reviews_index):
+    """
+    Fill and warm a new review summaries generation from every review in `reviews_index`.
+    :return: Name of the new summaries index.
+    """
+    alias = Config.REVIEW_SUMMARIES_INDEX
+    index_name = create_generation(es, alias)
+    try:
+        reviews = (hit['_source'] for hit in scan(es, index=reviews_index, query={"query": {"match_all": {}}}))
+        write_summaries(es, compute_summaries(reviews), index_name)
+        warm_generation(es, alias, index_name)
+    except Exception:
+        es.indices.delete(index=index_name)
+        raise
+    return index_name
+
+# Aliases whose documents are derived from another alias' documents. They get a new
+# generation built from the new source generation and go live in the same alias swap,
+# so a reader never sees reviews and review summaries from different generations.
+DERIVED_ALIASES = {
+    "destination_reviews": {Config.REVIEW_SUMMARIES_INDEX: build_review_summaries}
+}
+
+def build_derived_generations(es, alias, index_name):
+    """
+    :return: Dict of derived alias to its new generation, built from `index_name`.
+    """
+    derived = {}
+    try:
+        for derived_alias, build in DERIVED_ALIASES.get(alias, {}).items():
+            derived[derived_alias] = build(es, index_name)
+    except Exception:
+        for derived_index in derived.values():
+            es.indices.delete(index=derived_index)
+        raise
+    return derived
+
+def swap_alias(es, alias, index_name):
+    """
+    Atomically point `alias` at `index_name`.
+    """
+    swap_aliases(es, {alias: index_name})
+
+def swap_aliases(es, targets):
+    """
+    Atomically point each alias in `targets` at its index, in one update-aliases request.
+    A legacy concrete index with an alias' name is dropped in the same request.
+    """
+    actions = []
+    for alias, index_name in targets.items():
+        if es.indices.exists_alias(name=alias):
+            actions.append({"remove": {"index": f"{alias}_v*", "alias": alias}})
+        elif es.indices.exists(index=alias):
+            actions.append({"remove_index": {"index": alias}})
+        actions.append({"add": {"index": index_name, "alias": alias}})
+    es.indices.update_aliases(actions=actions)
+    for alias, index_name in targets.items():
+        logger.info("Alias swapped", extra={"alias": alias, "index": index_name})
+
+def prune_generations(es, alias, keep=Config.INDEX_GENERATIONS_TO_KEEP):
+    live = current_generation(es, alias)
+    generations = [name for _, name in list_generations(es, alias)]
+    for index_name in generations[:max(len(generations) - keep, 0)]:
+        if index_name != live:
+            es.indices.delete(index=index_name)
+            logger.info("Deleted old generation", extra={"index": index_name})
+
+def reindex(alias, source=None, keep=Config.INDEX_GENERATIONS_TO_KEEP):
+    """
+    Build a new generation of `alias` in the background, warm it and swap it in.
+    Queries keep hitting the old generation until the alias moves. Derived aliases
+    (review summaries for reviews) are rebuilt from the new generation and swapped with it.
+    :param alias: Name clients use, e.g. "destinations".
+    :param source: JSON file to load; copies the live generation when None.
+    :param keep: Number of generations to keep for rollback.
+    :return: Name of the new live index.
+    """
+    es = get_elasticsearch()
+    index_name = create_generation(es, alias)
+    try:
+        load_generation(es, alias, index_name, source)
+        warm_generation(es, alias, index_name)
+        derived = build_derived_generations(es, alias, index_name)
+    except Exception:
+        # Never leave a half-built generation around to be picked up by a rollback
+        es.indices.delete(index=index_name)
+        raise
+    swap_aliases(es, {alias: index_name, **derived})
+    for swapped_alias in (alias, *derived):
+        prune_generations(es, swapped_alias, keep)
+    return index_name
+
+def rollback(alias):
+    """
+    Point `alias` back at the generation before the live one; derived aliases are
+    rebuilt from that generation and swapped with it.
+    :return: Name of the index that is live after the rollback.
+    """
+    es = get_elasticsearch()
+    live = current_generation(es, alias)
+    older = [name for version, name in list_generations(es, alias)
+             if live is None or version < int(live.rsplit("_v", 1)[1])]
+    if not older:
+        raise RuntimeError(f"No older generation of '{alias}' to roll back to")
+    derived = build_derived_generations(es, alias, older[-1])
+    swap_aliases(es, {alias: older[-1], **derived})
+    for derived_alias in derived:
+        prune_generations(es, derived_alias)
+    return older[-1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild an index behind its alias without downtime.")
+    parser.add_argument("alias", choices=sorted(INDEX_MAPPINGS))
+    parser.add_argument("--source", help="JSON file to load (defaults to the dataset for the alias, if any)")
+    parser.add_argument("--copy", action="store_true", help="Copy the live generation instead of loading a file")
+    parser.add_argument("--keep", type=int, default=Config.INDEX_GENERATIONS_TO_KEEP)
+    parser.add_argument("--rollback", action="store_true", help="Point the alias back at the previous generation")
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback(args.alias)
+    else:
+        source = None if args.copy else args.source or DEFAULT_SOURCES.get(args.alias)
+        reindex(args.alias, source, args.keep)
@@ -0,0 +1,100 @@
+import argparse
+from itertools import islice
+from elasticsearch.helpers import bulk
+from config import Config
+from populate_data import iter_json_array
+from utils.es_utils import get_elasticsearch
+from utils.log import get_logger
+from utils.reviews import split_reviews, summary_delta, build_summary_update
+
+logger = get_logger("review_ingest")
+
+REVIEWS_INDEX = "destination_reviews"
+
+def _group_by_destination(reviews):
+    grouped = {}
+    for review in reviews:
+        grouped.setdefault(review['destination_id'], []).append(review)
+    return grouped
+
+def ingest_reviews(es, documents, chunk_size=Config.BULK_CHUNK_SIZE):
+    """
+    Index new reviews and fold them into their destinations' summaries.
+
+    Reviews are written with `create`, so a review that is already indexed is
+    skipped and never counted twice; only the reviews created in a chunk are
+    added to the summaries, with one scripted upsert per destination.
+    :param documents: Iterable of reviews (legacy documents embedding `reviews` are split).
+    :return: Tuple of (created, duplicate, failed) review counts.
+    """
+    created, duplicate, failed = 0, 0, 0
+    reviews = split_reviews(documents)
+    while True:
+        chunk = list(islice(reviews, chunk_size))
+        if not chunk:
+            break
+        _, errors = bulk(es, [
+            {"_op_type": "create", "_index": REVIEWS_INDEX, "_id": review['id'], "_source": review}
+            for review in chunk
+        ], raise_on_error=False, max_chunk_bytes=Config.BULK_MAX_CHUNK_BYTES)
+
+        rejected = set()
+        for error in errors:
+            item = error['create']
+            rejected.add(item['_id'])
+            if item.get('status') == 409:
+                duplicate += 1
+            else:
+                failed += 1
+                logger.warning("Failed to index review", extra={"item": item})
+        new_reviews = [review for review in chunk if review['id'] not in rejected]
+        created += len(new_reviews)
+
+        updates = [build_summary_update(summary_delta(destination_id, destination_reviews))
+                   for destination_id, destination_reviews in _group_by_destination(new_reviews).items()]
+        _, errors = bulk(es, updates, raise_on_error=False)
+        for error in errors:
+            logger.error("Failed to update review summary", extra={"item": error['update']})
+
+    logger.info("Review ingest finished", extra={"reviews_created": created, "duplicate": duplicate, "failed": failed})
+    return created, duplicate, failed
+
+def compute_summaries(documents):
+    """
+    :return: Dict of destination_id to summary for every review in `documents`.
+    """
+    return {destination_id: summary_delta(destination_id, reviews)
+            for destination_id, reviews in _group_by_destination(split_reviews(documents)).items()}
+
+def write_summaries(es, summaries, index_name=Config.REVIEW_SUMMARIES_INDEX):
+    """
+    Index complete summaries (from `compute_summaries`), replacing any stored ones.
+    """
+    _, errors = bulk(es, ({"_index": index_name, "_id": destination_id, "_source": summary}
+                          for destination_id, summary in summaries.items()),
+                     chunk_size=Config.BULK_CHUNK_SIZE, max_chunk_bytes=Config.BULK_MAX_CHUNK_BYTES,
+                     raise_on_error=False)
+    if errors:
+        raise RuntimeError(f"{len(errors)} review summaries failed to index into '{index_name}'")
+    return len(summaries)
+
+def rebuild_summaries(es, file_path):
+    """
+    Overwrite the review summaries from a full review file, e.g. after the reviews index was rebuilt.
+    """
+    written = write_summaries(es, compute_summaries(iter_json_array(file_path)))
+    logger.info("Review summaries rebuilt", extra={"destinations": written})
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add reviews and keep per-destination review summaries up to date.")
+    parser.add_argument("file", help="JSON array of reviews (one per document, or legacy documents with `reviews`)")
+    parser.add_argument("--rebuild-summaries", action="store_true",
+                        help="Recompute every summary from the file instead of ingesting it")
+    args = parser.parse_args()
+
+    es = get_elasticsearch()
+    if args.rebuild_summaries:
+        rebuild_summaries(es, args.file)
+    else:
+        ingest_reviews(es, iter_json_array(args.file))
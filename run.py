@@ -1,132 +1,233 @@
-from flask import Flask, send_from_directory, request, jsonify
+from flask import Flask, send_from_directory, request, g
 from flask_cors import CORS
 from config import Config
 import os
-from utils.es_utils import wait_for_elasticsearch
-from recommendation_engine import RecommendationEngine
-from elasticsearch import Elasticsearch, NotFoundError
+import threading
+import time
+from utils.es_utils import get_elasticsearch
+from utils.event_buffer import get_event_buffer
+from recommendation_engine import get_recommendation_engine
+from utils.search_request import parse_search_request, search_cache_key, complete_search
+from utils.recommendations import (parse_recommendations_request, parse_batch_user_ids, parse_saved_recommendation,
+                                   parse_profile, recommendation_results)
+from utils.search_cache import create_search_cache
+from utils.readiness import ReadinessProbe
+from utils.suggestions import DestinationSuggester, build_suggest_body, parse_suggest_response
+from utils.pagination import parse_size
+from utils.destinations import (parse_destination_ids, parse_destination_request, build_destination_lookup,
+                                build_destinations_lookup, build_reviews_query, build_reviews_msearch,
+                                assemble_destination_page, assemble_destination_pages)
+from utils.responses import build_json_response, parse_fields, project
+from utils.metrics import REGISTRY, CONTENT_TYPE, record_request, es_timer, record_hits, attach_profile
+from utils.log import get_logger
+
+logger = get_logger("api")
 
 app = Flask(__name__, static_folder='frontend/build', static_url_path='')
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
 
-try:
-    # Configure Elasticsearch with connection verification
-    app.elasticsearch = wait_for_elasticsearch()
-except ConnectionError as e:
-    print(f"Failed to connect to Elasticsearch: {e}")
-    exit(1)
+# Nothing here talks to Elasticsearch at import. Requests resolve the client through
+# get_elasticsearch(), and components that hold a client or a thread are built on first
+# use in each process, so workers forked from a preloaded app never inherit the parent's
+# sockets or a dead background thread.
+_components = {}  # {name: (pid, component)}
+_components_lock = threading.Lock()
 
-recommendation_engine = RecommendationEngine()
+
+def _per_process(name, factory):
+    pid = os.getpid()
+    entry = _components.get(name)
+    if entry is None or entry[0] != pid:
+        with _components_lock:
+            entry = _components.get(name)
+            if entry is None or entry[0] != pid:
+                entry = (pid, factory())
+                _components[name] = entry
+    return entry[1]
+
+
+def get_search_cache():
+    return _per_process('search_cache', lambda: create_search_cache(get_elasticsearch()))
+
+
+def get_suggester():
+    return _per_process('suggester', lambda: DestinationSuggester(get_elasticsearch()))
+
+
+def get_readiness():
+    # The readiness probe checks the cluster and indices in the background
+    return _per_process('readiness', lambda: ReadinessProbe(get_elasticsearch(), warmups=[warm_recommendation_engine]))
+
+
+def warm_recommendation_engine():
+    engine = get_recommendation_engine()
+    if getattr(engine, 'trends_cache', None) is not None:
+        engine.trends_cache.get()
+
+
+@app.before_request
+def start_timer():
+    get_readiness().start()
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        record_request(route, request.method, response.status_code, time.perf_counter() - started,
+                       response.content_length)
+    return response
+
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness only: the process is up and serving requests
+    return json_response({"status": "ok"})
+
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    status = get_readiness().status()
+    return json_response(status, 200 if status["ready"] else 503)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return app.response_class(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 
 @app.route('/search', methods=['GET'])
 def search():
-    # Extract query and filters from the request
-    query = request.args.get('q', '').strip()
-    filters = {
-        'type': request.args.get('type', None),
-        'season': request.args.get('season', None),
-        'maxPrice': request.args.get('maxPrice', None),
-        'rating': request.args.get('rating', None),
-        'timezone': request.args.get('timezone', None),  # Add timezone filter
-    }
-    sort = request.args.get('sort', 'price')
-
-    if not query:
-        return jsonify([])  # Return an empty list if query is missing
-
-    # Build Elasticsearch filters dynamically
-    must_filters = []
-
-    if filters['type']:
-        must_filters.append({"match": {"type": filters['type']}})
-    if filters['season']:
-        must_filters.append({"match": {"season": filters['season']}})
-    if filters['maxPrice']:
-        must_filters.append({"range": {"price": {"lte": int(filters['maxPrice'])}}})
-    if filters['rating']:
-        must_filters.append({"term": {"rating": int(filters['rating'])}})  # Exact match for numeric rating
-    if filters['timezone']:
-        must_filters.append({"match": {"timezone": filters['timezone']}})  # Add timezone filter
+    try:
+        params = parse_search_request(request.args)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    if params is None:
+        return json_response([])  # Return an empty list if there is neither a query nor a location
+
+    # Serve repeated query/filter combinations without touching Elasticsearch
+    search_cache = get_search_cache()
+    cache_key = search_cache_key(search_cache, params)
+    cached = search_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return _search_response(*cached)
 
     # Elasticsearch query
-    response = app.elasticsearch.search(
-        index="destinations",
-        body={
-            "query": {
-                "bool": {
-                    "must": must_filters,
-                    "should": [
-                        {
-                            "multi_match": {
-                                "query": query,
-                                "fields": [
-                                    "destination^3",
-                                    "type^2",
-                                    "activities",
-                                    "season"
-                                ],
-                                "fuzziness": "AUTO",
-                                "operator": "or"
-                            }
-                        }
-                    ],
-                    "minimum_should_match": 1
-                }
-            },
-            "sort": [
-                {sort: {"order": "asc"}},  # Sort dynamically based on user input
-                "_score"
-            ]
-        }
-    )
-
-    # Format the response
-    results = [
-        {
-            'score': hit['_score'],
-            **hit['_source']
-        }
-        for hit in response['hits']['hits']
-    ]
-
-    return jsonify(results)
+    profiled = attach_profile(params.body)
+    with es_timer("destinations_search"):
+        if params.searches:
+            result = get_elasticsearch().msearch(searches=params.searches)
+        else:
+            result = get_elasticsearch().search(index="destinations", body=params.body)
+    payload, cursor = complete_search(params, result, profiled)
+    if cache_key:
+        search_cache.set(cache_key, payload, cursor)
+
+    return _search_response(payload, cursor)
+
+
+def _search_response(payload, cursor):
+    # The body stays a plain list; the cursor for the next page travels in a header
+    return json_response(payload, headers={'X-Next-Cursor': cursor} if cursor else None)
+
+
+def json_response(payload, status=200, headers=None):
+    # orjson-encoded, compressed when the client accepts it, long lists and dicts streamed in chunks
+    return build_json_response(app.response_class, payload, request.headers.get('Accept-Encoding'), status, headers)
 
 
 
 
 
+@app.route('/suggest', methods=['GET'])
+def suggest():
+    prefix = request.args.get('q', '').strip()
+    if not prefix:
+        return json_response([])
+    try:
+        size = parse_size(request.args.get('size'), Config.SUGGEST_SIZE, Config.SUGGEST_MAX_SIZE)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    # Hot short prefixes never leave the process
+    suggester = get_suggester()
+    suggestions = suggester.lookup(prefix, size)
+    if suggestions is not None:
+        return json_response(suggestions)
+
+    try:
+        with es_timer("suggest"):
+            response = get_elasticsearch().search(index="destinations", body=build_suggest_body(prefix, size))
+        return json_response(parse_suggest_response(response))
+    except Exception as e:
+        logger.error("Error fetching suggestions", extra={"prefix": prefix, "error": str(e)})
+        return json_response(suggester.fallback(prefix, size))
+
+
 @app.route('/recommendations', methods=['GET'])
 def recommendations():
-    user_id = request.args.get("user_id")
-    if not user_id:
-        return jsonify({"error": "User ID is required"}), 400
+    try:
+        user_id, fields = parse_recommendations_request(request.args)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
 
     try:
-        response = recommendation_engine.get_personalized_recommendations(user_id)
-        results = [hit['_source'] for hit in response['hits']['hits']]
-        return jsonify(results)
-    except Exception as e:
-        print(f"Error fetching recommendations for user {user_id}: {e}")
-        return jsonify({"error": "Failed to fetch recommendations"}), 500
+        if Config.SERVE_PRECOMPUTED_RECOMMENDATIONS:
+            # One key lookup when the offline job has already covered this user
+            results = get_recommendation_engine().get_precomputed_recommendations(user_id)
+            if results is not None:
+                return json_response([project(result, fields) for result in results])
+
+        response = get_recommendation_engine().get_personalized_recommendations(user_id, fields)
+        return json_response(recommendation_results(response))
+    except Exception:
+        logger.exception("Error fetching recommendations", extra={"user_id": user_id})
+        return json_response({"error": "Failed to fetch recommendations"}, 500)
+
+@app.route('/recommendations/batch', methods=['POST'])
+def batch_recommendations():
+    try:
+        user_ids = parse_batch_user_ids(request.get_json(silent=True))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        return json_response(get_recommendation_engine().get_batch_recommendations(user_ids))
+    except Exception:
+        logger.exception("Error fetching batch recommendations", extra={"users": len(user_ids)})
+        return json_response({"error": "Failed to fetch recommendations"}, 500)
 
 @app.route('/save-recommendation', methods=['POST'])
 def save_recommendation():
-    data = request.get_json()
-    user_id = data.get('user_id')
-    recommendation = data.get('recommendation')
-    
-    if not user_id or not recommendation:
-        return jsonify({"error": "User ID and recommendation are required"}), 400
+    try:
+        event = parse_saved_recommendation(request.get_json(silent=True))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
     
-    # Save the recommendation to the user's profile
-    app.elasticsearch.index(index="user_recommendations", body={
-        "user_id": user_id,
-        "recommendation": recommendation,
-        "timestamp": "now"
-    })
+    # Save the recommendation to the user's profile; the buffer indexes it in the background
+    accepted = get_event_buffer().add("user_recommendations", event)
+    if not accepted:
+        return json_response({"error": "Too many pending writes, please retry"}, 503)
     
-    return jsonify({"message": "Recommendation saved successfully"})
+    return json_response({"message": "Recommendation saved successfully"})
+
+
+@app.route('/users/<user_id>/profile', methods=['PUT'])
+def update_profile(user_id):
+    try:
+        profile = parse_profile(request.get_json(silent=True))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        # Written through to this worker's profile cache, so the next recommendations use it
+        get_recommendation_engine().update_user_profile(user_id, profile)
+    except Exception:
+        logger.exception("Error updating user profile", extra={"user_id": user_id})
+        return json_response({"error": "Failed to update profile"}, 500)
+    return json_response({"message": "Profile updated successfully"})
 
 
 
@@ -135,53 +236,59 @@ def save_recommendation():
 @app.route('/destination/<destination_id>', methods=['GET'])
 def get_destination_details(destination_id):
     try:
-        # Validate destination_id format
-        if not destination_id.startswith("destination_"):
-            return jsonify({"error": "Invalid destination ID format"}), 400
-
-        # Fetch destination details by matching 'id' field
-        result = app.elasticsearch.search(
-            index="destinations",
-            body={
-                "query": {
-                    "term": {
-                        "id.keyword": destination_id  # Match the 'id' field exactly
-                    }
-                }
-            }
-        )
-
-        # Check if the destination was found
-        if result['hits']['total']['value'] == 0:
-            return jsonify({"error": "Destination not found"}), 404
-
-        # Get the destination details
-        destination = result['hits']['hits'][0]['_source']
-
-        # Fetch associated reviews
-        reviews_result = app.elasticsearch.search(
-            index="destination_reviews",
-            body={
-                "query": {
-                    "term": {
-                        "destination_id.keyword": destination_id  # Match exact destination_id
-                    }
-                }
-            }
-        )
-
-        # Extract reviews
-        reviews = [hit['_source'] for hit in reviews_result['hits']['hits']]
-
-        return jsonify({
-            "destination": destination,
-            "reviews": reviews
+        reviews_size, fields = parse_destination_request(destination_id, request.args)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        # Destinations are stored with their id as _id, so one realtime _mget returns the
+        # destination together with its precomputed similar destinations and review summary
+        with es_timer("destination_lookup"):
+            docs = get_elasticsearch().mget(docs=build_destination_lookup(destination_id, fields))['docs']
+        if not docs[0].get('found'):
+            return json_response({"error": "Destination not found"}, 404)
+
+        # Fetch one capped page of reviews; the summary carries the totals
+        with es_timer("reviews_search"):
+            reviews_result = get_elasticsearch().search(
+                index="destination_reviews",
+                body=build_reviews_query(destination_id, reviews_size)
+            )
+        record_hits("reviews_search", reviews_result)
+
+        return json_response(assemble_destination_page(destination_id, docs, reviews_result))
+
+    except Exception:
+        logger.exception("Error fetching destination details", extra={"destination_id": destination_id})
+        return json_response({"error": "Internal server error"}, 500)
+
+
+@app.route('/destinations', methods=['GET'])
+def get_destinations():
+    destination_ids, error = parse_destination_ids(request.args.get('ids'))
+    if error:
+        return json_response({"error": error}, 400)
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        # One _mget for the destinations and their review summaries, one _msearch for all of their reviews
+        with es_timer("destination_lookup"):
+            docs = get_elasticsearch().mget(docs=build_destinations_lookup(destination_ids, fields))['docs']
+        with es_timer("reviews_search"):
+            reviews_responses = get_elasticsearch().msearch(searches=build_reviews_msearch(destination_ids))['responses']
+        pages, not_found = assemble_destination_pages(destination_ids, docs, reviews_responses)
+
+        return json_response({
+            "destinations": pages,
+            "not_found": not_found
         })
 
-    except Exception as e:
-        # Log error for debugging (optional)
-        app.logger.error(f"Error fetching destination details for ID {destination_id}: {e}")
-        return jsonify({"error": "Internal server error"}), 500
+    except Exception:
+        logger.exception("Error fetching destinations", extra={"destination_ids": destination_ids})
+        return json_response({"error": "Internal server error"}, 500)
 
 
 @app.route('/', defaults={'path': ''})
@@ -0,0 +1,288 @@
+# Async serving mode: the same API as run.py on an ASGI server, backed by AsyncElasticsearch.
+# Run with e.g. `hypercorn run_async:app --workers 4` (requires quart and elasticsearch[async]).
+import asyncio
+import os
+import time
+from quart import Quart, send_from_directory, request, g
+from config import Config
+from utils.es_utils import create_async_elasticsearch_client, get_elasticsearch
+from utils.event_buffer import get_event_buffer
+from recommendation_engine import AsyncRecommendationEngine
+from utils.search_request import parse_search_request, search_cache_key, complete_search
+from utils.recommendations import (parse_recommendations_request, parse_batch_user_ids, parse_saved_recommendation,
+                                   parse_profile, recommendation_results)
+from utils.search_cache import create_search_cache
+from utils.readiness import ReadinessProbe
+from utils.suggestions import DestinationSuggester, build_suggest_body, parse_suggest_response
+from utils.pagination import parse_size
+from utils.destinations import (parse_destination_ids, parse_destination_request, build_destination_lookup,
+                                build_destinations_lookup, build_reviews_query, build_reviews_msearch,
+                                assemble_destination_page, assemble_destination_pages)
+from utils.responses import build_json_response, parse_fields, project
+from utils.metrics import REGISTRY, CONTENT_TYPE, record_request, es_timer, record_hits, attach_profile
+from utils.log import get_logger
+
+logger = get_logger("api")
+
+app = Quart(__name__, static_folder='frontend/build', static_url_path='')
+
+
+@app.before_serving
+async def connect_elasticsearch():
+    # The async client must be created on the serving event loop. Nothing here waits on
+    # Elasticsearch: the readiness probe checks the cluster and indices on its own thread
+    # and loads the first trends snapshot once they are available.
+    app.elasticsearch = create_async_elasticsearch_client()
+    app.recommendation_engine = AsyncRecommendationEngine(app.elasticsearch)
+    # The cache, the suggester and the probe use the sync client on their own threads
+    app.search_cache = create_search_cache(get_elasticsearch())
+    app.suggester = DestinationSuggester(get_elasticsearch())
+    app.readiness = ReadinessProbe(get_elasticsearch(), warmups=[app.recommendation_engine.trends_cache.get])
+    app.readiness.start()
+
+
+@app.after_serving
+async def close_elasticsearch():
+    # Flush buffered events before the clients go away
+    app.readiness.stop()
+    await asyncio.to_thread(get_event_buffer().close)
+    await app.elasticsearch.close()
+
+
+@app.after_request
+async def add_cors_headers(response):
+    response.headers.setdefault('Access-Control-Allow-Origin', '*')
+    response.headers.setdefault('Access-Control-Expose-Headers', 'X-Next-Cursor')
+    return response
+
+
+@app.before_request
+async def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+async def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        record_request(route, request.method, response.status_code, time.perf_counter() - started,
+                       response.content_length)
+    return response
+
+
+async def _timed(operation, awaitable):
+    # Per-call Elasticsearch timing for calls that run concurrently under asyncio.gather
+    with es_timer(operation):
+        return await awaitable
+
+
+@app.route('/healthz', methods=['GET'])
+async def healthz():
+    # Liveness only: the process is up and serving requests
+    return json_response({"status": "ok"})
+
+
+@app.route('/readyz', methods=['GET'])
+async def readyz():
+    status = app.readiness.status()
+    return json_response(status, 200 if status["ready"] else 503)
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    return app.response_class(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@app.route('/search', methods=['GET'])
+async def search():
+    try:
+        params = parse_search_request(request.args)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    if params is None:
+        return json_response([])  # Return an empty list if there is neither a query nor a location
+
+    cache_key = search_cache_key(app.search_cache, params)
+    cached = app.search_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return _search_response(*cached)
+
+    profiled = attach_profile(params.body)
+    with es_timer("destinations_search"):
+        if params.searches:
+            result = await app.elasticsearch.msearch(searches=params.searches)
+        else:
+            result = await app.elasticsearch.search(index="destinations", body=params.body)
+    payload, cursor = complete_search(params, result, profiled)
+    if cache_key:
+        app.search_cache.set(cache_key, payload, cursor)
+
+    return _search_response(payload, cursor)
+
+
+def _search_response(payload, cursor):
+    return json_response(payload, headers={'X-Next-Cursor': cursor} if cursor else None)
+
+
+def json_response(payload, status=200, headers=None):
+    # orjson-encoded, compressed when the client accepts it, long lists and dicts streamed in chunks
+    return build_json_response(app.response_class, payload, request.headers.get('Accept-Encoding'), status, headers)
+
+
+@app.route('/suggest', methods=['GET'])
+async def suggest():
+    prefix = request.args.get('q', '').strip()
+    if not prefix:
+        return json_response([])
+    try:
+        size = parse_size(request.args.get('size'), Config.SUGGEST_SIZE, Config.SUGGEST_MAX_SIZE)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    # Hot short prefixes never leave the process
+    suggestions = app.suggester.lookup(prefix, size)
+    if suggestions is not None:
+        return json_response(suggestions)
+
+    try:
+        with es_timer("suggest"):
+            response = await app.elasticsearch.search(index="destinations", body=build_suggest_body(prefix, size))
+        return json_response(parse_suggest_response(response))
+    except Exception as e:
+        logger.error("Error fetching suggestions", extra={"prefix": prefix, "error": str(e)})
+        return json_response(app.suggester.fallback(prefix, size))
+
+
+@app.route('/recommendations', methods=['GET'])
+async def recommendations():
+    try:
+        user_id, fields = parse_recommendations_request(request.args)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        if Config.SERVE_PRECOMPUTED_RECOMMENDATIONS:
+            # One key lookup when the offline job has already covered this user
+            results = await app.recommendation_engine.get_precomputed_recommendations(user_id)
+            if results is not None:
+                return json_response([project(result, fields) for result in results])
+
+        response = await app.recommendation_engine.get_personalized_recommendations(user_id, fields)
+        return json_response(recommendation_results(response))
+    except Exception:
+        logger.exception("Error fetching recommendations", extra={"user_id": user_id})
+        return json_response({"error": "Failed to fetch recommendations"}, 500)
+
+
+@app.route('/recommendations/batch', methods=['POST'])
+async def batch_recommendations():
+    try:
+        user_ids = parse_batch_user_ids(await request.get_json(silent=True))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        return json_response(await app.recommendation_engine.get_batch_recommendations(user_ids))
+    except Exception:
+        logger.exception("Error fetching batch recommendations", extra={"users": len(user_ids)})
+        return json_response({"error": "Failed to fetch recommendations"}, 500)
+
+
+@app.route('/save-recommendation', methods=['POST'])
+async def save_recommendation():
+    try:
+        event = parse_saved_recommendation(await request.get_json(silent=True))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    accepted = get_event_buffer().add("user_recommendations", event, block=False)
+    if not accepted:
+        return json_response({"error": "Too many pending writes, please retry"}, 503)
+
+    return json_response({"message": "Recommendation saved successfully"})
+
+
+@app.route('/users/<user_id>/profile', methods=['PUT'])
+async def update_profile(user_id):
+    try:
+        profile = parse_profile(await request.get_json(silent=True))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        await app.recommendation_engine.update_user_profile(user_id, profile)
+    except Exception:
+        logger.exception("Error updating user profile", extra={"user_id": user_id})
+        return json_response({"error": "Failed to update profile"}, 500)
+    return json_response({"message": "Profile updated successfully"})
+
+
+@app.route('/destination/<destination_id>', methods=['GET'])
+async def get_destination_details(destination_id):
+    try:
+        reviews_size, fields = parse_destination_request(destination_id, request.args)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        # The destination (with its similar destinations and review summary) and its reviews are
+        # independent, so fetch them concurrently
+        lookup_result, reviews_result = await asyncio.gather(
+            _timed("destination_lookup",
+                   app.elasticsearch.mget(docs=build_destination_lookup(destination_id, fields))),
+            _timed("reviews_search", app.elasticsearch.search(index="destination_reviews",
+                                                              body=build_reviews_query(destination_id, reviews_size)))
+        )
+        page = assemble_destination_page(destination_id, lookup_result['docs'], reviews_result)
+        if page is None:
+            return json_response({"error": "Destination not found"}, 404)
+        record_hits("reviews_search", reviews_result)
+
+        return json_response(page)
+
+    except Exception:
+        logger.exception("Error fetching destination details", extra={"destination_id": destination_id})
+        return json_response({"error": "Internal server error"}, 500)
+
+
+@app.route('/destinations', methods=['GET'])
+async def get_destinations():
+    destination_ids, error = parse_destination_ids(request.args.get('ids'))
+    if error:
+        return json_response({"error": error}, 400)
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    try:
+        mget_result, msearch_result = await asyncio.gather(
+            _timed("destination_lookup",
+                   app.elasticsearch.mget(docs=build_destinations_lookup(destination_ids, fields))),
+            _timed("reviews_search", app.elasticsearch.msearch(searches=build_reviews_msearch(destination_ids)))
+        )
+        pages, not_found = assemble_destination_pages(
+            destination_ids, mget_result['docs'], msearch_result['responses']
+        )
+
+        return json_response({
+            "destinations": pages,
+            "not_found": not_found
+        })
+
+    except Exception:
+        logger.exception("Error fetching destinations", extra={"destination_ids": destination_ids})
+        return json_response({"error": "Internal server error"}, 500)
+
+
+@app.route('/', defaults={'path': ''})
+@app.route('/<path:path>')
+async def serve(path):
+    if path and path != "" and os.path.exists(app.static_folder + '/' + path):
+        return await send_from_directory(app.static_folder, path)
+    else:
+        return await send_from_directory(app.static_folder, 'index.html')
+
+if __name__ == "__main__":
+    app.run(debug=Config.DEBUG)
@@ -1,59 +1,67 @@
 
-from elasticsearch import Elasticsearch
-from utils.es_utils import wait_for_elasticsearch
+from config import Config
+from utils.es_utils import get_elasticsearch
+from utils.pagination import decode_cursor
+from utils.geo import parse_origin
+from utils.destinations import build_reviews_query
+from utils.query_builder import (DESTINATION_TIEBREAKER, build_filter_clauses, build_destination_query,
+                                 build_distance_sort)
+from utils.facets import build_facets_body, build_search_msearch, split_search_responses
 
 class SearchService:
     def __init__(self):
-        self.es = wait_for_elasticsearch()
-
-    def search_destinations(self, query_params):
-        must_conditions = []
-        
-        if 'type' in query_params:
-            must_conditions.append({"match": {"type": query_params['type']}})
-            
-        if 'price_range' in query_params:
-            must_conditions.append({
-                "range": {
-                    "price": {
-                        "gte": query_params['price_range'][0],
-                        "lte": query_params['price_range'][1]
-                    }
-                }
-            })
-            
-        if 'rating' in query_params:
-            must_conditions.append({
-                "range": {
-                    "rating": {"gte": query_params['rating']}
-                }
-            })
+        self.es = get_elasticsearch()
 
-        body = {
-            "query": {
-                "bool": {
-                    "must": must_conditions
-                }
-            },
-            "sort": [
-                {"rating": {"order": "desc"}},
-                {"reviews_count": {"order": "desc"}}
-            ]
+    def search_destinations(self, query_params, size=Config.SEARCH_DEFAULT_SIZE, cursor=None, facets=None):
+        """
+        :param query_params: Dict with optional `type`, `rating`, `price_range` (min, max),
+                             `near` (lat, lon), `radius` and `region` (geohash) values.
+        :param facets: Facet names to count alongside the hits; the response then carries a `facets` key.
+        """
+        filters = {
+            'type': query_params.get('type'),
+            'minRating': query_params.get('rating'),
+            'radius': query_params.get('radius'),
+            'region': query_params.get('region')
         }
+        if 'price_range' in query_params:
+            filters['minPrice'], filters['maxPrice'] = query_params['price_range']
+        if query_params.get('near'):
+            filters['lat'], filters['lon'] = query_params['near']
+        conditions = build_filter_clauses(filters)
 
-        return self.es.search(index="destinations", body=body)
-
-    def get_destination_reviews(self, destination_name, page=1, size=10):
+        # Nearest first when searching around a point, otherwise best rated first
+        primary_sort = [build_distance_sort(parse_origin(filters))] if query_params.get('near') \
+            else [{"rating": {"order": "desc"}}, {"reviews_count": {"order": "desc"}}]
         body = {
-            "query": {
-                "match": {"destination": destination_name}
-            },
-            "sort": [
-                {"helpful_votes": {"order": "desc"}},
-                {"date": {"order": "desc"}}
+            # No free text, so nothing is scored and every clause can come from the filter cache
+            "query": build_destination_query(None, conditions.values()),
+            "sort": primary_sort + [
+                {DESTINATION_TIEBREAKER: {"order": "asc"}}
             ],
-            "from": (page - 1) * size,
-            "size": size
+            "size": min(size, Config.SEARCH_MAX_SIZE),
+            "_source": Config.DESTINATION_LIST_FIELDS
         }
-        
-        return self.es.search(index="destination_reviews", body=body)
\ No newline at end of file
+        search_after = decode_cursor(cursor)
+        if search_after:
+            body["search_after"] = search_after
+
+        if not facets:
+            return self.es.search(index="destinations", body=body)
+
+        facets_body = build_facets_body(None, conditions, facets)
+        responses = self.es.msearch(searches=build_search_msearch(body, facets_body))['responses']
+        response, facet_counts = split_search_responses(responses)
+        return {**response, "facets": facet_counts}
+
+    def get_destination_reviews(self, destination_id, size=Config.REVIEWS_PAGE_SIZE, cursor=None):
+        """
+        Fetch one page of a destination's reviews, most helpful and most recent first.
+        :param cursor: Cursor from the previous page; search_after keeps every page as cheap as the first.
+        """
+        body = build_reviews_query(destination_id, min(size, Config.REVIEWS_PAGE_MAX_SIZE))
+        search_after = decode_cursor(cursor)
+        if search_after:
+            body["search_after"] = search_after
+
+        return self.es.search(index="destination_reviews", body=body)
@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+import numpy as np
+from elasticsearch.helpers import scan, bulk
+from config import Config
+from in_memory_recommendation_engine import DestinationMatrix, load_catalog
+from utils.es_utils import get_elasticsearch
+from utils.log import get_logger
+
+logger = get_logger("similar_destinations")
+
+# Fields copied into each neighbour so the detail page can render it without another lookup
+SUMMARY_FIELDS = ("id", "destination", "type", "season", "price", "rating")
+
+_features = None
+_interactions = None
+
+def _init_worker(features, interactions):
+    # The features and interactions are shipped once per worker instead of once per chunk
+    global _features, _interactions
+    _features, _interactions = features, interactions
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def content_features(matrix, price_bands=Config.SIMILARITY_PRICE_BANDS):
+    """
+    Stack type, season, activities and price band into one row-normalized feature matrix,
+    so that a dot product between two rows is their content cosine similarity.
+    """
+    prices = matrix.price
+    edges = np.quantile(prices, np.linspace(0, 1, price_bands + 1)[1:-1]) if len(prices) else []
+    bands = np.digitize(prices, edges)
+    price_onehot = np.zeros((len(prices), price_bands), dtype=bool)
+    price_onehot[np.arange(len(prices)), bands] = True
+
+    # Each attribute family counts equally, however many columns it spans
+    blocks = [matrix.type_onehot, matrix.season_onehot, matrix.activity_bits, price_onehot]
+    return _normalize_rows(np.hstack([_normalize_rows(block.astype(np.float32)) for block in blocks]))
+
+class CoInteractions:
+    """
+    Sparse destination/user incidence from `user_interactions`, stored as compressed
+    index arrays in both directions, so memory grows with the number of distinct
+    (destination, user) pairs rather than destinations x users.
+    """
+
+    def __init__(self, pairs, destinations_count, users_count):
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        rows, columns = pairs[:, 0], pairs[:, 1]
+        self.users_count = users_count
+        # Interactions per destination; pairs are distinct, so this is also each row's squared norm
+        self.degree = np.bincount(rows, minlength=destinations_count)
+        self.destination_indptr = np.concatenate(([0], np.cumsum(self.degree)))
+        self.destination_users = columns[np.argsort(rows, kind='stable')]
+        self.user_indptr = np.concatenate(([0], np.cumsum(np.bincount(columns, minlength=users_count))))
+        self.user_destinations = rows[np.argsort(columns, kind='stable')]
+
+    def cosine(self, start, stop):
+        """
+        :return: (stop - start, destinations) block of co-interaction cosine similarities.
+        """
+        shared = np.zeros((stop - start, len(self.degree)), dtype=np.float32)
+        for row in range(start, stop):
+            users = self.destination_users[self.destination_indptr[row]:self.destination_indptr[row + 1]]
+            if len(users):
+                neighbours = np.concatenate([self.user_destinations[self.user_indptr[u]:self.user_indptr[u + 1]]
+                                             for u in users])
+                np.add.at(shared[row - start], neighbours, 1)
+        norms = np.sqrt(np.outer(self.degree[start:stop], self.degree)).astype(np.float32)
+        return np.divide(shared, norms, out=np.zeros_like(shared), where=norms > 0)
+
+def interaction_features(es, destination_rows):
+    """
+    Collect the distinct (destination, user) pairs in `user_interactions`.
+    :return: CoInteractions over the rows of `destination_rows`.
+    """
+    users, pairs = {}, set()
+    for hit in scan(es, index="user_interactions", query={"_source": ["user_id", "destination"]}):
+        row = destination_rows.get(hit['_source'].get('destination'))
+        if row is not None and hit['_source'].get('user_id'):
+            pairs.add((row, users.setdefault(hit['_source']['user_id'], len(users))))
+    return CoInteractions(sorted(pairs), len(destination_rows), len(users))
+
+def _neighbours_chunk(start, stop, size, interaction_weight):
+    # (chunk, destinations) similarity block; the full matrix is never materialized
+    scores = _features[start:stop] @ _features.T
+    if _interactions is not None and _interactions.users_count:
+        scores = (1 - interaction_weight) * scores + interaction_weight * _interactions.cosine(start, stop)
+    scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+    k = min(size, scores.shape[1] - 1)
+    if k <= 0:
+        return [[] for _ in range(start, stop)]
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    neighbours = []
+    for row, candidates in enumerate(top):
+        ordered = candidates[np.argsort(-scores[row, candidates], kind='stable')]
+        neighbours.append([(int(i), float(scores[row, i])) for i in ordered if scores[row, i] > 0])
+    return neighbours
+
+def compute_similarities(destinations, interactions=None, size=Config.SIMILAR_DESTINATIONS_SIZE,
+                         interaction_weight=Config.SIMILARITY_INTERACTION_WEIGHT, workers=os.cpu_count(),
+                         chunk_size=512):
+    """
+    Compute the top `size` neighbours of every destination.
+    :param destinations: List of destination dicts.
+    :param interactions: Optional output of `interaction_features` in the same row order.
+    :return: Dict of destination id to a list of neighbour summaries, most similar first.
+    """
+    matrix = DestinationMatrix(destinations)
+    features = content_features(matrix)
+    chunks = [(start, min(start + chunk_size, len(matrix))) for start in range(0, len(matrix), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(features, interactions)) as pool:
+        futures = [pool.submit(_neighbours_chunk, start, stop, size, interaction_weight) for start, stop in chunks]
+        rows = [neighbours for future in futures for neighbours in future.result()]
+
+    similarities = {}
+    for destination, neighbours in zip(matrix.destinations, rows):
+        similarities[destination['id']] = [
+            {**{field: matrix.destinations[i].get(field) for field in SUMMARY_FIELDS}, "score": round(score, 4)}
+            for i, score in neighbours
+        ]
+    return similarities
+
+def _documents(similarities, generated_at):
+    for destination_id, similar in similarities.items():
+        yield {
+            "_index": Config.SIMILAR_DESTINATIONS_INDEX,
+            "_id": destination_id,
+            "_source": {
+                "destination_id": destination_id,
+                "similar": similar,
+                "generated_at": generated_at
+            }
+        }
+
+def run(catalog=None, size=Config.SIMILAR_DESTINATIONS_SIZE, workers=os.cpu_count(),
+        use_interactions=True, output=None):
+    """
+    Compute similar destinations for the whole catalog and store them.
+    :param catalog: JSON file to read destinations from instead of the destinations index.
+    :param use_interactions: Blend in co-interaction similarity from `user_interactions`.
+    :param output: JSON Lines file to write to instead of the similarities index.
+    :return: Number of destinations written.
+    """
+    es = get_elasticsearch()
+    if catalog:
+        destinations = load_catalog(catalog)
+    else:
+        destinations = [hit['_source'] for hit in scan(es, index="destinations", query={"query": {"match_all": {}}})]
+
+    interactions = None
+    if use_interactions:
+        interactions = interaction_features(es, {d['id']: row for row, d in enumerate(destinations)})
+
+    similarities = compute_similarities(destinations, interactions, size, workers=workers)
+    generated_at = datetime.now(timezone.utc).isoformat()
+    if output:
+        with open(output, 'w') as sink:
+            for document in _documents(similarities, generated_at):
+                sink.write(json.dumps(document['_source']) + "\n")
+    else:
+        bulk(es, _documents(similarities, generated_at), chunk_size=Config.BULK_CHUNK_SIZE,
+             max_chunk_bytes=Config.BULK_MAX_CHUNK_BYTES)
+
+    logger.info("Computed similar destinations", extra={"destinations": len(similarities)})
+    return len(similarities)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute similar destinations for the whole catalog.")
+    parser.add_argument("--catalog", help="Read destinations from this JSON file instead of Elasticsearch")
+    parser.add_argument("--size", type=int, default=Config.SIMILAR_DESTINATIONS_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--no-interactions", action="store_true", help="Use content similarity only")
+    parser.add_argument("--output", help="Write JSON Lines to this file instead of Elasticsearch")
+    args = parser.parse_args()
+
+    run(args.catalog, args.size, args.workers, not args.no_interactions, args.output)
@@ -0,0 +1,60 @@
+from utils import cache as cache_module
+from utils.cache import LRUCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_evicts_by_total_bytes_and_skips_oversized_values():
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    cache.set("c", b"123")
+
+    assert cache.get("a") is None
+    assert cache.current_bytes == 8
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None
+    assert cache.current_bytes == 8
+
+
+def test_replacing_an_entry_releases_its_bytes():
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", b"12345")
+    cache.set("a", b"12")
+    cache.delete("missing")
+
+    assert cache.current_bytes == 2
+    assert len(cache) == 1
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = LRUCache(ttl=60)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=5)
+
+    clock.now += 10
+    assert cache.get("short") is None
+    assert cache.get("default") == 1
+
+    clock.now += 60
+    assert cache.get("default") is None
+    assert len(cache) == 0
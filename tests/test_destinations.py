@@ -0,0 +1,38 @@
+from utils.destinations import parse_destination_ids, build_destinations_lookup, assemble_destination_pages
+from utils.reviews import summary_delta
+
+
+def test_parse_destination_ids_keeps_order_without_duplicates():
+    assert parse_destination_ids("destination_2, destination_1,destination_2") == (["destination_2", "destination_1"],
+                                                                                   None)
+    assert parse_destination_ids("") == (None, "At least one destination ID is required")
+    assert parse_destination_ids("destination_1,2") == (None, "Invalid destination ID format")
+    assert parse_destination_ids("destination_1,destination_2", limit=1)[1] == \
+        "At most 1 destination IDs can be requested at once"
+
+
+def test_destinations_lookup_fetches_summaries_after_destinations():
+    docs = build_destinations_lookup(["destination_1", "destination_2"], fields=["name"])
+
+    assert [doc["_id"] for doc in docs] == ["destination_1", "destination_2", "destination_1", "destination_2"]
+    assert docs[0]["_source"] == ["name"]
+    assert "_source" not in docs[2]
+
+
+def test_assemble_destination_pages_reports_missing_ids():
+    ids = ["destination_1", "destination_2"]
+    docs = [
+        {"found": True, "_source": {"id": "destination_1"}},
+        {"found": False},
+        {"found": True, "_source": summary_delta("destination_1", [{"rating": 4}, {"rating": 5}])},
+        {"found": False},
+    ]
+    reviews = [{"hits": {"hits": [{"_source": {"id": "review_1"}}]}}, {"error": {"type": "search_phase_exception"}}]
+
+    pages, not_found = assemble_destination_pages(ids, docs, reviews)
+
+    assert not_found == ["destination_2"]
+    assert len(pages) == 1
+    assert pages[0]["destination"] == {"id": "destination_1"}
+    assert pages[0]["reviews"] == [{"id": "review_1"}]
+    assert pages[0]["review_summary"]["average_rating"] == 4.5
@@ -0,0 +1,58 @@
+import threading
+from benchmarks.fake_elasticsearch import FakeElasticsearch
+from utils.es_utils import set_elasticsearch
+from utils.event_buffer import BulkEventBuffer
+
+
+def test_flushes_queued_events_on_close():
+    es = FakeElasticsearch()
+    buffer = BulkEventBuffer(es, batch_size=2, flush_interval=0.01)
+
+    assert buffer.add("user_interactions", {"user_id": "user_1", "timestamp": "now"})
+    assert buffer.add("user_interactions", {"user_id": "user_2"})
+    assert buffer.add("user_interactions", {"user_id": "user_3"})
+    buffer.close()
+
+    documents = list(es.indices_store["user_interactions"].values())
+    assert sorted(document["user_id"] for document in documents) == ["user_1", "user_2", "user_3"]
+    assert all(document["timestamp"] != "now" for document in documents)
+    assert not buffer.add("user_interactions", {"user_id": "user_4"})
+
+
+def test_rejects_events_when_full():
+    es = FakeElasticsearch()
+    flushing = threading.Event()
+    bulk = es.bulk
+
+    def blocked_bulk(*args, **kwargs):
+        flushing.wait(5)
+        return bulk(*args, **kwargs)
+    es.bulk = blocked_bulk
+    buffer = BulkEventBuffer(es, batch_size=1, flush_interval=0.01, max_pending=2, put_timeout=0.01)
+
+    # The flusher takes one event and waits in _bulk; two more fill the queue
+    accepted = [buffer.add("user_recommendations", {"user_id": f"user_{n}"}, block=False) for n in range(10)]
+    flushing.set()
+    buffer.close()
+
+    assert accepted.count(True) <= 3
+    assert accepted[-1] is False
+    assert buffer.rejected == accepted.count(False)
+    assert len(es.indices_store["user_recommendations"]) == accepted.count(True)
+
+
+class _FullBuffer:
+    def add(self, index_name, document, block=True):
+        return False
+
+
+def test_save_recommendation_answers_503_when_the_buffer_is_full(monkeypatch):
+    set_elasticsearch(FakeElasticsearch())
+    import run
+    monkeypatch.setattr(run, "get_event_buffer", _FullBuffer)
+
+    response = run.app.test_client().post("/save-recommendation",
+                                          json={"user_id": "user_1", "recommendation": {"id": "destination_1"}})
+
+    assert response.status_code == 503
+    assert response.get_json() == {"error": "Too many pending writes, please retry"}
@@ -0,0 +1,34 @@
+import pytest
+from utils.facets import FACET_AGGREGATIONS, parse_facets, build_facets_body, split_search_responses
+
+
+def test_parse_facets():
+    assert parse_facets(None) is None
+    assert parse_facets("false") is None
+    assert parse_facets("true") == list(FACET_AGGREGATIONS)
+    assert parse_facets("season, type,season") == ["season", "type"]
+    with pytest.raises(ValueError, match="Unknown facets: colour"):
+        parse_facets("type,colour")
+
+
+def test_facets_body_counts_each_facet_without_its_own_filter():
+    clauses = {"type": {"term": {"type": "beach"}}, "price": {"range": {"price": {"lte": 100}}}}
+
+    body = build_facets_body("sun", clauses, ["type", "price"])
+
+    assert body["size"] == 0
+    assert body["aggs"]["type"]["filter"] == {"bool": {"filter": [clauses["price"]]}}
+    assert body["aggs"]["price"]["filter"] == {"bool": {"filter": [clauses["type"]]}}
+    assert body["aggs"]["price"]["aggs"]["values"] == FACET_AGGREGATIONS["price"]
+
+
+def test_failed_facets_come_back_empty_but_a_failed_search_raises():
+    hits = {"hits": {"hits": []}}
+    counts = {"aggregations": {"rating": {"values": {"buckets": [{"key": 5, "doc_count": 2},
+                                                                 {"key": 4, "doc_count": 1}]}}}}
+
+    assert split_search_responses([hits, counts]) == (hits, {"rating": [{"value": 5, "count": 2},
+                                                                        {"value": 4, "count": 1}]})
+    assert split_search_responses([hits, {"error": {"type": "timeout"}}]) == (hits, {})
+    with pytest.raises(RuntimeError):
+        split_search_responses([{"error": {"type": "timeout"}}, counts])
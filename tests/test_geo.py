@@ -0,0 +1,57 @@
+import math
+import pytest
+from utils.geo import encode_geohash, haversine_km, add_location, parse_origin, parse_distance, parse_region
+from utils.query_builder import build_filter_clauses, build_search_body
+
+
+def test_encode_geohash():
+    # Reference value for 57.64911, 10.40744
+    assert encode_geohash(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+    assert encode_geohash(57.64911, 10.40744, precision=5) == "u4pru"
+
+
+def test_haversine_km():
+    assert haversine_km(0, 0, 0, 0) == 0
+    # Paris to London is about 344 km
+    assert math.isclose(haversine_km(48.8566, 2.3522, 51.5074, -0.1278), 343.5, abs_tol=1)
+
+
+def test_add_location_skips_destinations_without_coordinates():
+    documents = list(add_location([{"id": "a", "latitude": "10", "longitude": "20"},
+                                   {"id": "b", "latitude": float("nan"), "longitude": 1.0},
+                                   {"id": "c"}]))
+
+    assert documents[0]["location"] == {"lat": 10.0, "lon": 20.0}
+    assert "geohash" in documents[0]
+    assert "location" not in documents[1] and "location" not in documents[2]
+
+
+@pytest.mark.parametrize("raw, expected", [("25", "25km"), ("500m", "500m"), ("10 MI", "10mi")])
+def test_parse_distance(raw, expected):
+    assert parse_distance(raw) == expected
+
+
+@pytest.mark.parametrize("parse, value", [
+    (parse_distance, "0"),
+    (parse_distance, "far"),
+    (parse_region, "u4pa!"),
+    (parse_origin, {"lat": "10"}),
+    (parse_origin, {"lat": "91", "lon": "0"}),
+])
+def test_invalid_locations_raise(parse, value):
+    with pytest.raises(ValueError):
+        parse(value)
+
+
+def test_geo_filters_and_distance_sort():
+    filters = {"lat": "48.85", "lon": "2.35", "radius": "10", "region": "U09"}
+
+    clauses = build_filter_clauses(filters)
+    body = build_search_body(None, filters, sort="distance")
+
+    assert clauses["location"] == {"geo_distance": {"distance": "10km", "location": {"lat": 48.85, "lon": 2.35}}}
+    assert clauses["region"] == {"prefix": {"geohash": "u09"}}
+    assert body["sort"][0] == {"_geo_distance": {"location": {"lat": 48.85, "lon": 2.35}, "order": "asc",
+                                                 "unit": "km"}}
+    with pytest.raises(ValueError, match="radius requires lat and lon"):
+        build_filter_clauses({"radius": "10"})
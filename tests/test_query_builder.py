@@ -0,0 +1,43 @@
+from utils.query_builder import trend_weights, build_trend_clauses, build_recommendation_query
+
+TRENDS = [
+    {"trend": "hiking", "season": "Winter", "popularity": 10},
+    {"trend": "hiking", "season": "Summer", "popularity": 5},
+    {"trend": "surfing", "season": "Summer", "popularity": 2},
+    {"trend": "museums", "season": None},
+]
+
+
+def test_trend_weights_collapse_repeated_values():
+    season_boosts, activity_boosts = trend_weights(TRENDS)
+
+    assert list(activity_boosts) == ["hiking", "surfing", "museums"]
+    assert activity_boosts["hiking"] == 2.0
+    assert season_boosts == {"Winter": 2.0, "Summer": 1.7}
+
+
+def test_trend_clauses_keep_seasons_and_the_most_popular_activities():
+    clauses = build_trend_clauses(TRENDS, max_clauses=3)
+
+    assert clauses == [
+        {"term": {"season": {"value": "Winter", "boost": 2.0}}},
+        {"term": {"season": {"value": "Summer", "boost": 1.7}}},
+        {"match": {"activities": {"query": "hiking", "boost": 2.0}}},
+    ]
+    assert build_trend_clauses([]) == []
+
+
+def test_recommendation_query_dedupes_preferences_and_appends_trend_clauses():
+    preferences = {"activities": ["hiking", "hiking"], "preferred_seasons": ["winter"]}
+    trend_clauses = build_trend_clauses(TRENDS[:1])
+
+    body = build_recommendation_query(preferences, 1500, trend_clauses, size=5)
+
+    should = body["query"]["bool"]["should"]
+    assert should[:3] == [
+        {"match": {"activities": "hiking"}},
+        {"range": {"price": {"gte": 0, "lte": 1500}}},
+        {"term": {"season": "winter"}},
+    ]
+    assert should[3:] == trend_clauses
+    assert body["size"] == 5
@@ -0,0 +1,48 @@
+from benchmarks.fake_elasticsearch import FakeElasticsearch
+from recommendation_engine import RecommendationEngine
+from utils.es_utils import set_elasticsearch
+
+PREFERENCES = {"activities": ["hiking"], "preferred_seasons": ["winter"], "budget_range": "low"}
+
+
+def _engine():
+    es = FakeElasticsearch()
+    es.add("user_profiles", "user_1", {"user_id": "user_1", "preferences": PREFERENCES})
+    es.indices_store.setdefault("user_profiles", {})
+    calls = []
+    get, mget = es.get, es.mget
+    es.get = lambda *args, **kwargs: calls.append("get") or get(*args, **kwargs)
+    es.mget = lambda *args, **kwargs: calls.append("mget") or mget(*args, **kwargs)
+    set_elasticsearch(es)
+    return es, RecommendationEngine(), calls
+
+
+def test_get_preferences_caches_known_and_unknown_users():
+    _, engine, calls = _engine()
+
+    assert engine.get_preferences("user_1") == PREFERENCES
+    assert engine.get_preferences("user_1") == PREFERENCES
+    assert engine.get_preferences("nobody") is None
+    assert engine.get_preferences("nobody") is None
+    assert calls == ["get", "get"]
+
+
+def test_batch_preferences_skip_users_cached_without_a_profile():
+    _, engine, calls = _engine()
+    engine.get_preferences("nobody")
+
+    assert engine._get_preferences_batch(["user_1", "nobody"]) == {"user_1": PREFERENCES}
+    assert engine._get_preferences_batch(["user_1", "nobody"]) == {"user_1": PREFERENCES}
+    assert calls == ["get", "mget"]
+
+
+def test_update_user_profile_writes_through_to_the_cache():
+    es, engine, calls = _engine()
+    engine.get_preferences("user_2")
+    updated = {**PREFERENCES, "budget_range": "high"}
+
+    engine.update_user_profile("user_2", {"preferences": updated})
+
+    assert engine.get_preferences("user_2") == updated
+    assert es.indices_store["user_profiles"]["user_2"]["user_id"] == "user_2"
+    assert calls == ["get"]
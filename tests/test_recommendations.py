@@ -0,0 +1,42 @@
+import pytest
+from utils.destinations import parse_destination_request, assemble_destination_page
+from utils.recommendations import (parse_recommendations_request, parse_batch_user_ids, parse_saved_recommendation,
+                                   parse_profile)
+
+
+def test_parse_batch_user_ids_dedupes_and_caps():
+    assert parse_batch_user_ids({"user_ids": ["user_1", 2, "user_1"]}) == ["user_1", "2"]
+    with pytest.raises(ValueError, match="User IDs are required"):
+        parse_batch_user_ids(None)
+    with pytest.raises(ValueError, match="At most 2 users"):
+        parse_batch_user_ids({"user_ids": ["a", "b", "c"]}, limit=2)
+
+
+@pytest.mark.parametrize("parse, data", [
+    (parse_recommendations_request, {}),
+    (parse_saved_recommendation, {"user_id": "user_1"}),
+    (parse_profile, {"preferences": "beach"}),
+])
+def test_request_parsers_reject_incomplete_input(parse, data):
+    with pytest.raises(ValueError):
+        parse(data)
+
+
+def test_parse_destination_request_validates_id_and_caps_reviews():
+    assert parse_destination_request("destination_1", {"reviews_size": "1000", "fields": "name"}) == (50, ["name"])
+    with pytest.raises(ValueError, match="Invalid destination ID format"):
+        parse_destination_request("1", {})
+
+
+def test_assemble_destination_page():
+    docs = [{"found": True, "_source": {"id": "destination_1"}},
+            {"found": True, "_source": {"similar": [{"id": "destination_2"}]}},
+            {"found": False}]
+    reviews = {"hits": {"hits": [{"_source": {"id": "review_1"}}]}}
+
+    page = assemble_destination_page("destination_1", docs, reviews)
+
+    assert page["destination"] == {"id": "destination_1"}
+    assert page["reviews"] == [{"id": "review_1"}]
+    assert page["similar"] == [{"id": "destination_2"}]
+    assert assemble_destination_page("destination_1", [{"found": False}, {}, {}], reviews) is None
@@ -0,0 +1,58 @@
+import gzip
+import json
+import pytest
+from utils.responses import parse_fields, project, negotiate_encoding, stream_json, build_json_response
+
+
+class _Response:
+    def __init__(self, body, status, headers, mimetype):
+        self.body, self.status, self.headers = body, status, headers
+
+    def data(self):
+        return self.body if isinstance(self.body, bytes) else b"".join(self.body)
+
+
+def test_parse_fields_dedupes_and_validates():
+    assert parse_fields(None) is None
+    assert parse_fields("name, country,name") == ["name", "country"]
+    with pytest.raises(ValueError):
+        parse_fields("name,bad-field")
+    with pytest.raises(ValueError):
+        parse_fields("a,b,c", limit=2)
+
+
+def test_project_keeps_requested_fields_only():
+    document = {"id": "destination_1", "name": "Lisbon", "country": "PT"}
+
+    assert project(document, ["name", "missing"]) == {"name": "Lisbon"}
+    assert project(document, None) is document
+
+
+def test_negotiate_encoding_honours_quality_values():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding(None) is None
+
+
+@pytest.mark.parametrize("payload", [list(range(7)), {f"user_{n}": [n] for n in range(7)}, [], {}])
+def test_stream_json_encodes_the_same_document(payload):
+    assert json.loads(b"".join(stream_json(payload, chunk_items=3))) == payload
+
+
+def test_build_json_response_streams_long_lists_compressed():
+    payload = [{"id": n} for n in range(500)]
+
+    response = build_json_response(_Response, payload, "gzip")
+
+    assert not isinstance(response.body, bytes)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data())) == payload
+
+
+def test_build_json_response_leaves_small_bodies_uncompressed():
+    response = build_json_response(_Response, {"error": "Invalid"}, "gzip", status=400)
+
+    assert response.status == 400
+    assert "Content-Encoding" not in response.headers
+    assert json.loads(response.data()) == {"error": "Invalid"}
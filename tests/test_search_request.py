@@ -0,0 +1,58 @@
+import pytest
+from utils.query_builder import build_filter_clauses, build_search_body
+from utils.search_request import parse_search_request, read_search_result, build_search_payload
+
+
+def test_filter_clauses_run_in_filter_context():
+    clauses = build_filter_clauses({"type": "beach", "minPrice": "100", "maxPrice": "250.5", "rating": "4"})
+
+    assert clauses == {
+        "type": {"term": {"type": "beach"}},
+        "price": {"range": {"price": {"gte": 100.0, "lte": 250.5}}},
+        "rating": {"term": {"rating": 4}}
+    }
+    body = build_search_body("sun", {"type": "beach"})
+    assert body["query"]["bool"]["filter"] == [{"term": {"type": "beach"}}]
+    assert body["sort"][-1] == {"id": {"order": "asc"}}
+
+
+@pytest.mark.parametrize("args, message", [
+    ({"q": "beach", "rating": "abc"}, "rating must be an integer"),
+    ({"q": "beach", "maxPrice": "cheap"}, "maxPrice must be a number"),
+    ({"q": "beach", "size": "0"}, "size must be a positive integer"),
+    ({"q": "beach", "cursor": "not-a-cursor"}, "Invalid cursor"),
+    ({"lat": "north", "lon": "1"}, "lat and lon must be numbers"),
+    ({"q": "beach", "sort": "distance"}, "sort=distance requires lat and lon"),
+])
+def test_parse_search_request_names_the_invalid_parameter(args, message):
+    with pytest.raises(ValueError, match=message):
+        parse_search_request(args)
+
+
+def test_parse_search_request_without_query_or_location_is_none():
+    assert parse_search_request({"type": "beach"}) is None
+
+
+def test_facets_are_requested_in_the_same_msearch():
+    search_request = parse_search_request({"q": "beach", "type": "beach", "facets": "type,season"})
+
+    assert search_request.searches[1] is search_request.body
+    facets_body = search_request.searches[3]
+    # Each facet is counted under every filter but its own
+    assert facets_body["aggs"]["type"]["filter"] == {"bool": {"filter": []}}
+    assert facets_body["aggs"]["season"]["filter"] == {"bool": {"filter": [{"term": {"type": "beach"}}]}}
+    assert parse_search_request({"q": "beach"}).searches is None
+
+
+def test_build_search_payload_returns_a_cursor_for_full_pages():
+    search_request = parse_search_request({"q": "beach", "size": "1", "facets": "type"})
+    hits = [{"_score": 1.0, "_source": {"id": "destination_1"}, "sort": [100, 1.0, "destination_1"]}]
+    responses = {"responses": [{"hits": {"hits": hits}},
+                               {"aggregations": {"type": {"values": {"buckets": [{"key": "beach", "doc_count": 3}]}}}}]}
+
+    response, facet_counts = read_search_result(search_request, responses)
+    payload, cursor = build_search_payload(search_request, response["hits"]["hits"], facet_counts)
+
+    assert payload == (b'{"results":[{"score":1.0,"id":"destination_1"}],'
+                       b'"facets":{"type":[{"value":"beach","count":3}]}}')
+    assert parse_search_request({"q": "beach", "cursor": cursor}).body["search_after"] == [100, 1.0, "destination_1"]
@@ -0,0 +1,36 @@
+from benchmarks.fake_elasticsearch import FakeElasticsearch
+from search_service import SearchService
+from utils.es_utils import set_elasticsearch
+from utils.pagination import next_cursor
+
+
+def _service_with_reviews():
+    es = FakeElasticsearch()
+    for number in range(5):
+        es.add("destination_reviews", f"destination_1_{number}", {
+            "id": f"destination_1_{number}", "destination_id": "destination_1",
+            "helpful_votes": number, "date": f"2023-01-0{number + 1}", "review_statement": "Lovely"
+        })
+    es.add("destination_reviews", "destination_2_0", {
+        "id": "destination_2_0", "destination_id": "destination_2", "helpful_votes": 10, "date": "2023-01-01"
+    })
+    set_elasticsearch(es)
+    return SearchService()
+
+
+def test_get_destination_reviews_pages_through_one_destination():
+    service = _service_with_reviews()
+
+    first = service.get_destination_reviews("destination_1", size=3)['hits']['hits']
+    cursor = next_cursor(first, 3)
+    second = service.get_destination_reviews("destination_1", size=3, cursor=cursor)['hits']['hits']
+
+    assert [hit['_id'] for hit in first] == ["destination_1_4", "destination_1_3", "destination_1_2"]
+    assert [hit['_id'] for hit in second] == ["destination_1_1", "destination_1_0"]
+    assert next_cursor(second, 3) is None
+
+
+def test_get_destination_reviews_for_unknown_destination_is_empty():
+    service = _service_with_reviews()
+
+    assert service.get_destination_reviews("destination_3")['hits']['hits'] == []
@@ -0,0 +1,40 @@
+import math
+from utils.sketches import CountMinSketch, DecayedTopK
+
+
+def test_count_min_sketch_never_undercounts():
+    sketch = CountMinSketch(width=64, depth=4)
+    counts = {f"key_{n}": n % 7 + 1 for n in range(200)}
+    for key, count in counts.items():
+        sketch.add(key, count)
+
+    assert all(sketch.estimate(key) >= count for key, count in counts.items())
+    assert sketch.estimate("never_added") >= 0
+
+
+def test_decayed_top_k_keeps_the_heaviest_keys():
+    top_k = DecayedTopK(k=2, half_life=3600, now=0)
+    for key, weight in [("a", 5), ("b", 1), ("c", 3), ("b", 1), ("d", 4)]:
+        top_k.add(key, weight, timestamp=0)
+
+    assert [key for key, _ in top_k.top(now=0)] == ["a", "d"]
+
+
+def test_counts_halve_every_half_life():
+    top_k = DecayedTopK(k=5, half_life=100, now=0)
+    top_k.add("old", 8, timestamp=0)
+    top_k.add("new", 8, timestamp=100)
+
+    counts = dict(top_k.top(now=200))
+    assert math.isclose(counts["old"], 2)
+    assert math.isclose(counts["new"], 4)
+
+
+def test_landmark_moves_forward_without_losing_counts():
+    top_k = DecayedTopK(k=5, half_life=1, now=0)
+    top_k.add("key", 1, timestamp=0)
+    # exp(λt) would overflow well before this without rescaling
+    top_k.add("key", 1, timestamp=100)
+
+    assert top_k.landmark == 100
+    assert math.isclose(dict(top_k.top(now=100))["key"], 1 + 2 ** -100)
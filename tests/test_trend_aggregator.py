@@ -0,0 +1,89 @@
+import json
+import time
+from elastic_transport import ObjectApiResponse
+from benchmarks.fake_elasticsearch import FakeElasticsearch, _meta
+from config import Config
+from trend_aggregator import TrendAggregator
+from utils.sketches import DecayedTopK
+
+
+def _aggregator():
+    es = FakeElasticsearch()
+    es.add("destinations", "destination_1", {"activities": "hiking, skiing", "season": "Winter"})
+    es.indices_store.setdefault("user_interactions", {})
+    return es, TrendAggregator(es, lateness=60)
+
+
+def _interaction(es, doc_id, timestamp_ms):
+    es.add("user_interactions", doc_id, {
+        "user_id": "user_1", "destination": "destination_1", "interaction_type": "view", "timestamp": timestamp_ms
+    })
+
+
+def test_poll_counts_interaction_flushed_after_a_newer_one():
+    es, aggregator = _aggregator()
+    now_ms = int(time.time() * 1000)
+    _interaction(es, "newer", now_ms)
+    assert aggregator.poll() == 1
+
+    # Buffered in another worker and indexed a flush later, with an earlier timestamp
+    _interaction(es, "late", now_ms - 2000)
+    assert aggregator.poll() == 1
+    assert aggregator.poll() == 0
+
+
+def test_poll_reads_every_interaction_sharing_one_millisecond():
+    es, aggregator = _aggregator()
+    now_ms = int(time.time() * 1000)
+    for number in range(25):
+        _interaction(es, f"event_{number}", now_ms)
+
+    assert aggregator.poll(page_size=10) == 25
+    assert aggregator.poll(page_size=10) == 0
+    assert not es._pits
+
+
+def test_poll_forgets_ids_outside_the_lateness_window():
+    es, aggregator = _aggregator()
+    now_ms = int(time.time() * 1000)
+    _interaction(es, "old", now_ms - 120 * 1000)
+    _interaction(es, "recent", now_ms)
+
+    assert aggregator.poll() == 2
+    assert set(aggregator._seen) == {"recent"}
+
+
+def _failing_deletes(es):
+    # Report every delete in a _bulk request as a shard failure without applying it
+    bulk = es.bulk
+
+    def failing_bulk(operations=None, **kwargs):
+        lines = [json.loads(line) for line in operations]
+        kept = [line for line in lines if "delete" not in line]
+        deletes = [line["delete"] for line in lines if "delete" in line]
+        response = bulk(operations=[json.dumps(line) for line in kept], **kwargs) if kept else None
+        items = response.body["items"] if response else []
+        items += [{"delete": {"_index": meta["_index"], "_id": meta["_id"], "status": 503,
+                              "error": {"type": "unavailable_shards_exception", "reason": "unavailable"}}}
+                  for meta in deletes]
+        return ObjectApiResponse(body={"took": 0, "errors": bool(deletes), "items": items}, meta=_meta(200))
+    es.bulk = failing_bulk
+
+
+def test_publish_retries_deletes_that_failed():
+    es, aggregator = _aggregator()
+    now = time.time()
+    aggregator.trends.add("hiking|winter", 1, now)
+    aggregator.publish(now)
+    assert "live:hiking|winter" in es.indices_store[Config.TRENDS_INDEX]
+
+    aggregator.trends = DecayedTopK(Config.TREND_TOP_K, Config.TREND_HALF_LIFE, Config.TREND_SKETCH_WIDTH,
+                                    Config.TREND_SKETCH_DEPTH, now)
+    _failing_deletes(es)
+    aggregator.publish(now)
+    assert aggregator._published_ids == {"live:hiking|winter"}
+
+    del es.bulk
+    aggregator.publish(now)
+    assert aggregator._published_ids == set()
+    assert "live:hiking|winter" not in es.indices_store[Config.TRENDS_INDEX]
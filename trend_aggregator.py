@@ -0,0 +1,204 @@
+import argparse
+import time
+from datetime import datetime, timezone
+from elasticsearch.helpers import bulk
+from config import Config
+from utils.cache import LRUCache
+from utils.destinations import split_activities
+from utils.es_utils import get_elasticsearch
+from utils.sketches import DecayedTopK
+from utils.log import get_logger
+
+logger = get_logger("trend_aggregator")
+
+# Prefix of the trend documents owned by the aggregator, so hand-curated trends are left alone
+PUBLISHED_ID_PREFIX = "live:"
+
+def _to_epoch(timestamp):
+    if isinstance(timestamp, (int, float)):
+        return timestamp / 1000.0
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+
+class TrendAggregator:
+    """
+    Streaming consumer of `user_interactions` that keeps time-decayed popularity
+    counters per activity/season pair and per destination, and periodically
+    publishes the top pairs as a small trend set in the travel trends index.
+
+    Each interaction is read once; state is a fixed-size sketch plus top-k heaps,
+    so memory does not grow with traffic.
+    """
+
+    def __init__(self, es, k=Config.TREND_TOP_K, half_life=Config.TREND_HALF_LIFE,
+                 lateness=Config.TREND_LATENESS_WINDOW, now=None):
+        self.es = es
+        now = now if now is not None else time.time()
+        self.trends = DecayedTopK(k, half_life, Config.TREND_SKETCH_WIDTH, Config.TREND_SKETCH_DEPTH, now)
+        self.destinations = DecayedTopK(k, half_life, Config.TREND_SKETCH_WIDTH, Config.TREND_SKETCH_DEPTH, now)
+        self.lateness = lateness
+        self.watermark_ms = None
+        self._seen = {}  # {_id: timestamp_ms} of interactions consumed inside the lateness window
+        self._destination_cache = LRUCache(max_entries=10000)
+        self._published_ids = set()
+
+    def consume(self, interactions):
+        """
+        Fold a batch of interaction documents into the counters.
+        """
+        attributes = self._destination_attributes({i.get('destination') for i in interactions if i.get('destination')})
+        for interaction in interactions:
+            destination = attributes.get(interaction.get('destination'))
+            if destination is None:
+                continue
+            weight = Config.TREND_INTERACTION_WEIGHTS.get(interaction.get('interaction_type'), 1)
+            timestamp = _to_epoch(interaction['timestamp']) if interaction.get('timestamp') else time.time()
+
+            self.destinations.add(interaction['destination'], weight, timestamp)
+            activities, season = destination
+            for activity in activities:
+                self.trends.add(f"{activity}|{season}", weight, timestamp)
+
+    def poll(self, page_size=1000):
+        """
+        Read interactions indexed since the last poll.
+
+        Buffered writes reach the index up to a flush late and out of timestamp order,
+        so every poll re-reads the last `lateness` seconds before the newest timestamp
+        seen and skips ids already consumed. Pages are read from a point in time with
+        `search_after`, so events sharing one millisecond are never cut off at a page edge.
+        :return: Number of interactions consumed.
+        """
+        if self.watermark_ms is None:
+            since = int((time.time() - Config.TREND_REPLAY_WINDOW) * 1000)
+        else:
+            since = self.watermark_ms - int(self.lateness * 1000)
+
+        consumed, search_after = 0, None
+        pit_id = self.es.open_point_in_time(index="user_interactions", keep_alive="1m")['id']
+        try:
+            while True:
+                body = {
+                    "query": {"range": {"timestamp": {"gte": since, "format": "epoch_millis"}}},
+                    "sort": [{"timestamp": {"order": "asc", "format": "epoch_millis"}}],
+                    "pit": {"id": pit_id, "keep_alive": "1m"},
+                    "size": page_size
+                }
+                if search_after is not None:
+                    body["search_after"] = search_after
+                response = self.es.search(body=body)
+                pit_id = response.get('pit_id', pit_id)
+                hits = response['hits']['hits']
+
+                fresh = [hit for hit in hits if hit['_id'] not in self._seen]
+                if fresh:
+                    self.consume([hit['_source'] for hit in fresh])
+                    consumed += len(fresh)
+                for hit in hits:
+                    timestamp_ms = int(float(hit['sort'][0]))
+                    self._seen[hit['_id']] = timestamp_ms
+                    if self.watermark_ms is None or timestamp_ms > self.watermark_ms:
+                        self.watermark_ms = timestamp_ms
+                if len(hits) < page_size:
+                    break
+                search_after = hits[-1]['sort']
+        finally:
+            self.es.close_point_in_time(id=pit_id)
+
+        if self.watermark_ms is not None:
+            # Ids older than the next poll's window will not be read again
+            horizon = self.watermark_ms - int(self.lateness * 1000)
+            self._seen = {doc_id: ts for doc_id, ts in self._seen.items() if ts >= horizon}
+        return consumed
+
+    def trend_documents(self, now=None):
+        documents = {}
+        for key, count in self.trends.top(now):
+            activity, season = key.split("|", 1)
+            documents[f"{PUBLISHED_ID_PREFIX}{key}"] = {
+                "trend": activity,
+                "season": season,
+                "popularity": max(1, round(count)),
+                "source": "interactions"
+            }
+        return documents
+
+    def publish(self, now=None):
+        """
+        Replace the previously published trend set with the current top pairs.
+        """
+        updated_at = datetime.now(timezone.utc).isoformat()
+        documents = self.trend_documents(now)
+        actions = [
+            {"_index": Config.TRENDS_INDEX, "_id": doc_id, "_source": {**document, "updated_at": updated_at}}
+            for doc_id, document in documents.items()
+        ]
+        actions.extend(
+            {"_op_type": "delete", "_index": Config.TRENDS_INDEX, "_id": doc_id}
+            for doc_id in self._published_ids - documents.keys()
+        )
+        actions.extend(
+            {"_index": "trending_destinations", "_id": destination_id,
+             "_source": {"destination_id": destination_id, "popularity": count, "updated_at": updated_at}}
+            for destination_id, count in self.destinations.top(now)
+        )
+        failed = set()
+        if actions:
+            _, errors = bulk(self.es, actions, raise_on_error=False)
+            for error in errors:
+                (op_type, item), = error.items()
+                if op_type == "delete" and item.get('status') == 404:
+                    continue  # Already gone
+                failed.add((op_type, item['_id']))
+                logger.error("Failed to publish trend", extra={"op_type": op_type, "item": item})
+
+        # Track only what was written: a trend that failed to index is retried on the next
+        # publish, and a dropped one whose delete failed is deleted then
+        retained = {doc_id for doc_id in self._published_ids if doc_id in documents or ("delete", doc_id) in failed}
+        self._published_ids = retained | {doc_id for doc_id in documents if ("index", doc_id) not in failed}
+        logger.info("Published trends", extra={"trends": len(documents), "failed": len(failed)})
+        return documents
+
+    def run(self, poll_interval=Config.TREND_POLL_INTERVAL, publish_interval=Config.TREND_PUBLISH_INTERVAL):
+        next_publish = time.monotonic() + publish_interval
+        while True:
+            try:
+                self.poll()
+                if time.monotonic() >= next_publish:
+                    self.publish()
+                    next_publish = time.monotonic() + publish_interval
+            except Exception:
+                logger.exception("Trend aggregation failed")
+            time.sleep(poll_interval)
+
+    def _destination_attributes(self, destination_ids):
+        attributes, missing = {}, []
+        for destination_id in destination_ids:
+            cached = self._destination_cache.get(destination_id)
+            if cached is None:
+                missing.append(destination_id)
+            else:
+                attributes[destination_id] = cached
+
+        if missing:
+            docs = self.es.mget(index="destinations", ids=missing, source_includes=["activities", "season"])['docs']
+            for document in docs:
+                if document.get('found'):
+                    source = document['_source']
+                    value = (split_activities(source.get('activities')), str(source.get('season', '')).lower())
+                    self._destination_cache.set(document['_id'], value)
+                    attributes[document['_id']] = value
+        return attributes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate user interactions into live travel trends.")
+    parser.add_argument("--poll-interval", type=float, default=Config.TREND_POLL_INTERVAL)
+    parser.add_argument("--publish-interval", type=float, default=Config.TREND_PUBLISH_INTERVAL)
+    parser.add_argument("--once", action="store_true", help="Consume what is there, publish once and exit")
+    args = parser.parse_args()
+
+    aggregator = TrendAggregator(get_elasticsearch())
+    if args.once:
+        aggregator.poll()
+        aggregator.publish()
+    else:
+        aggregator.run(args.poll_interval, args.publish_interval)
@@ -0,0 +1,142 @@
+from config import Config
+from utils.pagination import parse_size
+from utils.responses import parse_fields
+from utils.reviews import format_review_summary
+
+
+def split_activities(activities):
+    """
+    Normalize a destination's `activities` ("museums, dining") into a list of lowercase phrases.
+    """
+    if isinstance(activities, str):
+        activities = activities.split(',')
+    return [activity.strip().lower() for activity in activities or [] if activity.strip()]
+
+
+def parse_destination_ids(raw_ids, limit=Config.DESTINATIONS_BATCH_LIMIT):
+    """
+    Parse the comma separated `ids` parameter of the batch destinations endpoint.
+    :return: Tuple of (ids, error message); ids keep request order without duplicates.
+    """
+    ids = list(dict.fromkeys(i.strip() for i in (raw_ids or '').split(',') if i.strip()))
+    if not ids:
+        return None, "At least one destination ID is required"
+    if len(ids) > limit:
+        return None, f"At most {limit} destination IDs can be requested at once"
+    if not all(i.startswith("destination_") for i in ids):
+        return None, "Invalid destination ID format"
+    return ids, None
+
+
+def parse_destination_request(destination_id, args):
+    """
+    Validate a destination page request.
+    :return: Tuple of (reviews page size, `_source` fields or None).
+    :raises ValueError: If the id, `reviews_size` or `fields` is invalid.
+    """
+    if not destination_id.startswith("destination_"):
+        raise ValueError("Invalid destination ID format")
+    reviews_size = parse_size(args.get('reviews_size'), Config.REVIEWS_PAGE_SIZE, Config.REVIEWS_PAGE_MAX_SIZE)
+    return reviews_size, parse_fields(args.get('fields'))
+
+
+def _destination_doc(destination_id, fields=None):
+    doc = {"_index": "destinations", "_id": destination_id}
+    if fields:
+        doc["_source"] = fields
+    return doc
+
+
+def build_destination_lookup(destination_id, fields=None):
+    """
+    Build the `_mget` docs that fetch a destination, its precomputed similar destinations
+    and its review summary together.
+    :param fields: Optional `_source` includes for the destination.
+    """
+    return [
+        _destination_doc(destination_id, fields),
+        {"_index": Config.SIMILAR_DESTINATIONS_INDEX, "_id": destination_id, "_source": ["similar"]},
+        {"_index": Config.REVIEW_SUMMARIES_INDEX, "_id": destination_id}
+    ]
+
+
+def build_destinations_lookup(destination_ids, fields=None):
+    """
+    Build the `_mget` docs for a batch of destinations followed by their review summaries.
+    """
+    return ([_destination_doc(destination_id, fields) for destination_id in destination_ids]
+            + [{"_index": Config.REVIEW_SUMMARIES_INDEX, "_id": destination_id} for destination_id in destination_ids])
+
+
+def similar_destinations(doc):
+    # Missing documents (or a similarities index that was never built) just mean no suggestions
+    return doc['_source'].get('similar', []) if doc.get('found') else []
+
+
+def build_reviews_query(destination_id, size=Config.REVIEWS_PAGE_SIZE):
+    """
+    Build the search for one capped page of a destination's reviews, most helpful and most recent first.
+    Totals come from the review summary, so hits are not counted.
+    """
+    return {
+        "query": {
+            "bool": {
+                "filter": [{"term": {"destination_id": destination_id}}]  # Match exact destination_id
+            }
+        },
+        "sort": [
+            {"helpful_votes": {"order": "desc", "missing": "_last"}},
+            {"date": {"order": "desc"}},
+            {"id": {"order": "asc"}}
+        ],
+        "_source": {"excludes": ["destination_id"]},
+        "size": size,
+        "track_total_hits": False
+    }
+
+
+def build_reviews_msearch(destination_ids, size=Config.REVIEWS_PAGE_SIZE):
+    """
+    Build one _msearch payload holding a reviews search per destination.
+    """
+    searches = []
+    for destination_id in destination_ids:
+        searches.append({"index": "destination_reviews"})
+        searches.append(build_reviews_query(destination_id, size))
+    return searches
+
+
+def assemble_destination_page(destination_id, docs, reviews_result):
+    """
+    Combine the `_mget` docs (from `build_destination_lookup`) and the reviews search into a destination page.
+    :return: The page, or None when the destination does not exist.
+    """
+    destination_doc, similar_doc, summary_doc = docs
+    if not destination_doc.get('found'):
+        return None
+    return {
+        "destination": destination_doc['_source'],
+        "reviews": [hit['_source'] for hit in reviews_result['hits']['hits']],
+        "review_summary": format_review_summary(summary_doc, destination_id),
+        "similar": similar_destinations(similar_doc)
+    }
+
+
+def assemble_destination_pages(destination_ids, docs, reviews_responses):
+    """
+    Combine `_mget` docs (from `build_destinations_lookup`) and `_msearch` review responses into destination pages.
+    :return: Tuple of (pages in request order, ids that were not found).
+    """
+    pages, not_found = [], []
+    summary_docs = docs[len(destination_ids):]
+    for destination_id, doc, summary_doc, reviews_result in zip(destination_ids, docs, summary_docs,
+                                                                reviews_responses):
+        if not doc.get('found'):
+            not_found.append(destination_id)
+            continue
+        pages.append({
+            "destination": doc['_source'],
+            "reviews": [hit['_source'] for hit in reviews_result.get('hits', {}).get('hits', [])],
+            "review_summary": format_review_summary(summary_doc, destination_id)
+        })
+    return pages, not_found
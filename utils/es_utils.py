@@ -1,29 +1,139 @@
-from elasticsearch import Elasticsearch
+from elasticsearch import Elasticsearch, AsyncElasticsearch, NotFoundError
+import os
+import random
+import threading
 import time
 from config import Config
+from utils.log import get_logger
 
-def wait_for_elasticsearch(max_retries=5, delay=5):
-    retries = 0
-    es = Elasticsearch(
-        Config.get_elasticsearch_url(),
-        basic_auth=(Config.ELASTICSEARCH_USER, Config.ELASTICSEARCH_PASSWORD),
-        verify_certs=Config.ELASTICSEARCH_VERIFY_CERTS
-    )
-    
-    while retries < max_retries:
+logger = get_logger("es_utils")
+
+_client = None
+_client_pid = None
+_client_verified = False
+_client_lock = threading.Lock()
+
+def _client_options(overrides):
+    options = {
+        "basic_auth": (Config.ELASTICSEARCH_USER, Config.ELASTICSEARCH_PASSWORD),
+        "verify_certs": Config.ELASTICSEARCH_VERIFY_CERTS,
+        "connections_per_node": Config.ELASTICSEARCH_POOL_SIZE,
+        "headers": {"Connection": "keep-alive" if Config.ELASTICSEARCH_HTTP_KEEP_ALIVE else "close"},
+        "request_timeout": Config.ELASTICSEARCH_REQUEST_TIMEOUT,
+        "retry_on_timeout": Config.ELASTICSEARCH_RETRY_ON_TIMEOUT,
+        "max_retries": Config.ELASTICSEARCH_MAX_RETRIES,
+        "http_compress": Config.ELASTICSEARCH_HTTP_COMPRESS,
+        "sniff_on_start": Config.ELASTICSEARCH_SNIFF_ON_START,
+        "sniff_on_node_failure": Config.ELASTICSEARCH_SNIFF_ON_NODE_FAILURE,
+        "sniff_timeout": Config.ELASTICSEARCH_SNIFF_TIMEOUT,
+        "min_delay_between_sniffing": Config.ELASTICSEARCH_MIN_DELAY_BETWEEN_SNIFFING
+    }
+    options.update(overrides)
+    return options
+
+def create_elasticsearch_client(**overrides):
+    """
+    Build a new Elasticsearch client from the pool settings in `Config`.
+    Prefer `get_elasticsearch()`, which reuses one client per process.
+    """
+    return Elasticsearch(Config.get_elasticsearch_url(), **_client_options(overrides))
+
+def create_async_elasticsearch_client(**overrides):
+    """
+    Build an AsyncElasticsearch client with the same pool settings as the sync client.
+    It is bound to the event loop it is first used on, so create it once the loop is running.
+    """
+    return AsyncElasticsearch(Config.get_elasticsearch_url(), **_client_options(overrides))
+
+def get_elasticsearch():
+    """
+    Return the process-wide Elasticsearch client, creating it on first use.
+    The client is rebuilt after a fork so pre-forked workers never share sockets.
+    """
+    global _client, _client_pid, _client_verified
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = create_elasticsearch_client()
+                _client_pid = os.getpid()
+                _client_verified = False
+    return _client
+
+def set_elasticsearch(client):
+    """
+    Install `client` as this process's shared client, e.g. an in-memory stand-in for benchmarks.
+    """
+    global _client, _client_pid, _client_verified
+    with _client_lock:
+        _client = client
+        _client_pid = os.getpid()
+        _client_verified = True
+
+def backoff_delays(base=Config.STARTUP_RETRY_BASE_DELAY, cap=Config.STARTUP_RETRY_MAX_DELAY):
+    """
+    Yield exponential backoff delays with full jitter: a uniform draw from [0, min(cap, base * 2^n)].
+    Jitter keeps workers that boot together from reconnecting in lockstep.
+    """
+    attempt = 0
+    while True:
+        yield random.uniform(0, min(cap, base * 2 ** attempt))
+        attempt += 1
+
+def wait_for_elasticsearch(max_retries=Config.STARTUP_MAX_RETRIES):
+    global _client_verified
+    es = get_elasticsearch()
+    if _client_verified:
+        return es
+
+    delays = backoff_delays()
+    for attempt in range(1, max_retries + 1):
         try:
             if es.ping():
-                print("Successfully connected to Elasticsearch")
+                logger.info("Connected to Elasticsearch")
+                _client_verified = True
                 return es
-            else:
-                print(f"Could not connect to Elasticsearch. Attempt {retries + 1}/{max_retries}")
+            logger.warning("Elasticsearch ping failed", extra={"attempt": attempt, "max_retries": max_retries})
         except Exception as e:
-            print(f"Connection attempt {retries + 1} failed: {str(e)}")
-        
-        retries += 1
-        time.sleep(delay)
-    
+            logger.warning("Elasticsearch connection attempt failed", extra={"attempt": attempt, "error": str(e)})
+        if attempt < max_retries:
+            time.sleep(next(delays))
+
     raise ConnectionError("Could not connect to Elasticsearch after maximum retries")
 
+def missing_indices(es, index_names):
+    """
+    Return the names in `index_names` that resolve to neither an index nor an alias.
+    One get-alias request covers every name, instead of an exists call per index.
+    """
+    try:
+        found = es.indices.get_alias(index=",".join(index_names), ignore_unavailable=True)
+    except NotFoundError:
+        return list(index_names)
+    return unresolved_names(found, index_names)
+
+def unresolved_names(aliases_response, index_names):
+    """
+    :param aliases_response: A get-alias response, {index: {"aliases": {alias: {}}}}.
+    :return: The names in `index_names` that are neither an index nor an alias in the response.
+    """
+    names = set(aliases_response)
+    for index in aliases_response.values():
+        names.update(index.get('aliases', {}))
+    return [name for name in index_names if name not in names]
+
 def index_exists(es, index_name):
-    return es.indices.exists(index=index_name)
\ No newline at end of file
+    return es.indices.exists(index=index_name)
+
+def index_generation(es, index_name):
+    """
+    Return a cheap token that changes whenever the documents behind `index_name` change.
+    Built from index stats so it costs a single small request instead of a search.
+    """
+    stats = es.indices.stats(index=index_name, metric="docs,indexing")
+    primaries = stats['_all']['primaries']
+    return "{}:{}:{}:{}".format(
+        ",".join(sorted(stats.get('indices', {}))),
+        primaries['docs']['count'],
+        primaries['indexing']['index_total'],
+        primaries['indexing']['delete_total']
+    )
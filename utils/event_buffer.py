@@ -0,0 +1,123 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from elasticsearch.helpers import bulk
+from config import Config
+from utils.es_utils import get_elasticsearch
+from utils.log import get_logger
+
+logger = get_logger("event_buffer")
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+_WAKE_UP = object()
+
+
+class BulkEventBuffer:
+    """
+    Bounded in-memory buffer of documents written to Elasticsearch in the background.
+
+    A daemon thread flushes through _bulk once `batch_size` events are waiting or
+    `flush_interval` seconds have passed. When `max_pending` events are queued,
+    writers wait up to `put_timeout` seconds and the event is then rejected, so
+    memory stays bounded and callers can push back. Pending events are flushed at
+    interpreter exit.
+    """
+
+    def __init__(self, es, batch_size=Config.EVENT_BUFFER_BATCH_SIZE,
+                 flush_interval=Config.EVENT_BUFFER_FLUSH_INTERVAL,
+                 max_pending=Config.EVENT_BUFFER_MAX_PENDING, put_timeout=Config.EVENT_BUFFER_PUT_TIMEOUT):
+        self.es = es
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.rejected = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-buffer-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, index_name, document, block=True):
+        """
+        Queue a document for indexing, stamping `timestamp` when it is missing.
+        :param block: Wait up to `put_timeout` for room; pass False from event loops.
+        :return: True if the event was accepted, False if the buffer is full or closed.
+        """
+        if self._closed.is_set():
+            return False
+        if document.get('timestamp') in (None, "now"):
+            document = {**document, "timestamp": datetime.now(timezone.utc).isoformat()}
+        try:
+            self._queue.put({"_index": index_name, "_source": document}, block=block, timeout=self.put_timeout)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        return True
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self, timeout=10):
+        """
+        Stop accepting events and flush everything still queued.
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        try:
+            # Wake the flusher if it is waiting on an empty queue; a full queue means it is busy anyway
+            self._queue.put_nowait(_WAKE_UP)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def _run(self):
+        while not (self._closed.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def _next_batch(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._closed.is_set() and self._queue.empty()):
+                break
+            try:
+                event = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if event is _WAKE_UP:
+                continue
+            batch.append(event)
+        return batch
+
+    def _flush(self, batch):
+        try:
+            _, errors = bulk(self.es, batch, raise_on_error=False, raise_on_exception=False)
+            if errors:
+                self.failed += len(errors)
+                logger.error("Failed to index buffered events", extra={"failed": len(errors), "sample": errors[:3]})
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error("Failed to flush buffered events", extra={"events": len(batch), "error": str(e)})
+
+
+def get_event_buffer():
+    """
+    Return the process-wide event buffer, creating it on first use (and again after a fork).
+    """
+    global _buffer, _buffer_pid
+    if _buffer is None or _buffer_pid != os.getpid():
+        with _buffer_lock:
+            if _buffer is None or _buffer_pid != os.getpid():
+                _buffer = BulkEventBuffer(get_elasticsearch())
+                _buffer_pid = os.getpid()
+    return _buffer
@@ -0,0 +1,103 @@
+from config import Config
+from utils.query_builder import build_destination_query
+
+
+def _price_ranges(bounds):
+    # Adjacent bands: [.. b0), [b0 .. b1), ..., [bn ..)
+    edges = [None, *bounds, None]
+    ranges = []
+    for low, high in zip(edges, edges[1:]):
+        bucket = {"key": f"{low or '*'}-{high or '*'}"}
+        if low is not None:
+            bucket["from"] = low
+        if high is not None:
+            bucket["to"] = high
+        ranges.append(bucket)
+    return ranges
+
+
+# Facets /search can count; each one matches the filter clause of the same name
+FACET_AGGREGATIONS = {
+    "type": {"terms": {"field": "type", "size": Config.FACET_TERMS_SIZE}},
+    "season": {"terms": {"field": "season", "size": Config.FACET_TERMS_SIZE}},
+    "rating": {"terms": {"field": "rating", "size": Config.FACET_TERMS_SIZE, "order": {"_key": "desc"}}},
+    "timezone": {"terms": {"field": "timezone", "size": Config.FACET_TERMS_SIZE}},
+    "price": {"range": {"field": "price", "ranges": _price_ranges(Config.FACET_PRICE_BOUNDS)}}
+}
+
+
+def parse_facets(raw_facets):
+    """
+    Parse the `facets` request parameter: "true" for every facet or a comma separated list of names.
+    :return: List of facet names, or None when no facets were requested.
+    :raises ValueError: If an unknown facet is named.
+    """
+    raw_facets = (raw_facets or '').strip().lower()
+    if raw_facets in ('', 'false', '0'):
+        return None
+    if raw_facets in ('true', '1', 'all'):
+        return list(FACET_AGGREGATIONS)
+    names = list(dict.fromkeys(name.strip() for name in raw_facets.split(',') if name.strip()))
+    unknown = [name for name in names if name not in FACET_AGGREGATIONS]
+    if unknown:
+        raise ValueError(f"Unknown facets: {', '.join(unknown)}")
+    return names
+
+
+def build_facets_body(query, filter_clauses, facets):
+    """
+    Build a hits-free (size 0) aggregation request for the requested facets.
+
+    Each facet is counted under every filter except its own, so the counts show
+    what picking another value would return instead of only the current selection.
+    :param query: Free-text query string, or None for all destinations.
+    :param filter_clauses: Dict of facet name to the filter clause currently applied.
+    :param facets: Facet names to count.
+    """
+    aggregations = {}
+    for name in facets:
+        others = [clause for other, clause in filter_clauses.items() if other != name]
+        aggregations[name] = {
+            "filter": {"bool": {"filter": others}},
+            "aggs": {"values": FACET_AGGREGATIONS[name]}
+        }
+    return {"size": 0, "query": build_destination_query(query, []), "aggs": aggregations}
+
+
+def build_search_msearch(search_body, facets_body, index="destinations"):
+    """
+    Pair a hits search with its facet counts in one _msearch round-trip.
+
+    Only the aggregation request opts into the shard request cache: it has
+    size 0, so repeated queries are answered from cache whatever the page.
+    """
+    return [
+        {"index": index},
+        search_body,
+        {"index": index, "request_cache": True},
+        facets_body
+    ]
+
+
+def split_search_responses(responses):
+    """
+    Unpack the `build_search_msearch` responses.
+    :return: Tuple of (search response, facet counts); failed facets come back empty rather than failing the search.
+    """
+    search_response, facets_response = responses
+    if 'error' in search_response:
+        raise RuntimeError(f"Search failed: {search_response['error']}")
+    return search_response, parse_facet_counts(facets_response) if 'error' not in facets_response else {}
+
+
+def parse_facet_counts(response):
+    """
+    :return: Dict of facet name to a list of {"value", "count"} buckets.
+    """
+    facets = {}
+    for name, aggregation in response.get('aggregations', {}).items():
+        facets[name] = [
+            {"value": bucket.get('key_as_string', bucket['key']), "count": bucket['doc_count']}
+            for bucket in aggregation['values']['buckets']
+        ]
+    return facets
@@ -0,0 +1,103 @@
+import math
+import re
+from config import Config
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+
+_DISTANCE = re.compile(r"^(\d+(?:\.\d+)?)\s*(km|m|mi)?$")
+_GEOHASH = re.compile(f"^[{GEOHASH_ALPHABET}]+$")
+
+
+def encode_geohash(lat, lon, precision=Config.GEOHASH_PRECISION):
+    """
+    Encode a coordinate as a geohash of `precision` characters.
+    Nearby points share a prefix, so each hash names a cell that cached regional listings can key on.
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, bit_count, even = [], 0, 0, True
+    while len(geohash) < precision:
+        # Bits alternate between longitude and latitude, starting with longitude
+        value, bounds = (lon, lon_range) if even else (lat, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(geohash)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def location_fields(lat, lon, precision=Config.GEOHASH_PRECISION):
+    """
+    :return: The `location` geo_point and precomputed `geohash` bucket stored on a destination.
+    """
+    return {"location": {"lat": lat, "lon": lon}, "geohash": encode_geohash(lat, lon, precision)}
+
+
+def add_location(documents):
+    """
+    Yield destinations with `location` and `geohash` filled in from their `latitude`/`longitude`.
+    Documents without coordinates pass through unchanged.
+    """
+    for document in documents:
+        lat, lon = document.get('latitude'), document.get('longitude')
+        if lat is not None and lon is not None:
+            lat, lon = float(lat), float(lon)
+            if not (math.isnan(lat) or math.isnan(lon)):
+                document = {**document, **location_fields(lat, lon)}
+        yield document
+
+
+def parse_origin(filters):
+    """
+    Parse the `lat`/`lon` search parameters.
+    :return: Tuple of (lat, lon), or None when neither is set.
+    :raises ValueError: If only one is set or either is out of range.
+    """
+    lat, lon = filters.get('lat'), filters.get('lon')
+    if lat in (None, '') and lon in (None, ''):
+        return None
+    if lat in (None, '') or lon in (None, ''):
+        raise ValueError("lat and lon must be given together")
+    try:
+        lat, lon = float(lat), float(lon)
+    except ValueError:
+        raise ValueError("lat and lon must be numbers") from None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("lat must be within [-90, 90] and lon within [-180, 180]")
+    return lat, lon
+
+
+def parse_distance(raw_distance):
+    """
+    Normalize a radius such as "25", "25km", "500m" or "10mi" into an Elasticsearch distance string.
+    Plain numbers are kilometres.
+    :raises ValueError: If the value is not a positive distance.
+    """
+    match = _DISTANCE.match(str(raw_distance).strip().lower())
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError("radius must be a positive distance such as 25km, 500m or 10mi")
+    return f"{match.group(1)}{match.group(2) or 'km'}"
+
+
+def parse_region(raw_region):
+    """
+    Validate a geohash region; prefixes shorter than `GEOHASH_PRECISION` select larger areas.
+    """
+    region = raw_region.strip().lower()
+    if not _GEOHASH.match(region) or len(region) > Config.GEOHASH_PRECISION:
+        raise ValueError(f"region must be a geohash of at most {Config.GEOHASH_PRECISION} characters")
+    return region
@@ -0,0 +1,143 @@
+import bisect
+import random
+import threading
+import time
+from contextlib import contextmanager
+from config import Config
+from utils.log import get_logger
+
+logger = get_logger("metrics")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 500, 1000)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with one set of cumulative buckets per label combination.
+    """
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._series[key] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in sorted(self._series.items())]
+        for key, counts, total in series:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                bucket_labels = ",".join(labels + ['le="%s"' % bound])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f'{{{",".join(labels)}}}' if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """
+    Process-local set of metrics. With several worker processes each one reports
+    its own series, so scrape every worker (or run a single one per port).
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, documentation, labels, buckets)
+            return self._metrics[name]
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time spent serving a request.", ("route", "method", "status"))
+RESPONSE_SIZE = REGISTRY.histogram(
+    "http_response_size_bytes", "Size of response bodies.", ("route",), SIZE_BUCKETS)
+ES_LATENCY = REGISTRY.histogram(
+    "elasticsearch_request_duration_seconds", "Time spent in Elasticsearch calls, by operation.", ("operation",))
+ES_HITS = REGISTRY.histogram(
+    "elasticsearch_hits", "Hits returned per Elasticsearch search, by operation.", ("operation",), COUNT_BUCKETS)
+
+
+def record_request(route, method, status, seconds, size=None):
+    REQUEST_LATENCY.observe(seconds, route=route, method=method, status=status)
+    if size is not None:
+        RESPONSE_SIZE.observe(size, route=route)
+
+
+@contextmanager
+def es_timer(operation):
+    """
+    Time the Elasticsearch call(s) in the block; works around `await` too.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ES_LATENCY.observe(time.perf_counter() - started, operation=operation)
+
+
+def record_hits(operation, response):
+    ES_HITS.observe(len(response.get('hits', {}).get('hits', [])), operation=operation)
+    return response
+
+
+def attach_profile(body):
+    """
+    Opt a sampled search into Elasticsearch's query profiler.
+    :return: True if `profile` was set on `body`.
+    """
+    if Config.ES_PROFILE_ENABLED and random.random() < Config.ES_PROFILE_SAMPLE_RATE:
+        body["profile"] = True
+        return True
+    return False
+
+
+def log_profile(operation, response):
+    """
+    Log a per-shard summary of a profiled search: query and collector time plus the slowest queries.
+    """
+    shards = []
+    for shard in response.get('profile', {}).get('shards', []):
+        for search in shard.get('searches', []):
+            queries = sorted(search.get('query', []), key=lambda query: query['time_in_nanos'], reverse=True)
+            shards.append({
+                "shard": shard.get('id'),
+                "query_nanos": sum(query['time_in_nanos'] for query in queries),
+                "collector_nanos": sum(collector['time_in_nanos'] for collector in search.get('collector', [])),
+                "slowest": [
+                    {"type": query['type'], "description": query['description'][:200], "nanos": query['time_in_nanos']}
+                    for query in queries[:3]
+                ]
+            })
+    logger.info("Elasticsearch profile", extra={"operation": operation, "took": response.get('took'), "shards": shards})
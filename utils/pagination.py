@@ -0,0 +1,48 @@
+import base64
+import json
+from config import Config
+
+
+def parse_size(raw_size, default=Config.SEARCH_DEFAULT_SIZE, cap=Config.SEARCH_MAX_SIZE):
+    """
+    Parse a `size` request parameter, clamping it to the server-side cap.
+    :raises ValueError: If the value is not a positive integer.
+    """
+    if raw_size in (None, ''):
+        return default
+    try:
+        size = int(raw_size)
+    except (TypeError, ValueError):
+        size = 0
+    if size < 1:
+        raise ValueError("size must be a positive integer")
+    return min(size, cap)
+
+
+def encode_cursor(sort_values):
+    return base64.urlsafe_b64encode(json.dumps(sort_values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode an opaque cursor back into `search_after` sort values.
+    :raises ValueError: If the cursor was not produced by `encode_cursor`.
+    """
+    if not cursor:
+        return None
+    try:
+        sort_values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(sort_values, list):
+        raise ValueError("Invalid cursor")
+    return sort_values
+
+
+def next_cursor(hits, size):
+    """
+    Return the cursor for the page after `hits`, or None when this was the last page.
+    """
+    if len(hits) < size or not hits[-1].get('sort'):
+        return None
+    return encode_cursor(hits[-1]['sort'])
@@ -0,0 +1,55 @@
+import heapq
+import itertools
+
+
+class PrefixTrie:
+    """
+    Character trie that keeps the `k` best completions on every node, so a lookup
+    costs one step per prefix character and never walks the subtree.
+
+    Only the first `max_depth` characters of a term get nodes: deep prefixes are
+    rare and cheap for Elasticsearch, while short ones are hot and match the most terms.
+    """
+
+    def __init__(self, k=10, max_depth=3):
+        self.k = k
+        self.max_depth = max_depth
+        self._root = ({}, [])
+        self._sequence = itertools.count()
+
+    def insert(self, term, value, weight=0):
+        key = self.normalize(term)
+        # The sequence number keeps heap comparisons away from `value` on ties
+        entry = (weight, key, next(self._sequence), value)
+        node = self._root
+        self._offer(node[1], entry)
+        for char in key[:self.max_depth]:
+            node = node[0].setdefault(char, ({}, []))
+            self._offer(node[1], entry)
+
+    def complete(self, prefix, limit=None):
+        """
+        :return: Values of the best completions for `prefix`, heaviest first, or None if
+                 the prefix is longer than the trie is deep.
+        """
+        key = self.normalize(prefix)
+        if len(key) > self.max_depth:
+            return None
+        node = self._root
+        for char in key:
+            node = node[0].get(char)
+            if node is None:
+                return []
+        best = sorted(node[1], key=lambda entry: (-entry[0], entry[1], entry[2]))
+        return [entry[3] for entry in best[:limit or self.k]]
+
+    def _offer(self, best, entry):
+        # Min-heap of the k heaviest entries that share this node's prefix
+        if len(best) < self.k:
+            heapq.heappush(best, entry)
+        elif entry[0] > best[0][0]:
+            heapq.heapreplace(best, entry)
+
+    @staticmethod
+    def normalize(term):
+        return " ".join(str(term).lower().split())
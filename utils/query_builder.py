@@ -0,0 +1,236 @@
+from collections import defaultdict
+from config import Config
+from utils.geo import parse_origin, parse_distance, parse_region
+
+DESTINATION_TIEBREAKER = "id"
+
+
+def trend_weights(trends, max_values=Config.TRENDS_MAX_CLAUSES):
+    """
+    Aggregate travel trend documents into a boost per distinct season and activity.
+    :param trends: List of trend `_source` dicts with `trend`, `season` and `popularity`.
+    :param max_values: Upper bound on the number of values returned; the most popular values win.
+    :return: Tuple of ({season: boost}, {activity: boost}), most popular first.
+    """
+    activity_popularity = defaultdict(int)
+    season_popularity = defaultdict(int)
+    for trend in trends:
+        popularity = trend.get('popularity') or 1
+        if trend.get('trend'):
+            activity_popularity[trend['trend']] += popularity
+        if trend.get('season'):
+            season_popularity[trend['season']] += popularity
+
+    # Seasons are few and keyword-mapped, so they are always kept
+    season_boosts = _boosts(season_popularity)
+    activity_boosts = _boosts(activity_popularity, max(max_values - len(season_boosts), 0))
+    return season_boosts, activity_boosts
+
+
+def build_trend_clauses(trends, max_clauses=Config.TRENDS_MAX_CLAUSES):
+    """
+    Collapse travel trend documents into one boosted clause per distinct value.
+    :param trends: List of trend `_source` dicts with `trend`, `season` and `popularity`.
+    :param max_clauses: Upper bound on the number of clauses returned; the most popular values win.
+    :return: List of query clauses boosted by relative popularity.
+    """
+    season_boosts, activity_boosts = trend_weights(trends, max_clauses)
+    clauses = [
+        {"term": {"season": {"value": season, "boost": boost}}}
+        for season, boost in season_boosts.items()
+    ]
+    clauses.extend(
+        {"match": {"activities": {"query": activity, "boost": boost}}}
+        for activity, boost in activity_boosts.items()
+    )
+    return clauses
+
+
+def build_recommendation_query(preferences, max_price, trend_clauses=(), size=Config.RECOMMENDATION_SIZE):
+    """
+    Build the personalized destinations query for one user.
+    :param preferences: The user's `preferences` from their profile.
+    :param max_price: Upper price bound derived from the user's budget range.
+    :param trend_clauses: Precompiled clauses from `build_trend_clauses`, shared between requests.
+    :param size: Number of destinations to return.
+    :return: Elasticsearch request body.
+    """
+    should_conditions = []
+
+    for activity in _distinct(preferences.get('activities', [])):
+        should_conditions.append({"match": {"activities": activity}})
+
+    should_conditions.append({
+        "range": {
+            "price": {
+                "gte": 0,
+                "lte": max_price
+            }
+        }
+    })
+
+    for season in _distinct(preferences.get('preferred_seasons', [])):
+        should_conditions.append({"term": {"season": season}})
+
+    should_conditions.extend(trend_clauses)
+
+    return {
+        "query": {
+            "bool": {
+                "should": should_conditions,
+                "minimum_should_match": 1
+            }
+        },
+        "sort": [
+            {"rating": {"order": "desc"}}
+        ],
+        "size": size,
+        # Matches the index sort, so shards can stop collecting once the top hits are known
+        "track_total_hits": False
+    }
+
+
+def build_filter_clauses(filters):
+    """
+    Translate destination filter parameters into non-scoring filter-context clauses.
+
+    Exact constraints use `term`/`range` on the keyword and numeric fields, so
+    Elasticsearch can serve repeated combinations from its filter cache.
+    :param filters: Dict with optional `type`, `season`, `timezone`, `minPrice`, `maxPrice`,
+                    `rating` (exact), `minRating`, `activities`, `lat`/`lon`/`radius` and `region` values.
+    :return: Dict of facet name (`type`, `season`, `timezone`, `price`, `rating`, `activities`,
+             `location`, `region`) to clause, for the filters that are set.
+    :raises ValueError: If a numeric or geo parameter is malformed.
+    """
+    clauses = {}
+    for field in ('type', 'season', 'timezone'):
+        if filters.get(field):
+            # Keyword fields share the lowercase normalizer, which term queries apply too
+            clauses[field] = {"term": {field: filters[field]}}
+
+    price = {}
+    if filters.get('minPrice') not in (None, ''):
+        price['gte'] = _number(filters, 'minPrice')
+    if filters.get('maxPrice') not in (None, ''):
+        price['lte'] = _number(filters, 'maxPrice')
+    if price:
+        clauses['price'] = {"range": {"price": price}}
+
+    if filters.get('rating') not in (None, ''):
+        clauses['rating'] = {"term": {"rating": _number(filters, 'rating', int)}}  # Exact match for numeric rating
+    elif filters.get('minRating') not in (None, ''):
+        clauses['rating'] = {"range": {"rating": {"gte": _number(filters, 'minRating')}}}
+
+    if filters.get('activities'):
+        # Activities are stored as one comma separated phrase, so match analyzed tokens (still unscored here)
+        clauses['activities'] = {"match": {"activities": filters['activities']}}
+
+    origin = parse_origin(filters)
+    if origin:
+        clauses['location'] = {"geo_distance": {
+            "distance": parse_distance(filters.get('radius') or Config.GEO_DEFAULT_RADIUS),
+            "location": {"lat": origin[0], "lon": origin[1]}
+        }}
+    elif filters.get('radius'):
+        raise ValueError("radius requires lat and lon")
+    if filters.get('region'):
+        # Stored geohashes are GEOHASH_PRECISION long, so a shorter region matches every cell inside it
+        clauses['region'] = {"prefix": {"geohash": parse_region(filters['region'])}}
+    return clauses
+
+
+def build_distance_sort(origin):
+    """
+    Sort clause ordering destinations by distance from `origin`; the sort value is the distance in km.
+    """
+    return {"_geo_distance": {
+        "location": {"lat": origin[0], "lon": origin[1]},
+        "order": "asc",
+        "unit": "km"
+    }}
+
+
+def build_text_query(query):
+    return {
+        "multi_match": {
+            "query": query,
+            "fields": [
+                "destination^3",
+                "type^2",
+                "activities",
+                "season"
+            ],
+            "fuzziness": "AUTO",
+            "operator": "or"
+        }
+    }
+
+
+def build_destination_query(query, filter_clauses):
+    """
+    Combine the scored free-text part (if any) with filter-context clauses.
+    :param query: Free-text query string, or None to match on filters alone.
+    :param filter_clauses: Iterable of clauses from `build_filter_clauses`.
+    """
+    return {
+        "bool": {
+            "must": [build_text_query(query)] if query else [],
+            "filter": list(filter_clauses)
+        }
+    }
+
+
+def build_search_body(query, filters, sort="price", size=Config.SEARCH_DEFAULT_SIZE, search_after=None,
+                      source=Config.DESTINATION_LIST_FIELDS):
+    """
+    Build the /search request body: fuzzy free-text matching plus the optional filters.
+    :param query: Free-text query string.
+    :param filters: Filter parameters accepted by `build_filter_clauses`.
+    :param sort: Field to sort ascending on before relevance, or "distance" to sort nearest
+                 first from the `lat`/`lon` filters.
+    :param size: Number of hits per page.
+    :param search_after: Sort values of the last hit of the previous page.
+    :param source: `_source` fields to return.
+    :return: Elasticsearch request body.
+    :raises ValueError: If a filter is malformed, or sorting by distance without `lat`/`lon`.
+    """
+    if sort == "distance":
+        origin = parse_origin(filters)
+        if origin is None:
+            raise ValueError("sort=distance requires lat and lon")
+        primary_sort = build_distance_sort(origin)
+    else:
+        primary_sort = {sort: {"order": "asc"}}  # Sort dynamically based on user input
+    body = {
+        "query": build_destination_query(query, build_filter_clauses(filters).values()),
+        "sort": [
+            primary_sort,
+            "_score",
+            {DESTINATION_TIEBREAKER: {"order": "asc"}}  # Unique tiebreaker keeps search_after pages stable
+        ],
+        "size": size,
+        "_source": source
+    }
+    if search_after:
+        body["search_after"] = search_after
+    return body
+
+
+def _number(filters, name, cast=float):
+    try:
+        return cast(filters[name])
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be {'an integer' if cast is int else 'a number'}") from None
+
+
+def _boosts(popularity, limit=None):
+    ranked = sorted(popularity.items(), key=lambda item: item[1], reverse=True)[:limit]
+    if not ranked:
+        return {}
+    top = ranked[0][1] or 1
+    # Boosts fall in (1, 2] so trends nudge, rather than dominate, the user's own preferences
+    return {value: round(1 + count / top, 3) for value, count in ranked}
+
+
+def _distinct(values):
+    return list(dict.fromkeys(values))
@@ -0,0 +1,96 @@
+import threading
+import time
+from config import Config
+from utils.es_utils import backoff_delays, missing_indices
+from utils.log import get_logger
+
+logger = get_logger("readiness")
+
+
+class ReadinessProbe:
+    """
+    Background check that Elasticsearch answers and the required indices exist.
+
+    Workers start serving straight away; a daemon thread retries the check with
+    jittered exponential backoff until it passes, runs the `warmups` once, then
+    re-checks every `check_interval` seconds. `/readyz` reports `status()` so a
+    load balancer only routes to workers that are ready.
+    """
+
+    def __init__(self, es, required_indices=Config.REQUIRED_INDICES, check_interval=Config.READINESS_CHECK_INTERVAL,
+                 warmups=()):
+        self.es = es
+        self.required_indices = list(required_indices)
+        self.check_interval = check_interval
+        self.warmups = list(warmups)
+        self._state = {"ready": False, "elasticsearch": "unknown", "missing_indices": [], "checked_at": None}
+        self._warmed = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self._state["ready"]
+
+    def status(self):
+        self.start()
+        return dict(self._state)
+
+    def check(self):
+        """
+        Run one check (a ping plus one batched index lookup) and update the state.
+        :return: True when Elasticsearch is reachable, every required index exists and warmups ran.
+        """
+        state = {"ready": False, "elasticsearch": "ok", "missing_indices": [], "checked_at": time.time()}
+        try:
+            if not self.es.ping():
+                state["elasticsearch"] = "unreachable"
+            else:
+                state["missing_indices"] = missing_indices(self.es, self.required_indices)
+                state["ready"] = not state["missing_indices"]
+        except Exception as e:
+            state["elasticsearch"] = str(e)
+
+        if state["ready"] and not self._warmed:
+            for warmup in self.warmups:
+                try:
+                    warmup()
+                except Exception as e:
+                    logger.warning("Readiness warmup failed", extra={"warmup": getattr(warmup, '__name__', repr(warmup)),
+                                                                     "error": str(e)})
+                    state["ready"] = False
+            self._warmed = state["ready"]
+
+        if state["ready"] != self._state["ready"]:
+            logger.info("Readiness changed", extra={"ready": state["ready"], "elasticsearch": state["elasticsearch"],
+                                                    "missing_indices": state["missing_indices"]})
+        self._state = state
+        return state["ready"]
+
+    def start(self):
+        """
+        Start the checker thread if it is not running, e.g. in a worker forked after import.
+        """
+        if self._stop.is_set():
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="readiness-probe", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        delays = backoff_delays()
+        while True:
+            if self.check():
+                delays = backoff_delays()
+                wait = self.check_interval
+            else:
+                wait = next(delays)
+            if self._stop.wait(wait):
+                return
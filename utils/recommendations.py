@@ -0,0 +1,60 @@
+from config import Config
+from utils.responses import parse_fields
+
+
+def parse_recommendations_request(args):
+    """
+    Parse the /recommendations query arguments.
+    :return: Tuple of (user id, `_source` fields or None).
+    :raises ValueError: If the user id is missing or `fields` is invalid.
+    """
+    user_id = args.get("user_id")
+    if not user_id:
+        raise ValueError("User ID is required")
+    return user_id, parse_fields(args.get('fields'))
+
+
+def parse_batch_user_ids(data, limit=Config.RECOMMENDATIONS_BATCH_LIMIT):
+    """
+    Parse the `user_ids` of a batch recommendations request body.
+    :return: User ids in request order without duplicates.
+    :raises ValueError: If none or more than `limit` are given.
+    """
+    user_ids = list(dict.fromkeys(str(user_id) for user_id in (data or {}).get('user_ids') or []))
+    if not user_ids:
+        raise ValueError("User IDs are required")
+    if len(user_ids) > limit:
+        raise ValueError(f"At most {limit} users can be requested at once")
+    return user_ids
+
+
+def parse_saved_recommendation(data):
+    """
+    :return: The `user_recommendations` event for a /save-recommendation request body.
+    :raises ValueError: If the user id or the recommendation is missing.
+    """
+    user_id = (data or {}).get('user_id')
+    recommendation = (data or {}).get('recommendation')
+    if not user_id or not recommendation:
+        raise ValueError("User ID and recommendation are required")
+    return {
+        "user_id": user_id,
+        "recommendation": recommendation
+    }
+
+
+def parse_profile(data):
+    """
+    Validate the body of a profile update.
+    :raises ValueError: If it has no `preferences` object.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('preferences'), dict):
+        raise ValueError("Profile preferences are required")
+    return data
+
+
+def recommendation_results(response):
+    """
+    :return: The destinations of a recommendations search response.
+    """
+    return [hit['_source'] for hit in response['hits']['hits']]
@@ -0,0 +1,143 @@
+import json
+import re
+import zlib
+from config import Config
+
+try:
+    import orjson  # Optional: several times faster than the standard library encoder
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # Optional: only needed to answer `Accept-Encoding: br`
+except ImportError:
+    brotli = None
+
+_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+
+
+def dumps(payload):
+    """
+    Serialize `payload` to compact JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def parse_fields(raw_fields, limit=Config.FIELDS_MAX):
+    """
+    Parse a comma separated `fields` request parameter into `_source` includes.
+    :return: List of field names, or None when no projection was requested.
+    :raises ValueError: If a name is malformed or too many fields are requested.
+    """
+    fields = list(dict.fromkeys(f.strip() for f in (raw_fields or '').split(',') if f.strip()))
+    if not fields:
+        return None
+    invalid = [field for field in fields if not _FIELD.match(field)]
+    if invalid:
+        raise ValueError(f"Invalid field names: {', '.join(invalid)}")
+    if len(fields) > limit:
+        raise ValueError(f"At most {limit} fields can be requested")
+    return fields
+
+
+def project(document, fields):
+    """
+    Apply a `fields` projection in-process, for results that did not come from a search.
+    """
+    if not fields:
+        return document
+    return {field: document[field] for field in fields if field in document}
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick the best content coding the client accepts: brotli when available, then gzip.
+    :param accept_encoding: Raw `Accept-Encoding` header value.
+    :return: "br", "gzip" or None for an uncompressed response.
+    """
+    accepted = {}
+    for part in (accept_encoding or '').lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding] = quality
+
+    def acceptable(coding):
+        return accepted.get(coding, accepted.get('*', 0.0)) > 0
+
+    if brotli is not None and acceptable('br'):
+        return 'br'
+    if acceptable('gzip'):
+        return 'gzip'
+    return None
+
+
+def _compressor(encoding):
+    if encoding == 'br':
+        return brotli.Compressor(quality=Config.RESPONSE_BROTLI_QUALITY)
+    # wbits=31 writes a gzip header and trailer
+    return zlib.compressobj(Config.RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+def compress(body, encoding):
+    compressor = _compressor(encoding)
+    if encoding == 'br':
+        return compressor.process(body) + compressor.finish()
+    return compressor.compress(body) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    compressor = _compressor(encoding)
+    for chunk in chunks:
+        data = compressor.process(chunk) if encoding == 'br' else compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish() if encoding == 'br' else compressor.flush()
+
+
+def stream_json(payload, chunk_items=Config.RESPONSE_STREAM_CHUNK_ITEMS):
+    """
+    Encode a list or dict as JSON in chunks of `chunk_items` entries, so large payloads are never held as one string.
+    """
+    is_dict = isinstance(payload, dict)
+    items = list(payload.items()) if is_dict else payload
+    yield b"{" if is_dict else b"["
+    for start in range(0, len(items), chunk_items):
+        chunk = items[start:start + chunk_items]
+        # Each slice encodes as "[...]" or "{...}"; dropping the brackets leaves comma separated entries
+        yield (b"," if start else b"") + dumps(dict(chunk) if is_dict else chunk)[1:-1]
+    yield b"}" if is_dict else b"]"
+
+
+def build_json_response(response_class, payload, accept_encoding, status=200, headers=None):
+    """
+    Build a compressed JSON response for Flask or Quart.
+    :param response_class: The app's response class.
+    :param payload: JSON-serializable value, or bytes that are already encoded.
+    :param accept_encoding: Raw `Accept-Encoding` header of the request.
+    :return: Response; lists and dicts of at least `RESPONSE_STREAM_MIN_ITEMS` entries are
+        streamed with chunked transfer encoding.
+    """
+    headers = dict(headers or {})
+    headers['Vary'] = 'Accept-Encoding'
+    encoding = negotiate_encoding(accept_encoding)
+
+    if isinstance(payload, (list, dict)) and len(payload) >= Config.RESPONSE_STREAM_MIN_ITEMS:
+        body = stream_json(payload)
+        if encoding:
+            body = compress_stream(body, encoding)
+            headers['Content-Encoding'] = encoding
+        return response_class(body, status=status, headers=headers, mimetype='application/json')
+
+    body = payload if isinstance(payload, bytes) else dumps(payload)
+    if encoding and len(body) >= Config.RESPONSE_COMPRESSION_MIN_BYTES:
+        body = compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+    return response_class(body, status=status, headers=headers, mimetype='application/json')
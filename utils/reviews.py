@@ -0,0 +1,96 @@
+from config import Config
+
+RATING_BUCKETS = ("1", "2", "3", "4", "5")
+
+# Adds a batch delta (built by `summary_delta`) to a stored summary
+SUMMARY_UPDATE_SCRIPT = """
+ctx._source.count += params.delta.count;
+ctx._source.rated_count += params.delta.rated_count;
+ctx._source.rating_sum += params.delta.rating_sum;
+for (entry in params.delta.rating_histogram.entrySet()) {
+    def current = ctx._source.rating_histogram.get(entry.getKey());
+    ctx._source.rating_histogram.put(entry.getKey(), (current == null ? 0 : current) + entry.getValue());
+}
+if (params.delta.latest_date != null
+        && (ctx._source.latest_date == null || params.delta.latest_date.compareTo(ctx._source.latest_date) > 0)) {
+    ctx._source.latest_date = params.delta.latest_date;
+}
+"""
+
+
+def split_reviews(documents):
+    """
+    Yield one document per review. Legacy documents that embed a `reviews` array
+    (as in review_dataset.json) are split, each review keyed `<document id>_<position>`.
+    """
+    for document in documents:
+        if 'reviews' not in document:
+            yield document
+            continue
+        for position, review in enumerate(document['reviews']):
+            yield {
+                **review,
+                "id": review.get('id', f"{document['id']}_{position}"),
+                "destination_id": document['destination_id']
+            }
+
+
+def empty_summary(destination_id):
+    return {
+        "destination_id": destination_id,
+        "count": 0,
+        "rated_count": 0,
+        "rating_sum": 0.0,
+        "rating_histogram": {bucket: 0 for bucket in RATING_BUCKETS},
+        "latest_date": None
+    }
+
+
+def rating_bucket(rating):
+    if rating is None:
+        return None
+    return str(min(5, max(1, int(round(float(rating))))))
+
+
+def summary_delta(destination_id, reviews):
+    """
+    Summarize a batch of new reviews of one destination, in the stored summary's shape.
+    """
+    delta = empty_summary(destination_id)
+    for review in reviews:
+        delta["count"] += 1
+        bucket = rating_bucket(review.get('rating'))
+        if bucket is not None:
+            delta["rated_count"] += 1
+            delta["rating_sum"] += float(review['rating'])
+            delta["rating_histogram"][bucket] += 1
+        date = review.get('date')
+        # yyyy-MM-dd strings order chronologically
+        if date and (delta["latest_date"] is None or date > delta["latest_date"]):
+            delta["latest_date"] = date
+    return delta
+
+
+def build_summary_update(delta, index_name=Config.REVIEW_SUMMARIES_INDEX):
+    """
+    Build a bulk update action that adds `delta` to the destination's summary, creating it when missing.
+    """
+    return {
+        "_op_type": "update",
+        "_index": index_name,
+        "_id": delta["destination_id"],
+        "script": {"source": SUMMARY_UPDATE_SCRIPT, "params": {"delta": delta}},
+        "upsert": delta,
+        "retry_on_conflict": 5
+    }
+
+
+def format_review_summary(doc, destination_id):
+    # A destination without reviews has no summary document yet
+    summary = doc['_source'] if doc.get('found') else empty_summary(destination_id)
+    return {
+        "count": summary["count"],
+        "average_rating": round(summary["rating_sum"] / summary["rated_count"], 2) if summary["rated_count"] else None,
+        "rating_histogram": summary["rating_histogram"],
+        "latest_date": summary["latest_date"]
+    }
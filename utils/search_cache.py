@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+import time
+from config import Config
+from utils.cache import LRUCache, RedisCache
+from utils.es_utils import index_generation
+from utils.log import get_logger
+
+logger = get_logger("search_cache")
+
+# Filters that change the result set; everything else in the request is ignored
+CACHE_KEY_FILTERS = ['type', 'season', 'maxPrice', 'rating', 'timezone', 'lat', 'lon', 'radius', 'region']
+
+
+class SearchCache:
+    """
+    Response cache for /search keyed on the normalized query, filters and sort.
+
+    Keys embed the generation of the destinations index, which a daemon thread
+    polls every `generation_check_interval` seconds, so a reindex invalidates
+    every entry without readers ever calling Elasticsearch.
+    """
+
+    def __init__(self, es, backend, index_name="destinations",
+                 generation_check_interval=Config.SEARCH_CACHE_GENERATION_CHECK_INTERVAL):
+        self.es = es
+        self.backend = backend
+        self.index_name = index_name
+        self.generation_check_interval = generation_check_interval
+        self.generation = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def make_key(self, query, filters, sort, size=None, cursor=None, facets=None, fields=None):
+        """
+        Return the cache key for a search, or None while the index generation is unknown.
+        """
+        generation = self._current_generation()
+        if generation is None:
+            return None
+        normalized = {
+            "q": " ".join(query.lower().split()),
+            "filters": {name: str(filters[name]).strip() for name in CACHE_KEY_FILTERS if filters.get(name)},
+            "sort": sort,
+            "size": size,
+            "cursor": cursor,
+            "facets": sorted(facets) if facets else None,
+            "fields": fields
+        }
+        digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+        return f"{generation}:{digest}"
+
+    def get(self, key):
+        """
+        :return: Tuple of (payload, next cursor or None), or None on a miss.
+        """
+        if key is None:
+            return None
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        # Entries are stored as "<next cursor>\n<payload>"; cursors are base64 so never contain a newline
+        cursor, _, payload = entry.partition(b"\n")
+        return payload, cursor.decode() or None
+
+    def set(self, key, payload, next_cursor=None):
+        if key is None:
+            return
+        if isinstance(payload, str):
+            payload = payload.encode()
+        self.backend.set(key, (next_cursor or "").encode() + b"\n" + payload)
+
+    def check_generation(self):
+        generation = index_generation(self.es, self.index_name)
+        if generation != self.generation:
+            if self.generation is not None:
+                self.backend.clear()
+            self.generation = generation
+        return generation
+
+    def _current_generation(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="search-cache-generation", daemon=True)
+                    self._thread.start()
+        return self.generation
+
+    def _run(self):
+        while True:
+            try:
+                self.check_generation()
+            except Exception as e:
+                # Stop serving cached entries until the generation can be confirmed again
+                self.generation = None
+                logger.warning("Failed to check index generation", extra={"index": self.index_name, "error": str(e)})
+            time.sleep(self.generation_check_interval)
+
+
+def create_search_cache(es):
+    """
+    Build the /search cache configured in `Config`, or None when caching is disabled.
+    """
+    if not Config.SEARCH_CACHE_ENABLED:
+        return None
+    if Config.SEARCH_CACHE_BACKEND == 'redis':
+        backend = RedisCache(Config.SEARCH_CACHE_REDIS_URL, prefix="search:", ttl=Config.SEARCH_CACHE_TTL)
+    else:
+        backend = LRUCache(Config.SEARCH_CACHE_MAX_BYTES, ttl=Config.SEARCH_CACHE_TTL)
+    return SearchCache(es, backend)
@@ -0,0 +1,94 @@
+from collections import namedtuple
+from config import Config
+from utils.facets import parse_facets, build_facets_body, build_search_msearch, split_search_responses
+from utils.pagination import parse_size, decode_cursor, next_cursor
+from utils.query_builder import build_search_body, build_filter_clauses
+from utils.responses import dumps, parse_fields
+from utils.metrics import record_hits, log_profile
+
+# Filter parameters /search accepts, named as build_filter_clauses expects them
+SEARCH_FILTER_PARAMS = ['type', 'season', 'maxPrice', 'rating', 'timezone', 'lat', 'lon', 'radius', 'region']
+
+# `searches` holds the _msearch lines pairing the hits with their facet counts, or None without facets
+SearchRequest = namedtuple("SearchRequest", ["query", "filters", "sort", "size", "cursor", "facets", "fields",
+                                             "body", "searches"])
+
+
+def parse_search_request(args):
+    """
+    Parse the /search query arguments and build the destinations search, for the Flask and Quart apps alike.
+    :param args: The request's query arguments.
+    :return: SearchRequest, or None when there is neither a query nor a location to search around.
+    :raises ValueError: If a parameter is invalid.
+    """
+    query = args.get('q', '').strip()
+    filters = {name: args.get(name) for name in SEARCH_FILTER_PARAMS}
+    if not query and not (filters['lat'] or filters['region']):
+        return None
+
+    sort = args.get('sort', 'price')
+    cursor = args.get('cursor') or None
+    size = parse_size(args.get('size'))
+    search_after = decode_cursor(cursor)
+    facets = parse_facets(args.get('facets'))
+    fields = parse_fields(args.get('fields'))
+    # `fields` narrows the list view's `_source` further
+    body = build_search_body(query, filters, sort, size, search_after, source=fields or Config.DESTINATION_LIST_FIELDS)
+    searches = None
+    if facets:
+        # Facet counts ride along in the same round-trip as the hits
+        searches = build_search_msearch(body, build_facets_body(query, build_filter_clauses(filters), facets))
+    return SearchRequest(query, filters, sort, size, cursor, facets, fields, body, searches)
+
+
+def search_cache_key(search_cache, search_request):
+    """
+    :return: The search cache key for this request, or None when caching is disabled.
+    """
+    if not search_cache:
+        return None
+    return search_cache.make_key(search_request.query, search_request.filters, search_request.sort,
+                                 search_request.size, search_request.cursor, search_request.facets,
+                                 search_request.fields)
+
+
+def complete_search(search_request, result, profiled=False):
+    """
+    Record the search metrics and format its result as the /search response body.
+    :param result: Response of the search the request asked for (see `read_search_result`).
+    :param profiled: Whether the search body was sampled by `attach_profile`.
+    :return: Tuple of (encoded JSON payload, cursor for the next page or None).
+    """
+    response, facet_counts = read_search_result(search_request, result)
+    record_hits("destinations_search", response)
+    if profiled:
+        log_profile("destinations_search", response)
+    return build_search_payload(search_request, response['hits']['hits'], facet_counts)
+
+
+def read_search_result(search_request, result):
+    """
+    Unpack the result of the search the request asked for (`_msearch` when it has `searches`).
+    :return: Tuple of (search response, facet counts or None).
+    """
+    if search_request.searches:
+        return split_search_responses(result['responses'])
+    return result, None
+
+
+def build_search_payload(search_request, hits, facet_counts=None):
+    """
+    Format search hits as the /search response body.
+    :return: Tuple of (encoded JSON payload, cursor for the next page or None).
+    """
+    results = []
+    for hit in hits:
+        result = {'score': hit['_score'], **hit['_source']}
+        if search_request.sort == 'distance':
+            # The first sort value is the distance from lat/lon in km
+            result['distance_km'] = round(hit['sort'][0], 2)
+        results.append(result)
+
+    # Without facets the body stays the plain list older clients expect
+    payload = dumps({"results": results, "facets": facet_counts} if search_request.facets else results)
+    return payload, next_cursor(hits, search_request.size)
@@ -0,0 +1,100 @@
+import hashlib
+import heapq
+import math
+import time
+import numpy as np
+
+
+class CountMinSketch:
+    """
+    Fixed-size frequency sketch: estimates never undercount and overcount by at
+    most about `total / width` with probability `1 - e^-depth`.
+    """
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+
+    def add(self, key, weight=1.0):
+        columns = self._columns(key)
+        self.table[self._rows, columns] += weight
+        return float(self.table[self._rows, columns].min())
+
+    def estimate(self, key):
+        return float(self.table[self._rows, self._columns(key)].min())
+
+    def scale(self, factor):
+        self.table *= factor
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        # Double hashing derives `depth` independent-enough columns from one digest
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+
+class DecayedTopK:
+    """
+    Time-decayed heavy hitters: a count-min sketch for every key plus a min-heap
+    holding the `k` most popular ones.
+
+    Uses forward decay: an event at time t is added with weight e^(λ(t - landmark)),
+    so nothing has to be touched as time passes; estimates are scaled back to
+    "now" when read. The landmark moves forward before the weights overflow.
+    """
+
+    def __init__(self, k=50, half_life=6 * 3600, width=2048, depth=4, now=None):
+        self.k = k
+        self.decay_rate = math.log(2) / half_life
+        self.sketch = CountMinSketch(width, depth)
+        self.landmark = now if now is not None else time.time()
+        self._top = {}
+        self._heap = []
+
+    def add(self, key, weight=1.0, timestamp=None):
+        timestamp = timestamp if timestamp is not None else time.time()
+        exponent = self.decay_rate * (timestamp - self.landmark)
+        if exponent > 50:
+            self._rescale(timestamp)
+            exponent = self.decay_rate * (timestamp - self.landmark)
+        estimate = self.sketch.add(key, weight * math.exp(exponent))
+
+        if key in self._top or len(self._top) < self.k:
+            self._top[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        elif estimate > self._peek_min()[0]:
+            _, evicted = heapq.heappop(self._heap)
+            del self._top[evicted]
+            self._top[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+
+        # Updates leave stale heap entries behind; rebuild before they outnumber the live ones
+        if len(self._heap) > 4 * self.k + 64:
+            self._heap = [(count, key) for key, count in self._top.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, now=None):
+        """
+        :return: List of (key, decayed count at `now`) for the tracked keys, most popular first.
+        """
+        now = now if now is not None else time.time()
+        factor = math.exp(-self.decay_rate * (now - self.landmark))
+        return sorted(((key, count * factor) for key, count in self._top.items()),
+                      key=lambda item: item[1], reverse=True)
+
+    def _peek_min(self):
+        # Drop heap entries made stale by later updates of the same key
+        while self._heap[0][1] not in self._top or self._top[self._heap[0][1]] != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def _rescale(self, timestamp):
+        factor = math.exp(-self.decay_rate * (timestamp - self.landmark))
+        self.sketch.scale(factor)
+        self._top = {key: count * factor for key, count in self._top.items()}
+        self._heap = [(count, key) for key, count in self._top.items()]
+        heapq.heapify(self._heap)
+        self.landmark = timestamp
@@ -0,0 +1,104 @@
+import threading
+import time
+from elasticsearch.helpers import scan
+from config import Config
+from utils.es_utils import index_generation
+from utils.prefix_trie import PrefixTrie
+from utils.log import get_logger
+
+logger = get_logger("suggestions")
+
+SUGGEST_FIELDS = ["id", "destination"]
+
+
+def build_suggest_body(prefix, size=Config.SUGGEST_SIZE):
+    """
+    Completion suggester request on `destination.suggest`: an FST prefix lookup, no scoring.
+    """
+    return {
+        "_source": SUGGEST_FIELDS,
+        "suggest": {
+            "destination": {
+                "prefix": prefix,
+                "completion": {
+                    "field": "destination.suggest",
+                    "size": size,
+                    "skip_duplicates": True
+                }
+            }
+        }
+    }
+
+
+def parse_suggest_response(response):
+    options = response.get('suggest', {}).get('destination', [{}])[0].get('options', [])
+    return [option['_source'] for option in options]
+
+
+class DestinationSuggester:
+    """
+    In-process typeahead for short prefixes, in front of the completion suggester.
+
+    Prefixes of up to `Config.SUGGEST_TRIE_MAX_PREFIX` characters are answered from
+    a `PrefixTrie` of destination names, ranked by rating; a daemon thread rebuilds
+    it when the destinations index generation changes. Longer prefixes return None
+    so the caller queries Elasticsearch, and `fallback` serves any prefix the trie
+    covers when Elasticsearch fails.
+    """
+
+    def __init__(self, es, index_name="destinations", max_depth=Config.SUGGEST_TRIE_MAX_PREFIX,
+                 refresh_interval=Config.SUGGEST_TRIE_REFRESH_INTERVAL):
+        self.es = es
+        self.index_name = index_name
+        self.max_depth = max_depth
+        self.refresh_interval = refresh_interval
+        self.trie = None
+        self.generation = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def lookup(self, prefix, size=Config.SUGGEST_SIZE):
+        """
+        :return: Suggestions for a hot (short) prefix, or None when Elasticsearch should answer.
+        """
+        trie = self._current_trie()
+        if trie is None:
+            return None
+        return trie.complete(prefix, size)
+
+    def fallback(self, prefix, size=Config.SUGGEST_SIZE):
+        trie = self.trie
+        if trie is None:
+            return []
+        # Best effort: the trie only knows the leading characters, so filter its candidates on the rest
+        prefix = PrefixTrie.normalize(prefix)
+        candidates = trie.complete(prefix[:self.max_depth]) or []
+        return [c for c in candidates if PrefixTrie.normalize(c['destination']).startswith(prefix)][:size]
+
+    def refresh(self):
+        generation = index_generation(self.es, self.index_name)
+        if generation != self.generation or self.trie is None:
+            trie = PrefixTrie(Config.SUGGEST_MAX_SIZE, self.max_depth)
+            for hit in scan(self.es, index=self.index_name, query={"_source": SUGGEST_FIELDS + ["rating"]}):
+                source = hit['_source']
+                if source.get('destination'):
+                    trie.insert(source['destination'], {field: source.get(field) for field in SUGGEST_FIELDS},
+                                source.get('rating') or 0)
+            self.trie, self.generation = trie, generation
+        return self.trie
+
+    def _current_trie(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="suggest-trie-refresh", daemon=True)
+                    self._thread.start()
+        return self.trie
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Failed to refresh suggestions", extra={"index": self.index_name, "error": str(e)})
+            time.sleep(self.refresh_interval)
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from config import Config
+from utils.es_utils import index_generation
+from utils.log import get_logger
+from utils.metrics import es_timer
+
+logger = get_logger("trends_cache")
+
+TrendsSnapshot = namedtuple("TrendsSnapshot", ["version", "trends", "loaded_at"])
+
+
+class TrendsCache:
+    """
+    In-process snapshot of the travel trends index shared by every request.
+
+    The snapshot is loaded once, then a daemon thread checks the index generation
+    every `refresh_interval` seconds and reloads only when it changed or when the
+    snapshot is older than `ttl`. Readers never wait on Elasticsearch after the
+    first load.
+    """
+
+    def __init__(self, es, index_name=Config.TRENDS_INDEX, ttl=Config.TRENDS_CACHE_TTL,
+                 refresh_interval=Config.TRENDS_REFRESH_INTERVAL, fetch_size=Config.TRENDS_FETCH_SIZE):
+        self.es = es
+        self.index_name = index_name
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.fetch_size = fetch_size
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._load()
+            snapshot = self._snapshot
+        self._ensure_refresher()
+        return snapshot
+
+    async def get_async(self):
+        """
+        `get` for event loops: the first load runs on a worker thread, so a cold cache never
+        blocks other requests while the snapshot is fetched. Later calls return immediately.
+        """
+        if self._snapshot is None:
+            return await asyncio.to_thread(self.get)
+        return self.get()
+
+    def refresh(self, force=False):
+        version = index_generation(self.es, self.index_name)
+        snapshot = self._snapshot
+        expired = snapshot is None or time.time() - snapshot.loaded_at >= self.ttl
+        if force or expired or snapshot.version != version:
+            self._snapshot = self._load(version)
+        return self._snapshot
+
+    def stop(self):
+        self._stop.set()
+
+    def _load(self, version=None):
+        if version is None:
+            version = index_generation(self.es, self.index_name)
+        with es_timer("trends_scan"):
+            response = self.es.search(index=self.index_name, body={
+                "query": {
+                    "match_all": {}
+                },
+                "_source": ["trend", "season", "popularity"],
+                "size": self.fetch_size
+            })
+        trends = [hit['_source'] for hit in response['hits']['hits']]
+        return TrendsSnapshot(version, trends, time.time())
+
+    def _ensure_refresher(self):
+        if self._stop.is_set():
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trends-cache-refresher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Failed to refresh travel trends snapshot", extra={"error": str(e)})